@@ -1,16 +1,106 @@
 # ==================== config/logging_config.py ====================
+import atexit
 import logging
 import logging.handlers
+import queue
+import threading
 from pathlib import Path
+from typing import Dict, List, Optional
 from config.settings import get_settings
+from src.utils.hot_log import set_default_interval
+from src.utils.metrics import metrics
 import logging
 import sys
 
 
-def setup_logging():
-    """Setup logging configuration"""
-    settings = get_settings()
+# Default handler routing: logger name -> handler names (see LOG_HANDLERS)
+DEFAULT_ROUTES = "root=console,file,errors;trading=trades"
+
+_SENTINEL = None
+_listener: Optional['LogListener'] = None
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that tags records with a route and drops them when the queue is full"""
+    
+    def __init__(self, log_queue: queue.Queue, route: str):
+        super().__init__(log_queue)
+        self.route = route
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait((self.route, record))
+        except queue.Full:
+            # Never block the event loop on a slow disk
+            self.dropped += 1
+
+
+class LogListener:
+    """
+    Writes queued log records on a background thread
+    
+    Records are taken off the queue in batches and passed to the handlers of
+    the logger that queued them, respecting each handler's level.
+    """
+    
+    def __init__(self, log_queue: queue.Queue, routes: Dict[str, List[logging.Handler]], batch_size: int = 256):
+        self.queue = log_queue
+        self.routes = routes
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Write everything still queued, then stop the thread and close the handlers"""
+        if self._thread is None:
+            return
+        self.queue.put(_SENTINEL)
+        self._thread.join()
+        self._thread = None
+        
+        for handler in {h for handlers in self.routes.values() for h in handlers}:
+            handler.close()
     
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stopping = False
+            for item in batch:
+                if item is _SENTINEL:
+                    stopping = True
+                    continue
+                route, record = item
+                for handler in self.routes.get(route, ()):
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            
+            if stopping:
+                return
+
+
+def parse_routes(spec: str) -> Dict[str, List[str]]:
+    """Parse 'root=console,file;trading=trades' into {logger: [handler names]}"""
+    routes = {}
+    for entry in spec.split(';'):
+        if '=' not in entry:
+            continue
+        logger_name, handler_names = entry.split('=', 1)
+        routes[logger_name.strip()] = [name.strip() for name in handler_names.split(',') if name.strip()]
+    return routes
+
+
+def build_handlers(logs_dir: Path) -> Dict[str, logging.Handler]:
+    """Named handlers that LOG_HANDLERS can attach to loggers"""
     # Create formatters
     detailed_formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s'
@@ -20,47 +110,116 @@ def setup_logging():
         '%(asctime)s - %(levelname)s - %(message)s'
     )
     
-    # Root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, settings.log_level))
-    
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(simple_formatter)
-    root_logger.addHandler(console_handler)
     
     # File handler - detailed logs
-    log_file = settings.logs_dir / "trading_bot.log"
     file_handler = logging.handlers.RotatingFileHandler(
-        log_file, maxBytes=10*1024*1024, backupCount=5
+        logs_dir / "trading_bot.log", maxBytes=10*1024*1024, backupCount=5, encoding='utf-8', delay=True
     )
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(file_handler)
     
     # Error file handler
-    error_file = settings.logs_dir / "errors.log"
     error_handler = logging.handlers.RotatingFileHandler(
-        error_file, maxBytes=5*1024*1024, backupCount=3
+        logs_dir / "errors.log", maxBytes=5*1024*1024, backupCount=3, encoding='utf-8', delay=True
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(detailed_formatter)
-    root_logger.addHandler(error_handler)
     
     # Trading file handler - for trades and strategy logs
-    trades_file = settings.logs_dir / "trades.log"
     trades_handler = logging.handlers.RotatingFileHandler(
-        trades_file, maxBytes=5*1024*1024, backupCount=10
+        logs_dir / "trades.log", maxBytes=5*1024*1024, backupCount=10, encoding='utf-8', delay=True
     )
     trades_handler.setLevel(logging.INFO)
     trades_handler.setFormatter(detailed_formatter)
     
-    # Create trading logger
-    trading_logger = logging.getLogger('trading')
-    trading_logger.addHandler(trades_handler)
-    trading_logger.setLevel(logging.INFO)
+    return {
+        'console': console_handler,
+        'file': file_handler,
+        'errors': error_handler,
+        'trades': trades_handler
+    }
+
+
+def configure_logging(logs_dir: Path, level: str = "INFO", routes: str = DEFAULT_ROUTES,
+                      use_queue: bool = True, queue_size: int = 10000) -> Optional[LogListener]:
+    """
+    Attach handlers to loggers
+    
+    Args:
+        routes: Logger -> handler names, e.g. 'root=console,file,errors;trading=trades'
+        use_queue: Log through a queue so file I/O and rotation happen on a
+            listener thread instead of the event loop
+        queue_size: Records buffered before new ones are dropped
+    
+    Returns:
+        The running LogListener in queue mode, otherwise None
+    """
+    global _listener
+    shutdown_logging()
+    
+    handlers = build_handlers(Path(logs_dir))
+    routing = parse_routes(routes)
+    log_queue = queue.Queue(maxsize=queue_size) if use_queue else None
+    
+    listener_routes = {}
+    for logger_name, handler_names in routing.items():
+        logger = logging.getLogger() if logger_name == 'root' else logging.getLogger(logger_name)
+        if logger_name == 'root':
+            logger.setLevel(getattr(logging, level))
+        elif logger_name == 'trading':
+            logger.setLevel(logging.INFO)
+        
+        # Replace handlers from an earlier call
+        for handler in logger.handlers[:]:
+            if isinstance(handler, DroppingQueueHandler) or getattr(handler, '_configured', False):
+                logger.removeHandler(handler)
+                handler.close()
+        
+        targets = [handlers[name] for name in handler_names if name in handlers]
+        if log_queue is not None:
+            listener_routes[logger_name] = targets
+            logger.addHandler(DroppingQueueHandler(log_queue, logger_name))
+        else:
+            for handler in targets:
+                handler._configured = True
+                logger.addHandler(handler)
+    
+    if log_queue is None:
+        return None
+    
+    metrics.register_gauge('trading_log_queue', 'Log records waiting to be written', log_queue.qsize)
+    _listener = LogListener(log_queue, listener_routes)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued log records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging():
+    """Setup logging configuration"""
+    settings = get_settings()
+    set_default_interval(settings.log_hot_interval)
+    listener = configure_logging(
+        settings.logs_dir,
+        settings.log_level,
+        settings.log_handlers,
+        use_queue=settings.log_async,
+        queue_size=settings.log_queue_size
+    )
+    if listener is not None:
+        atexit.register(shutdown_logging)
     
+
 # Configure logging with UTF-8 encoding for emojis
 class UTF8StreamHandler(logging.StreamHandler):
     def __init__(self, stream=None):
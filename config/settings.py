@@ -12,20 +12,60 @@ class Settings(BaseSettings):
     upstox_api_key: str = Field(..., env="UPSTOX_API_KEY")
     upstox_api_secret: str = Field(..., env="UPSTOX_API_SECRET") 
     upstox_redirect_uri: str = Field(..., env="UPSTOX_REDIRECT_URI")
+    upstox_pool_size: int = Field(10, env="UPSTOX_POOL_SIZE")  # Pooled keep-alive connections
+    upstox_keepalive_timeout: float = Field(60, env="UPSTOX_KEEPALIVE_TIMEOUT")  # Seconds an idle connection is kept
+    upstox_dns_cache_ttl: int = Field(300, env="UPSTOX_DNS_CACHE_TTL")
+    upstox_request_timeout: float = Field(10, env="UPSTOX_REQUEST_TIMEOUT")
+    upstox_connect_timeout: float = Field(5, env="UPSTOX_CONNECT_TIMEOUT")
+    upstox_rate_per_second: int = Field(50, env="UPSTOX_RATE_PER_SECOND")  # Broker limits per API
+    upstox_rate_per_minute: int = Field(500, env="UPSTOX_RATE_PER_MINUTE")
+    upstox_rate_per_30_minutes: int = Field(2000, env="UPSTOX_RATE_PER_30_MINUTES")
+    upstox_quote_ttl: float = Field(1.0, env="UPSTOX_QUOTE_TTL")  # Seconds batched quotes are cached
+    upstox_api_host: Optional[str] = Field(None, env="UPSTOX_API_HOST")  # e.g. http://127.0.0.1:8080 for scripts/mock_upstox_server.py
     
     # Trading
     environment: str = Field("development", env="ENVIRONMENT")
     paper_trading: bool = Field(True, env="PAPER_TRADING")
     max_position_size: float = Field(100000, env="MAX_POSITION_SIZE")
     risk_per_trade: float = Field(0.02, env="RISK_PER_TRADE")
+    paper_option_pricing: bool = Field(True, env="PAPER_OPTION_PRICING")  # Fill paper CE/PE orders at synthetic ATM premiums, not the index price
+    option_iv: float = Field(0.15, env="OPTION_IV")  # Annualised IV used for synthetic premiums
+    option_strike_step: float = Field(50, env="OPTION_STRIKE_STEP")  # ATM strike rounding (NIFTY 50, BANKNIFTY 100)
+    option_expiry_weekday: int = Field(3, env="OPTION_EXPIRY_WEEKDAY")  # Weekly expiry day (Monday=0)
     
     # Logging
     log_level: str = Field("INFO", env="LOG_LEVEL")
+    log_async: bool = Field(True, env="LOG_ASYNC")  # Write logs from a listener thread instead of the event loop
+    log_queue_size: int = Field(10000, env="LOG_QUEUE_SIZE")  # Records buffered before new ones are dropped
+    log_hot_interval: float = Field(30, env="LOG_HOT_INTERVAL")  # Seconds between repeats of a per-candle log line (0 = all)
+    log_handlers: str = Field("root=console,file,errors;trading=trades", env="LOG_HANDLERS")  # logger=handler,...;...
     
     # Telegram
     telegram_bot_token: Optional[str] = Field(None, env="TELEGRAM_BOT_TOKEN")
     telegram_chat_id: Optional[str] = Field(None, env="TELEGRAM_CHAT_ID")
     enable_notifications: bool = Field(True, env="ENABLE_NOTIFICATIONS")
+    telegram_outbox_size: int = Field(1000, env="TELEGRAM_OUTBOX_SIZE")  # Queued messages before the oldest are dropped
+    telegram_max_retries: int = Field(3, env="TELEGRAM_MAX_RETRIES")
+    telegram_coalesce_seconds: float = Field(5.0, env="TELEGRAM_COALESCE_SECONDS")  # Merge alerts raised within this window (0 = off)
+    
+    # Strategy dispatch
+    strategy_deadline_ms: int = Field(500, env="STRATEGY_DEADLINE_MS")  # Per-strategy signal deadline per candle
+    
+    # Metrics
+    metrics_enabled: bool = Field(True, env="METRICS_ENABLED")
+    metrics_host: str = Field("0.0.0.0", env="METRICS_HOST")
+    metrics_port: int = Field(8000, env="METRICS_PORT")  # Prometheus text format at /metrics
+    
+    # Latency tracing (feed receipt -> broker ack)
+    trace_enabled: bool = Field(True, env="TRACE_ENABLED")
+    trace_sample_rate: float = Field(0.01, env="TRACE_SAMPLE_RATE")  # Fraction of plain ticks traced; candles always are
+    trace_format: str = Field("chrome", env="TRACE_FORMAT")  # chrome (chrome://tracing, Perfetto) or jsonl
+    
+    # On-demand profiling (SIGUSR1 always toggles it; /debug/profile on the metrics server when enabled)
+    profiling_enabled: bool = Field(False, env="PROFILING_ENABLED")  # Serve the HTTP controls
+    profiling_mode: str = Field("sample", env="PROFILING_MODE")  # sample (stack sampling) or cprofile
+    profiling_seconds: float = Field(30.0, env="PROFILING_SECONDS")  # Session length when no duration is given (0 = until stopped)
+    profiling_token: str = Field("", env="PROFILING_TOKEN")  # Bearer token for /debug/profile; empty = loopback clients only
     
     # Database
     database_url: str = Field("sqlite:///./data/trading_bot.db", env="DATABASE_URL")
@@ -34,6 +74,9 @@ class Settings(BaseSettings):
     backtest_start_date: str = Field("2024-01-01", env="BACKTEST_START_DATE")
     backtest_end_date: str = Field("2024-12-31", env="BACKTEST_END_DATE")
     backtest_initial_capital: float = Field(100000, env="BACKTEST_INITIAL_CAPITAL")
+    backtest_chunk: str = Field("day", env="BACKTEST_CHUNK")  # day or week
+    backtest_warmup_bars: int = Field(100, env="BACKTEST_WARMUP_BARS")
+    backtest_workers: int = Field(0, env="BACKTEST_WORKERS")  # 0 = all cores, 1 = serial
     
     # Paths
     @property
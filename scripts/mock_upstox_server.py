@@ -0,0 +1,57 @@
+# ==================== scripts/mock_upstox_server.py ====================
+#!/usr/bin/env python3
+"""
+Run a local Upstox stand-in for end-to-end tests
+
+Serves the REST endpoints the bot uses, the market and portfolio feed
+websockets, and scripted latency, errors and fills. Point the bot at it
+with UPSTOX_API_HOST=http://127.0.0.1:8080 (any access token is accepted).
+
+    python scripts/mock_upstox_server.py --port 8080 --scenario scenario.json
+
+A scenario file holds MockBehavior fields, e.g.
+    {"latency": 0.02, "order_latency": 0.15, "rate_limit_every": 100, "fill_delay": 0.5}
+and can be changed while running with POST /mock/behavior.
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.mock_upstox import MockBehavior, MockUpstoxServer
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--scenario', type=Path, help='JSON file of MockBehavior settings')
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    behavior = MockBehavior.from_file(args.scenario) if args.scenario else MockBehavior()
+    server = MockUpstoxServer(args.host, args.port, behavior, args.seed)
+    if not await server.start():
+        return
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
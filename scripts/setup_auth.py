@@ -17,6 +17,7 @@ from src.upstox_client import UpstoxClient
 
 async def main():
     """Setup authentication"""
+    client = None
     try:
         settings = get_settings()
         
@@ -90,6 +91,9 @@ async def main():
         print(f"   Error type: {type(e).__name__}")
         import traceback
         traceback.print_exc()
+    finally:
+        if client:
+            await client.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
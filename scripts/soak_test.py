@@ -0,0 +1,89 @@
+# ==================== scripts/soak_test.py ====================
+#!/usr/bin/env python3
+"""
+Load and soak test the market data path with a synthetic Upstox feed
+
+Feeds generated messages straight into WebSocketManager's message handler
+(no broker connection, any time of day) and reports sustained throughput,
+handler latency percentiles and memory growth. With --strategies, completed
+Heikin Ashi candles (once 15 have built up, as in the bot) are also
+evaluated by the bot's strategies.
+
+    python scripts/soak_test.py --rate 5000 --instruments 50 --feed market --duration 7200
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.websocket.synthetic_feed import FEED_TYPES, FeedDriver, SyntheticFeed
+from src.websocket.websocket_manager import MarketHoursChecker, WebSocketManager
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--instruments', type=int, default=3, help='Instruments in the feed')
+    parser.add_argument('--feed', choices=FEED_TYPES, default='index', help='Message shape')
+    parser.add_argument('--rate', type=float, default=1000, help='Target ticks per second')
+    parser.add_argument('--batch', type=int, default=1, help='Instrument updates per message')
+    parser.add_argument('--volatility', type=float, default=0.0002, help='Relative price change per tick (std dev)')
+    parser.add_argument('--duration', type=float, default=600, help='Seconds to run')
+    parser.add_argument('--report-every', type=float, default=60, help='Seconds between progress lines')
+    parser.add_argument('--strategies', action='store_true', help='Evaluate strategies on every HA candle')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', type=Path, default=None, help='Summary JSON (default data/soak/)')
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger('soak_test')
+
+    manager = WebSocketManager('soak-test', 'soak-test', require_sdk=False)
+    manager.market_checker = MarketHoursChecker(always_open=True)
+    candles = {'count': 0}
+
+    if args.strategies:
+        from src.strategy.dispatcher import StrategyDispatcher
+        from src.strategy.enhanced_pine_script_strategy import EnhancedPineScriptStrategy
+
+        dispatcher = StrategyDispatcher()
+        strategies = [EnhancedPineScriptStrategy('soak', {'trading_mode': 'BIDIRECTIONAL'})]
+
+    async def on_ha_candle(ha_candle):
+        candles['count'] += 1
+        if args.strategies:
+            market_data = {'symbol': ha_candle['symbol'], 'ha_candle': ha_candle,
+                           'price': ha_candle['ha_close'], 'current_price': ha_candle['ha_close']}
+            await dispatcher.dispatch(strategies, lambda s: market_data, lambda s: [])
+
+    manager.set_callbacks(on_ha_candle=on_ha_candle)
+
+    feed = SyntheticFeed(args.instruments, args.feed, args.volatility, args.batch, seed=args.seed)
+    driver = FeedDriver(manager._on_market_message, feed, args.rate, args.report_every)
+    logger.info(f"Soak test: {args.instruments} {args.feed} instruments at {args.rate:,.0f} ticks/s for {args.duration:,.0f}s")
+
+    summary = await driver.run(args.duration)
+    summary['ha_candles'] = candles['count']
+
+    output = args.output or project_root / 'data' / 'soak' / f"soak_{datetime.now():%Y%m%d_%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(summary, indent=2))
+
+    latency = summary['latency_us']
+    logger.info(f"Sustained {summary['achieved_tick_rate']:,.0f} ticks/s (target {args.rate:,.0f}) | "
+                f"handler p50 {latency['p50']}us p99 {latency['p99']}us p99.9 {latency['p999']}us | "
+                f"RSS {summary['rss_start_mb']} -> {summary['rss_end_mb']}MB | {summary['ha_candles']} HA candles")
+    logger.info(f"Summary written to {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+# ==================== scripts/startup_report.py ====================
+#!/usr/bin/env python3
+"""
+Report what importing the bot costs, per top-level package
+
+Runs `python -X importtime` in a fresh interpreter so nothing is cached,
+then totals the self time of every module by its top-level package.
+
+    python scripts/startup_report.py --module src.trading_bot --top 15
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='src.trading_bot', help='Module to import')
+    parser.add_argument('--top', type=int, default=15, help='Packages to list')
+    return parser.parse_args()
+
+
+def import_costs(module: str) -> dict:
+    """Top-level package -> self import time in microseconds"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=project_root, capture_output=True, text=True, check=True
+    )
+    costs = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        costs[name.strip().split('.')[0]] += int(self_us)
+    return costs
+
+
+def main():
+    args = parse_args()
+    costs = import_costs(args.module)
+    total = sum(costs.values())
+
+    print(f"import {args.module}: {total / 1e6:.3f}s")
+    for package, us in sorted(costs.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {package:<24} {us / 1e3:8.1f}ms  {us / total:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
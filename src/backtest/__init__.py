@@ -0,0 +1,15 @@
+# ==================== src/backtest/__init__.py ====================
+"""
+Backtesting package
+"""
+from .engine import BacktestEngine
+from .fills import IntrabarExitSimulator
+from .metrics import StreamingMetrics, BacktestReport
+from .parallel import ParallelBacktestRunner, split_into_chunks
+from .simulation import EventDrivenBacktest, SimulatedClock, InMemoryBroker, MutedNotifier, build_simulated_bot
+
+__all__ = [
+    'BacktestEngine', 'IntrabarExitSimulator', 'StreamingMetrics', 'BacktestReport',
+    'ParallelBacktestRunner', 'split_into_chunks',
+    'EventDrivenBacktest', 'SimulatedClock', 'InMemoryBroker', 'MutedNotifier', 'build_simulated_bot'
+]
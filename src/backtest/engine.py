@@ -0,0 +1,489 @@
+# ==================== src/backtest/engine.py ====================
+"""
+Backtesting engine for strategies
+"""
+from typing import Dict, Optional
+import pandas as pd
+import numpy as np
+from datetime import datetime
+
+from src.strategy.base_strategy import BaseStrategy
+from src.models.order import Order, OrderType, TransactionType, OrderStatus
+from src.models.position import Position
+from src.utils.option_pricing import OptionPremiumModel
+from src.backtest.fills import IntrabarExitSimulator
+from src.backtest.metrics import StreamingMetrics, BacktestReport
+
+def period_keys(timestamps: pd.Series, period: str) -> pd.Series:
+    """Trading day or week each bar belongs to"""
+    if period == 'week':
+        return timestamps.dt.to_period('W')
+    if period == 'day':
+        return timestamps.dt.normalize()
+    raise ValueError(f"Unknown period: {period} (expected 'day' or 'week')")
+
+
+class BacktestEngine:
+    """Backtesting engine"""
+
+    def __init__(self, initial_capital: float, start_date: str, end_date: str,
+                 option_model: Optional[OptionPremiumModel] = None,
+                 exit_simulator: Optional[IntrabarExitSimulator] = None, keep_equity_curve: bool = False):
+        self.initial_capital = initial_capital
+        self.current_capital = initial_capital
+        self.start_date = datetime.strptime(start_date, '%Y-%m-%d')
+        self.end_date = datetime.strptime(end_date, '%Y-%m-%d')
+
+        self.trades = []
+        self.positions = {}
+        self.strategy_name = ''
+
+        # Equity, drawdown, exposure and Sharpe accumulate in O(1) per bar;
+        # the full per-bar curve is only kept when asked for (chunk workers)
+        self.metrics = StreamingMetrics(initial_capital)
+        self.keep_equity_curve = keep_equity_curve
+        self.portfolio_values = []
+
+        # Warm-up support: bars before record_from only build strategy state
+        self.recording = True
+        self.record_start_value = initial_capital
+
+        # Option pricing: when set, CE/PE orders fill at synthetic premiums
+        # and each position remembers the contract (strike/expiry) it bought
+        self.option_model = option_model
+        self.contracts = {}
+
+        # Intrabar exits: when set, each entry's stop/target fill is found up
+        # front from the bar highs/lows and executed on the bar it happens
+        self.exit_simulator = exit_simulator
+        self.pending_exits = {}
+        self.bars = {}
+        self.bar_index = -1
+
+    def load_historical_data(self, symbol: str) -> pd.DataFrame:
+        """Load historical data for backtesting"""
+        # This is a placeholder - you'll need to implement actual data loading
+        # You can use yfinance, Alpha Vantage, or other data sources
+
+        # Generate sample data for demonstration
+        dates = pd.date_range(start=self.start_date, end=self.end_date, freq='1min')
+        np.random.seed(42)
+
+        # Generate realistic option price data
+        base_price = 100
+        price_changes = np.random.normal(0, 2, len(dates))
+        prices = base_price + np.cumsum(price_changes)
+        prices = np.maximum(prices, 1)  # Ensure positive prices
+
+        data = pd.DataFrame({
+            'timestamp': dates,
+            'open': prices,
+            'high': prices * (1 + np.random.uniform(0, 0.02, len(prices))),
+            'low': prices * (1 - np.random.uniform(0, 0.02, len(prices))),
+            'close': prices,
+            'volume': np.random.randint(100, 10000, len(prices))
+        })
+
+        return data
+
+    async def run_backtest(self, strategy: BaseStrategy, symbol: str, data: Optional[pd.DataFrame] = None,
+                           record_from: Optional[datetime] = None, verbose: bool = True,
+                           report_dir: Optional[str] = None, flatten: Optional[str] = None):
+        """
+        Run backtest for a strategy
+
+        Args:
+            strategy: Strategy to evaluate
+            symbol: Symbol to trade
+            data: Pre-loaded bars (loaded via load_historical_data if None)
+            record_from: Bars before this timestamp are a warm-up prefix - the
+                strategy sees them but its entries are not executed and no
+                portfolio values are recorded, so recording starts flat
+            verbose: Print header and results
+            report_dir: Write CSV/JSON/PNG/HTML reports here when set
+            flatten: 'day' or 'week' - close open positions on the last bar of
+                each period (chunked runs do this at every chunk end)
+        """
+        if verbose:
+            print(f"Running backtest for {strategy.name} on {symbol}")
+            print(f"Period: {self.start_date.date()} to {self.end_date.date()}")
+            print(f"Initial Capital: ₹{self.initial_capital:,.2f}")
+
+        # Load historical data
+        if data is None:
+            data = self.load_historical_data(symbol)
+
+        # Price every bar's ATM CE/PE premium in one vectorized pass
+        with_options = self.option_model is not None
+        if with_options and 'ce_premium' not in data.columns:
+            data = self.option_model.add_premium_columns(data)
+
+        self.recording = record_from is None
+        self.strategy_name = strategy.name
+        if self.exit_simulator is not None:
+            self.load_bar_arrays(data)
+
+        # Strategies with evaluate_batch are scored once over the whole range;
+        # should_enter then only runs on bars that carry an entry signal
+        signals = strategy.evaluate_batch(self.batch_columns(data)) if strategy.supports_batch else None
+        entry_bars = (signals['ce_entry'] | signals['pe_entry']) if signals else None
+
+        period_ends = None
+        if flatten:
+            keys = period_keys(data['timestamp'], flatten)
+            period_ends = (keys != keys.shift(-1)).to_numpy()
+
+        for bar_index, row in enumerate(data.itertuples(index=False)):
+            self.bar_index = bar_index
+            current_time = row.timestamp
+            market_data = {
+                'symbol': symbol,
+                'price': row.close,
+                'high': row.high,
+                'low': row.low,
+                'volume': row.volume,
+                'timestamp': current_time
+            }
+            if with_options:
+                market_data.update({
+                    'iv': row.iv,
+                    'atm_strike': row.atm_strike,
+                    'expiry': row.expiry,
+                    'ce_premium': row.ce_premium,
+                    'pe_premium': row.pe_premium
+                })
+
+            if not self.recording and current_time >= record_from:
+                self.start_recording(market_data)
+
+            check_entry = True
+            if signals:
+                check_entry = bool(entry_bars[bar_index])
+                if check_entry or self.positions:
+                    market_data['signals'] = strategy.signals_at(signals, bar_index)
+
+            await self.process_bar(strategy, market_data, check_entry)
+
+            if period_ends is not None and period_ends[bar_index] and self.positions:
+                await self.close_all_positions(strategy, market_data, f"{flatten}_end")
+
+        # Generate results
+        if verbose or report_dir:
+            self.generate_results(report_dir, verbose)
+
+    def start_recording(self, market_data: dict):
+        """End the warm-up prefix (no entries were executed in it, so the book is flat)"""
+        self.recording = True
+        self.trades = []
+        self.portfolio_values = []
+        self.record_start_value = self.calculate_portfolio_value(market_data)
+        self.metrics.reset(self.record_start_value)
+
+    async def process_bar(self, strategy: BaseStrategy, market_data: dict, check_entry: bool = True):
+        """Evaluate the strategy on a single bar and update the portfolio"""
+        # Stops and targets touched inside this bar fill before the close is evaluated
+        if self.pending_exits:
+            await self.process_intrabar_exits(strategy, market_data)
+
+        # Check for entry signals
+        if check_entry:
+            entry_order = await strategy.should_enter(market_data)
+            if entry_order:
+                # Warm-up only primes strategy state, so positions can't leak into the recorded
+                # window; the book holds one position per symbol, so a second entry can't overwrite it
+                if self.recording and entry_order.symbol not in self.positions:
+                    await self.execute_order(entry_order, market_data)
+                else:
+                    await strategy.on_entry_dropped(entry_order)
+
+        # Check for exit signals
+        for position_key, position in list(self.positions.items()):
+            exit_order = await strategy.should_exit(position, market_data)
+            if exit_order:
+                await self.execute_order(exit_order, market_data)
+
+        if not self.recording:
+            return
+
+        # Update portfolio value, drawdown and exposure
+        portfolio_value = self.calculate_portfolio_value(market_data)
+        self.metrics.update(market_data['timestamp'], portfolio_value, portfolio_value - self.current_capital)
+
+        if self.keep_equity_curve:
+            self.portfolio_values.append({
+                'timestamp': market_data['timestamp'],
+                'value': portfolio_value,
+                'exposure': portfolio_value - self.current_capital
+            })
+
+    async def close_all_positions(self, strategy: BaseStrategy, market_data: dict, reason: str):
+        """Sell every open position at the current price and tell the strategy it is out"""
+        for symbol in list(self.positions):
+            await self.close_position(strategy, symbol, market_data, None, reason)
+
+    async def close_position(self, strategy: BaseStrategy, symbol: str, market_data: dict,
+                             fill_price: Optional[float], reason: str):
+        """
+        Sell one position and report the fill to the strategy, so it clears its in-trade state
+
+        Args:
+            fill_price: Exit price (None prices the exit at this bar like any other order)
+        """
+        position = self.positions[symbol]
+        exit_order = Order(
+            symbol=symbol,
+            quantity=position.quantity,
+            price=fill_price if fill_price is not None else market_data['price'],
+            order_type=OrderType.MARKET,
+            transaction_type=TransactionType.SELL,
+            instrument_key=position.instrument_key,
+            option_type=position.option_type or 'CE',
+            strategy_name=position.strategy_name or ''
+        )
+        if fill_price is None:
+            fill_price = self.get_execution_price(exit_order, market_data)
+        await self.execute_order(exit_order, market_data, fill_price=fill_price, exit_reason=reason)
+
+        exit_order.status = OrderStatus.FILLED
+        exit_order.filled_price = fill_price
+        exit_order.filled_quantity = exit_order.quantity
+        await strategy.on_order_filled(exit_order)
+
+    async def execute_order(self, order: Order, market_data: dict, fill_price: Optional[float] = None,
+                            exit_reason: Optional[str] = None):
+        """Execute order in backtest (fill_price overrides the simulated price)"""
+        try:
+            # Simulate order execution
+            execution_price = fill_price if fill_price is not None else self.get_execution_price(order, market_data)
+
+            if order.transaction_type == TransactionType.BUY:
+                cost = order.quantity * execution_price
+                # Worthless far-OTM premiums can't be bought
+                if 0 < execution_price and cost <= self.current_capital:
+                    # Create position
+                    position = Position(
+                        symbol=order.symbol,
+                        quantity=order.quantity,
+                        average_price=execution_price,
+                        current_price=execution_price,
+                        pnl=0,
+                        unrealized_pnl=0,
+                        instrument_key=order.instrument_key or order.symbol,
+                        entry_time=market_data['timestamp']
+                    )
+                    position.strategy_name = order.strategy_name or self.strategy_name
+                    position.option_type = self._option_type(order)
+
+                    self.positions[order.symbol] = position
+                    self.current_capital -= cost
+
+                    if self.option_model is not None:
+                        self.contracts[order.symbol] = {
+                            'option_type': self._option_type(order),
+                            'strike': market_data['atm_strike'],
+                            'expiry': market_data['expiry']
+                        }
+
+                    if self.exit_simulator is not None:
+                        self.schedule_intrabar_exit(order.symbol, execution_price)
+
+                    if self.recording:
+                        self.trades.append({
+                            'timestamp': market_data['timestamp'],
+                            'symbol': order.symbol,
+                            'strategy': order.strategy_name or self.strategy_name,
+                            'action': 'BUY',
+                            'quantity': order.quantity,
+                            'price': execution_price,
+                            'value': cost
+                        })
+
+            elif order.transaction_type == TransactionType.SELL:
+                if order.symbol in self.positions:
+                    position = self.positions[order.symbol]
+                    sell_value = order.quantity * execution_price
+
+                    # Calculate P&L
+                    cost_basis = position.quantity * position.average_price
+                    pnl = sell_value - cost_basis
+
+                    # Close position
+                    del self.positions[order.symbol]
+                    self.contracts.pop(order.symbol, None)
+                    self.pending_exits.pop(order.symbol, None)
+                    self.current_capital += sell_value
+
+                    if self.recording:
+                        strategy_name = order.strategy_name or self.strategy_name
+                        self.metrics.record_trade(pnl, strategy_name)
+                        trade = {
+                            'timestamp': market_data['timestamp'],
+                            'symbol': order.symbol,
+                            'strategy': strategy_name,
+                            'action': 'SELL',
+                            'quantity': order.quantity,
+                            'price': execution_price,
+                            'value': sell_value,
+                            'pnl': pnl
+                        }
+                        if exit_reason:
+                            trade['exit_reason'] = exit_reason
+                        self.trades.append(trade)
+
+        except Exception as e:
+            print(f"Error executing order: {e}")
+
+    def batch_columns(self, data: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """Columnar view of the bars for BaseStrategy.evaluate_batch"""
+        fields = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'ha_open', 'ha_high', 'ha_low', 'ha_close')
+        return {field: data[field].to_numpy() for field in fields if field in data.columns}
+
+    def load_bar_arrays(self, data: pd.DataFrame):
+        """Keep numpy views of the bars for the intrabar exit scans"""
+        closes = data['close'].to_numpy(dtype=float)
+        self.bars = {
+            'timestamp': data['timestamp'].to_numpy(dtype='datetime64[ns]'),
+            'open': data['open'].to_numpy(dtype=float) if 'open' in data.columns else closes,
+            'high': data['high'].to_numpy(dtype=float),
+            'low': data['low'].to_numpy(dtype=float),
+            'iv': data['iv'].to_numpy(dtype=float) if 'iv' in data.columns else None
+        }
+
+    def schedule_intrabar_exit(self, symbol: str, entry_price: float):
+        """Find the bar where the new position's stop or target fills"""
+        start = self.bar_index + 1
+        timestamps = self.bars['timestamp']
+        contract = self.contracts.get(symbol)
+
+        if contract:
+            # A contract can't be held past expiry, which bounds the window to price
+            end = int(np.searchsorted(timestamps, np.datetime64(pd.Timestamp(contract['expiry']), 'ns'), side='right'))
+            opens, highs, lows = self._contract_bars(contract, start, end)
+            tick_transform = lambda prices, times: self._contract_premiums(contract, prices, times)
+        else:
+            end = len(timestamps)
+            opens, highs, lows = self.bars['open'][start:end], self.bars['high'][start:end], self.bars['low'][start:end]
+            tick_transform = None
+
+        fill = self.exit_simulator.find_exit(entry_price, opens, highs, lows, timestamps[start:end], tick_transform)
+        if fill is None:
+            self.pending_exits.pop(symbol, None)
+            return
+
+        self.pending_exits[symbol] = {
+            'bar_index': start + fill['offset'],
+            'price': fill['price'],
+            'reason': fill['reason']
+        }
+
+    async def process_intrabar_exits(self, strategy: BaseStrategy, market_data: dict):
+        """Close positions whose stop or target was hit inside the current bar"""
+        for symbol, pending in list(self.pending_exits.items()):
+            if pending['bar_index'] != self.bar_index or symbol not in self.positions:
+                continue
+            await self.close_position(strategy, symbol, market_data, pending['price'], pending['reason'])
+
+    def _contract_premiums(self, contract: dict, spot: np.ndarray, timestamps: np.ndarray,
+                           iv: Optional[np.ndarray] = None) -> np.ndarray:
+        """Premiums of a held contract along an underlying path"""
+        n = len(spot)
+        return self.option_model.price(
+            timestamps, spot, np.full(n, contract['strike']),
+            np.full(n, np.datetime64(pd.Timestamp(contract['expiry']), 'ns')),
+            contract['option_type'], iv
+        )['premium']
+
+    def _contract_bars(self, contract: dict, start: int, end: int):
+        """Premium open/high/low bars for a contract (premium is monotonic in spot)"""
+        timestamps = self.bars['timestamp'][start:end]
+        iv = self.bars['iv'][start:end] if self.bars['iv'] is not None else None
+
+        opens = self._contract_premiums(contract, self.bars['open'][start:end], timestamps, iv)
+        at_high = self._contract_premiums(contract, self.bars['high'][start:end], timestamps, iv)
+        at_low = self._contract_premiums(contract, self.bars['low'][start:end], timestamps, iv)
+
+        # Calls peak with the underlying high, puts with the underlying low
+        if contract['option_type'] == 'PE':
+            return opens, at_low, at_high
+        return opens, at_high, at_low
+
+    def _option_type(self, order: Order) -> str:
+        """Option side of an order (orders default to CE)"""
+        return order.option_type if order.option_type in ('CE', 'PE') else 'CE'
+
+    def get_execution_price(self, order: Order, market_data: dict) -> float:
+        """Fill price - the underlying, or the option premium when pricing options"""
+        if self.option_model is None:
+            return market_data['price']
+
+        contract = self.contracts.get(order.symbol)
+        if order.transaction_type == TransactionType.SELL and contract:
+            return self.get_contract_price(contract, market_data)
+
+        # Entries buy the ATM contract priced for this bar
+        return market_data[f"{self._option_type(order).lower()}_premium"]
+
+    def get_contract_price(self, contract: dict, market_data: dict) -> float:
+        """Current premium of a held contract"""
+        return self.option_model.contract_premium(
+            market_data['timestamp'], market_data['price'], contract['strike'],
+            contract['expiry'], contract['option_type'], market_data.get('iv')
+        )
+
+    def calculate_portfolio_value(self, market_data: dict):
+        """Calculate current portfolio value"""
+        portfolio_value = self.current_capital
+
+        for symbol, position in self.positions.items():
+            if position.symbol == market_data['symbol']:
+                contract = self.contracts.get(symbol)
+                if contract:
+                    portfolio_value += position.quantity * self.get_contract_price(contract, market_data)
+                else:
+                    portfolio_value += position.quantity * market_data['price']
+
+        return portfolio_value
+
+    @property
+    def max_drawdown(self) -> float:
+        return self.metrics.max_drawdown
+
+    def generate_results(self, report_dir: Optional[str] = None, verbose: bool = True) -> Dict:
+        """
+        Summarise the backtest and optionally write reports
+
+        Args:
+            report_dir: Directory for CSV/JSON/PNG/HTML reports (nothing written if None)
+            verbose: Print the results
+
+        Returns:
+            Metrics summary
+        """
+        summary = self.metrics.summary()
+        closed = summary['trades']
+
+        if verbose:
+            print("\n" + "="*50)
+            print("BACKTEST RESULTS")
+            print("="*50)
+            print(f"Initial Capital: ₹{self.initial_capital:,.2f}")
+            print(f"Final Value: ₹{summary['final_value']:,.2f}")
+            print(f"Total Return: {summary['total_return_pct']:.2f}%")
+            print(f"Total P&L: ₹{closed['total_pnl']:,.2f}")
+            print(f"Max Drawdown: {summary['max_drawdown']:.2%}")
+            print(f"Sharpe Ratio: {summary['sharpe_ratio']:.2f}")
+            print(f"Time in Market: {summary['time_in_market']:.2%}")
+            print(f"Total Trades: {len(self.trades)}")
+            print(f"Winning Trades: {closed['wins']}")
+            print(f"Losing Trades: {closed['losses']}")
+            print(f"Win Rate: {closed['win_rate']:.2f}%")
+
+            if not self.trades:
+                print("No trades executed during backtest period")
+
+        if report_dir:
+            written = BacktestReport(self.metrics, self.trades, title=f"Backtest - {self.strategy_name}").write(report_dir)
+            if verbose:
+                print(f"Reports written to {report_dir}: {', '.join(p.name for p in written.values())}")
+
+        return summary
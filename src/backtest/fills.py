@@ -0,0 +1,146 @@
+# ==================== src/backtest/fills.py ====================
+"""
+Intrabar fill modelling for stop-loss and profit-target exits.
+
+Checking stop and target only on bar close (as OptionsStrategy.should_exit
+does) both delays exits and fills them at the wrong price. The simulator here
+scans each bar's high/low with numpy to find the first bar that touches either
+level, and decides which level was hit first inside that bar - from recorded
+ticks when they are available, otherwise from a configurable fill model.
+"""
+from typing import Callable, Dict, Optional
+import numpy as np
+import pandas as pd
+
+
+class IntrabarExitSimulator:
+    """Finds the bar and price at which a long position's stop or target fills"""
+
+    # How to order stop and target when a bar touches both and no ticks exist
+    FILL_MODELS = ('stop_first', 'target_first', 'nearest_first')
+
+    def __init__(self, stop_loss: float, profit_target: float, fill_model: str = 'stop_first',
+                 slippage: float = 0.0, block_size: int = 375, bar_seconds: int = 60,
+                 ticks: Optional[pd.DataFrame] = None):
+        """
+        Args:
+            stop_loss: Stop distance as a fraction of entry price (0.5 = 50%)
+            profit_target: Target distance as a fraction of entry price (0.2 = 20%)
+            fill_model: 'stop_first' (pessimistic), 'target_first' (optimistic) or
+                'nearest_first' (level closer to the bar open is hit first)
+            slippage: Fractional slippage applied to stop fills
+            block_size: Bars scanned per vectorized step (one session of 1-minute bars)
+            bar_seconds: Bar length, used to select ticks inside a bar
+            ticks: Optional recorded ticks with 'timestamp' and 'price' columns
+        """
+        if fill_model not in self.FILL_MODELS:
+            raise ValueError(f"Unknown fill model: {fill_model} (expected one of {self.FILL_MODELS})")
+
+        self.stop_loss = stop_loss
+        self.profit_target = profit_target
+        self.fill_model = fill_model
+        self.slippage = slippage
+        self.block_size = block_size
+        self.bar_duration = np.timedelta64(bar_seconds, 's')
+
+        self.tick_times = None
+        self.tick_prices = None
+        if ticks is not None and not ticks.empty:
+            ticks = ticks.sort_values('timestamp')
+            self.tick_times = ticks['timestamp'].to_numpy(dtype='datetime64[ns]')
+            self.tick_prices = ticks['price'].to_numpy(dtype=float)
+
+    @classmethod
+    def from_strategy(cls, strategy, **kwargs) -> 'IntrabarExitSimulator':
+        """Build from a strategy's profit_target/stop_loss attributes (e.g. OptionsStrategy)"""
+        return cls(stop_loss=strategy.stop_loss, profit_target=strategy.profit_target, **kwargs)
+
+    def levels(self, entry_price: float):
+        """Stop and target prices for a long entry"""
+        return entry_price * (1 - self.stop_loss), entry_price * (1 + self.profit_target)
+
+    def find_exit(self, entry_price: float, opens: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+                  timestamps: Optional[np.ndarray] = None,
+                  tick_transform: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None) -> Optional[Dict]:
+        """
+        Scan bars after entry for the first stop or target touch
+
+        Args:
+            entry_price: Fill price of the entry
+            opens, highs, lows: Bars after the entry bar, in the position's price units
+            timestamps: Bar start times (datetime64) - needed to resolve with ticks
+            tick_transform: Maps (tick prices, tick times) into position price units,
+                e.g. underlying ticks to option premiums
+
+        Returns:
+            Dict with 'offset' (bar index into the arrays), 'price' and 'reason', or None
+        """
+        stop, target = self.levels(entry_price)
+
+        for block_start in range(0, len(highs), self.block_size):
+            block_end = block_start + self.block_size
+            stop_hit = lows[block_start:block_end] <= stop
+            target_hit = highs[block_start:block_end] >= target
+            any_hit = stop_hit | target_hit
+
+            if not any_hit.any():
+                continue
+
+            k = int(np.argmax(any_hit))
+            offset = block_start + k
+            bar_open = opens[offset]
+
+            # Gaps through a level fill at the open
+            if bar_open <= stop:
+                return self._fill(offset, bar_open, 'stop_loss')
+            if bar_open >= target:
+                return self._fill(offset, bar_open, 'profit_target')
+
+            if stop_hit[k] and not target_hit[k]:
+                return self._fill(offset, stop, 'stop_loss')
+            if target_hit[k] and not stop_hit[k]:
+                return self._fill(offset, target, 'profit_target')
+
+            # Both levels inside one bar - decide which came first
+            first = None
+            if self.tick_times is not None and timestamps is not None:
+                first = self._first_hit_from_ticks(timestamps[offset], stop, target, tick_transform)
+            if first is None:
+                first = self._first_hit_from_model(bar_open, stop, target)
+
+            if first == 'stop_loss':
+                return self._fill(offset, stop, 'stop_loss')
+            return self._fill(offset, target, 'profit_target')
+
+        return None
+
+    def _fill(self, offset: int, price: float, reason: str) -> Dict:
+        if reason == 'stop_loss':
+            price = price * (1 - self.slippage)
+        return {'offset': offset, 'price': float(price), 'reason': reason}
+
+    def _first_hit_from_model(self, bar_open: float, stop: float, target: float) -> str:
+        if self.fill_model == 'target_first':
+            return 'profit_target'
+        if self.fill_model == 'nearest_first':
+            return 'stop_loss' if (bar_open - stop) <= (target - bar_open) else 'profit_target'
+        return 'stop_loss'
+
+    def _first_hit_from_ticks(self, bar_start, stop: float, target: float,
+                              tick_transform: Optional[Callable]) -> Optional[str]:
+        bar_start = np.datetime64(bar_start, 'ns')
+        lo = np.searchsorted(self.tick_times, bar_start, side='left')
+        hi = np.searchsorted(self.tick_times, bar_start + self.bar_duration, side='left')
+        if hi <= lo:
+            return None
+
+        prices = self.tick_prices[lo:hi]
+        if tick_transform is not None:
+            prices = tick_transform(prices, self.tick_times[lo:hi])
+
+        crossed = (prices <= stop) | (prices >= target)
+        if not crossed.any():
+            return None
+
+        first_price = prices[int(np.argmax(crossed))]
+        return 'stop_loss' if first_price <= stop else 'profit_target'
@@ -0,0 +1,307 @@
+# ==================== src/backtest/metrics.py ====================
+"""
+Streaming backtest metrics and headless reports.
+
+Every accumulator updates in O(1) per bar or trade, so a multi-year run of
+1-minute bars keeps flat memory. The equity curve kept for plotting is
+decimated to a fixed number of points, and reports are written to files
+(CSV, JSON, PNG, HTML) without a display.
+"""
+import csv
+import json
+import math
+import base64
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class RunningStats:
+    """Welford mean/variance accumulator"""
+
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class StrategyStats:
+    """Closed-trade statistics for one strategy"""
+
+    __slots__ = ('trades', 'wins', 'losses', 'gross_profit', 'gross_loss', 'best_trade', 'worst_trade')
+
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.best_trade = 0.0
+        self.worst_trade = 0.0
+
+    def add(self, pnl: float):
+        self.trades += 1
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.losses += 1
+            self.gross_loss -= pnl
+        self.best_trade = max(self.best_trade, pnl)
+        self.worst_trade = min(self.worst_trade, pnl)
+
+    def to_dict(self) -> Dict:
+        return {
+            'trades': self.trades,
+            'wins': self.wins,
+            'losses': self.losses,
+            'win_rate': (self.wins / self.trades * 100) if self.trades else 0.0,
+            'total_pnl': self.gross_profit - self.gross_loss,
+            'profit_factor': (self.gross_profit / self.gross_loss) if self.gross_loss else None,
+            'best_trade': self.best_trade,
+            'worst_trade': self.worst_trade
+        }
+
+
+class StreamingMetrics:
+    """O(1) equity, drawdown, exposure, Sharpe and per-strategy accumulators"""
+
+    def __init__(self, initial_capital: float, periods_per_year: int = 252 * 375, max_curve_points: int = 2000):
+        """
+        Args:
+            initial_capital: Starting equity
+            periods_per_year: Bars per year for annualising Sharpe (1-minute NSE bars by default)
+            max_curve_points: Equity points kept for plotting - older points are thinned
+        """
+        self.initial_capital = initial_capital
+        self.periods_per_year = periods_per_year
+        self.max_curve_points = max_curve_points
+        self.reset(initial_capital)
+
+    def reset(self, start_value: float):
+        """Start accumulating from start_value (used when a warm-up prefix ends)"""
+        self.start_value = start_value
+        self.last_value = start_value
+        self.peak_value = start_value
+        self.max_drawdown = 0.0
+        self.drawdown = 0.0
+        self.bars = 0
+        self.bars_exposed = 0
+        self.exposure_sum = 0.0
+        self.max_exposure = 0.0
+        self.returns = RunningStats()
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+        self.strategies: Dict[str, StrategyStats] = {}
+        self.total = StrategyStats()
+
+        self.curve: List[tuple] = []
+        self._curve_stride = 1
+
+    def update(self, timestamp, value: float, exposure: float = 0.0):
+        """
+        Record the equity at the end of one bar
+
+        Args:
+            timestamp: Bar timestamp
+            value: Portfolio value (cash plus marked positions)
+            exposure: Market value of open positions
+        """
+        if self.bars == 0:
+            self.first_timestamp = timestamp
+        elif self.last_value > 0:
+            self.returns.add(value / self.last_value - 1.0)
+
+        self.bars += 1
+        self.last_value = value
+        self.last_timestamp = timestamp
+
+        if value > self.peak_value:
+            self.peak_value = value
+            self.drawdown = 0.0
+        elif self.peak_value > 0:
+            self.drawdown = (self.peak_value - value) / self.peak_value
+            if self.drawdown > self.max_drawdown:
+                self.max_drawdown = self.drawdown
+
+        if exposure:
+            self.bars_exposed += 1
+            fraction = abs(exposure) / value if value > 0 else 0.0
+            self.exposure_sum += fraction
+            if fraction > self.max_exposure:
+                self.max_exposure = fraction
+
+        # Keep every stride-th point; when full, drop every other one and double the stride
+        if (self.bars - 1) % self._curve_stride == 0:
+            self.curve.append((timestamp, value, self.drawdown))
+            if len(self.curve) >= self.max_curve_points:
+                self.curve = self.curve[::2]
+                self._curve_stride *= 2
+
+    def record_trade(self, pnl: float, strategy: str = ''):
+        """Record one closed trade"""
+        self.total.add(pnl)
+        stats = self.strategies.get(strategy)
+        if stats is None:
+            stats = self.strategies[strategy] = StrategyStats()
+        stats.add(pnl)
+
+    @property
+    def sharpe_ratio(self) -> float:
+        """Annualised Sharpe of per-bar returns (zero risk-free rate)"""
+        std = self.returns.std
+        if std == 0:
+            return 0.0
+        return self.returns.mean / std * math.sqrt(self.periods_per_year)
+
+    def summary(self) -> Dict:
+        """All metrics as a JSON-serialisable dict"""
+        total_return = (self.last_value - self.start_value) / self.start_value * 100 if self.start_value else 0.0
+        return {
+            'start': str(self.first_timestamp) if self.first_timestamp is not None else None,
+            'end': str(self.last_timestamp) if self.last_timestamp is not None else None,
+            'bars': self.bars,
+            'start_value': self.start_value,
+            'final_value': self.last_value,
+            'total_return_pct': total_return,
+            'max_drawdown': self.max_drawdown,
+            'sharpe_ratio': self.sharpe_ratio,
+            'return_volatility': self.returns.std,
+            'time_in_market': self.bars_exposed / self.bars if self.bars else 0.0,
+            'avg_exposure': self.exposure_sum / self.bars_exposed if self.bars_exposed else 0.0,
+            'max_exposure': self.max_exposure,
+            'trades': self.total.to_dict(),
+            'strategies': {name: stats.to_dict() for name, stats in self.strategies.items()}
+        }
+
+
+class BacktestReport:
+    """Writes CSV/JSON/PNG/HTML reports for a finished backtest - no display needed"""
+
+    FORMATS = ('csv', 'json', 'png', 'html')
+
+    def __init__(self, metrics: StreamingMetrics, trades: List[Dict], title: str = 'Backtest'):
+        self.metrics = metrics
+        self.trades = trades
+        self.title = title
+
+    def write(self, output_dir, formats=FORMATS) -> Dict[str, Path]:
+        """
+        Write the selected report formats
+
+        Returns:
+            Dict of format name to written file path
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        written = {}
+
+        if 'csv' in formats:
+            written['trades_csv'] = self.write_trades_csv(output_dir / 'trades.csv')
+            written['equity_csv'] = self.write_equity_csv(output_dir / 'equity.csv')
+        if 'json' in formats:
+            written['json'] = self.write_json(output_dir / 'summary.json')
+        if 'png' in formats or 'html' in formats:
+            written['png'] = self.write_png(output_dir / 'equity.png')
+        if 'html' in formats:
+            written['html'] = self.write_html(output_dir / 'report.html', written['png'])
+
+        return written
+
+    def write_trades_csv(self, path: Path) -> Path:
+        fields = []
+        for trade in self.trades:
+            fields.extend(key for key in trade if key not in fields)
+
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields or ['timestamp'])
+            writer.writeheader()
+            writer.writerows(self.trades)
+        return path
+
+    def write_equity_csv(self, path: Path) -> Path:
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['timestamp', 'value', 'drawdown'])
+            writer.writerows(self.metrics.curve)
+        return path
+
+    def write_json(self, path: Path) -> Path:
+        summary = self.metrics.summary()
+        summary['title'] = self.title
+        summary['generated_at'] = datetime.now().isoformat()
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+        return path
+
+    def write_png(self, path: Path) -> Path:
+        # Figure + Agg canvas directly: no pyplot state and no display backend
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        timestamps = [point[0] for point in self.metrics.curve]
+        values = [point[1] for point in self.metrics.curve]
+        drawdowns = [-point[2] for point in self.metrics.curve]
+
+        fig = Figure(figsize=(12, 8))
+        FigureCanvasAgg(fig)
+
+        ax = fig.add_subplot(2, 1, 1)
+        ax.plot(timestamps, values)
+        ax.set_title('Portfolio Value Over Time')
+        ax.set_ylabel('Value (₹)')
+        ax.grid(True)
+
+        ax = fig.add_subplot(2, 1, 2)
+        ax.fill_between(timestamps, drawdowns, 0, alpha=0.3, color='red')
+        ax.set_title('Drawdown')
+        ax.set_ylabel('Drawdown %')
+        ax.grid(True)
+
+        fig.tight_layout()
+        fig.savefig(path, dpi=100)
+        return path
+
+    def write_html(self, path: Path, png_path: Optional[Path] = None) -> Path:
+        summary = self.metrics.summary()
+        rows = ''.join(
+            f"<tr><th>{key}</th><td>{value}</td></tr>"
+            for key, value in summary.items() if not isinstance(value, dict)
+        )
+        strategy_rows = ''.join(
+            f"<tr><td>{name or '-'}</td><td>{stats['trades']}</td><td>{stats['win_rate']:.1f}%</td>"
+            f"<td>{stats['total_pnl']:,.2f}</td><td>{stats['best_trade']:,.2f}</td><td>{stats['worst_trade']:,.2f}</td></tr>"
+            for name, stats in summary['strategies'].items()
+        )
+
+        image = ''
+        if png_path is not None and Path(png_path).exists():
+            encoded = base64.b64encode(Path(png_path).read_bytes()).decode('ascii')
+            image = f'<img src="data:image/png;base64,{encoded}" alt="equity curve">'
+
+        html = (
+            f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{self.title}</title></head><body>"
+            f"<h1>{self.title}</h1><table>{rows}</table>"
+            f"<h2>Strategies</h2><table><tr><th>Strategy</th><th>Trades</th><th>Win rate</th>"
+            f"<th>P&amp;L</th><th>Best</th><th>Worst</th></tr>{strategy_rows}</table>"
+            f"{image}</body></html>"
+        )
+        path.write_text(html, encoding='utf-8')
+        return path
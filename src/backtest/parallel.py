@@ -0,0 +1,158 @@
+# ==================== src/backtest/parallel.py ====================
+"""
+Day/week partitioned parallel backtesting.
+
+The strategies are intraday, so a long backtest can be split into independent
+trading-day (or week) chunks. Each chunk is replayed in its own process with a
+warm-up prefix of preceding bars so that HA history and indicators are primed,
+and the chunk results are stitched back together in order.
+
+Entries are not executed during the warm-up and every chunk closes its open
+positions on its last bar, so each chunk starts and ends flat. The merged
+result therefore matches a sequential BacktestEngine run with flatten set
+to the same chunk size.
+"""
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from src.backtest.engine import BacktestEngine, period_keys
+from src.backtest.fills import IntrabarExitSimulator
+from src.strategy.base_strategy import BaseStrategy
+from src.utils.option_pricing import OptionPremiumModel
+
+logger = logging.getLogger(__name__)
+
+
+def split_into_chunks(data: pd.DataFrame, chunk: str = 'day',
+                      warmup_bars: int = 0) -> List[Tuple[pd.DataFrame, pd.Timestamp]]:
+    """
+    Split bars into day or week chunks
+
+    Returns:
+        List of (bars including warm-up prefix, first recorded timestamp)
+    """
+    if data.empty:
+        return []
+
+    timestamps = data['timestamp']
+    keys = period_keys(timestamps, chunk)
+
+    starts = np.flatnonzero((keys != keys.shift()).to_numpy())
+    ends = np.append(starts[1:], len(data))
+
+    chunks = []
+    for start, end in zip(starts, ends):
+        prefix_start = max(0, start - warmup_bars)
+        chunks.append((data.iloc[prefix_start:end], timestamps.iloc[start]))
+
+    return chunks
+
+
+async def _replay_chunk(job: Tuple) -> Dict:
+    """Replay one chunk in a fresh engine and strategy"""
+    (strategy_factory, symbol, bars, record_from, chunk, initial_capital, start_date, end_date,
+     option_model, exit_simulator) = job
+
+    engine = BacktestEngine(initial_capital, start_date, end_date, option_model, exit_simulator,
+                            keep_equity_curve=True)
+    strategy = strategy_factory()
+    await engine.run_backtest(strategy, symbol, data=bars, record_from=record_from, verbose=False, flatten=chunk)
+
+    return {
+        'trades': engine.trades,
+        'portfolio_values': engine.portfolio_values,
+        'start_value': engine.record_start_value,
+        'strategy_name': strategy.name
+    }
+
+
+def _run_chunk(job: Tuple) -> Dict:
+    """Worker process entry point"""
+    return asyncio.run(_replay_chunk(job))
+
+
+class ParallelBacktestRunner:
+    """Runs a backtest as independent day/week chunks across a process pool"""
+
+    def __init__(self, initial_capital: float, start_date: str, end_date: str,
+                 chunk: str = 'day', warmup_bars: int = 100, max_workers: Optional[int] = None,
+                 option_model: Optional[OptionPremiumModel] = None,
+                 exit_simulator: Optional[IntrabarExitSimulator] = None):
+        self.initial_capital = initial_capital
+        self.start_date = start_date
+        self.end_date = end_date
+        self.chunk = chunk
+        self.warmup_bars = warmup_bars
+        self.max_workers = max_workers
+        self.option_model = option_model
+        self.exit_simulator = exit_simulator
+        self.logger = logging.getLogger(__name__)
+
+    async def run_backtest(self, strategy_factory: Callable[[], BaseStrategy], symbol: str,
+                           data: Optional[pd.DataFrame] = None, report_dir: Optional[str] = None) -> BacktestEngine:
+        """
+        Run a chunked backtest and merge the results
+
+        Args:
+            strategy_factory: Picklable callable returning a fresh strategy
+                (e.g. functools.partial(EnhancedPineScriptStrategy, name, params))
+            symbol: Symbol to trade
+            data: Pre-loaded bars (loaded via the engine if None)
+            report_dir: Write CSV/JSON/PNG/HTML reports here when set
+
+        Returns:
+            BacktestEngine holding the merged trades and metrics
+        """
+        engine = BacktestEngine(self.initial_capital, self.start_date, self.end_date, self.option_model)
+
+        print(f"Running parallel backtest on {symbol} ({self.chunk} chunks, {self.warmup_bars} warm-up bars)")
+        print(f"Period: {engine.start_date.date()} to {engine.end_date.date()}")
+        print(f"Initial Capital: ₹{self.initial_capital:,.2f}")
+
+        if data is None:
+            data = engine.load_historical_data(symbol)
+
+        # Premiums are priced once for the whole range, not per chunk
+        if self.option_model is not None and 'ce_premium' not in data.columns:
+            data = self.option_model.add_premium_columns(data)
+
+        chunks = split_into_chunks(data, self.chunk, self.warmup_bars)
+        jobs = [
+            (strategy_factory, symbol, bars, record_from, self.chunk, self.initial_capital, self.start_date, self.end_date,
+             self.option_model, self.exit_simulator)
+            for bars, record_from in chunks
+        ]
+        self.logger.info(f"Backtest split into {len(jobs)} {self.chunk} chunks")
+
+        # Merge each chunk as soon as it (and every chunk before it) is done,
+        # so finished equity curves are folded into the metrics and released
+        if self.max_workers == 1:
+            for job in jobs:
+                self.merge_result(engine, await _replay_chunk(job))
+        else:
+            loop = asyncio.get_running_loop()
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = [loop.run_in_executor(pool, _run_chunk, job) for job in jobs]
+                for future in futures:
+                    self.merge_result(engine, await future)
+
+        engine.generate_results(report_dir)
+        return engine
+
+    def merge_result(self, engine: BacktestEngine, result: Dict):
+        """Append one chunk's trades and equity curve to the merged engine"""
+        engine.strategy_name = result['strategy_name']
+        engine.trades.extend(result['trades'])
+        for trade in result['trades']:
+            if 'pnl' in trade:
+                engine.metrics.record_trade(trade['pnl'], trade.get('strategy', ''))
+
+        # Each chunk reports equity from its own baseline; chain the changes
+        offset = engine.current_capital
+        for point in result['portfolio_values']:
+            engine.current_capital = offset + (point['value'] - result['start_value'])
+            engine.metrics.update(point['timestamp'], engine.current_capital, point.get('exposure', 0.0))
@@ -0,0 +1,261 @@
+# ==================== src/backtest/simulation.py ====================
+"""
+Event-driven backtest that drives the production bot classes.
+
+Instead of re-implementing order and position handling, candles are replayed
+through TradingBot.on_ha_candle_received (the path the websocket manager
+triggers) or MultiStrategyTradingBot.evaluate_strategies_on_new_candle, with a
+simulated clock, an in-memory broker and a muted notifier. Paper-trading fills,
+position bookkeeping and P&L statistics therefore come from the same code that
+runs live.
+"""
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import pandas as pd
+
+from config.settings import Settings
+from src.trading_bot import TradingBot
+from src.strategy.base_strategy import BaseStrategy
+from src.utils.notification import TelegramNotifier
+from src.websocket.websocket_manager import HeikinAshiConverter
+from src.backtest.metrics import StreamingMetrics
+
+
+class SimulatedClock:
+    """Manually advanced clock handed to the bot in place of datetime.now"""
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.current_time = start or datetime.now()
+
+    def __call__(self) -> datetime:
+        return self.current_time
+
+    def set(self, current_time: datetime):
+        self.current_time = current_time
+
+
+class MutedNotifier(TelegramNotifier):
+    """Notifier that accepts every message and sends nothing"""
+
+    def __init__(self):
+        self.bot_token = None
+        self.chat_ids = []
+        self.enabled = False
+        self.logger = logging.getLogger(__name__)
+        self.messages_muted = 0
+
+    async def send_message(self, message: str, parse_mode: str = "HTML", critical: bool = False) -> bool:
+        self.messages_muted += 1
+        return True
+
+    async def close(self, timeout: float = 5.0):
+        pass
+
+
+class InMemoryBroker:
+    """Stand-in for UpstoxClient that keeps orders in memory"""
+
+    def __init__(self):
+        self.access_token = "SIMULATED"
+        self.orders: List[Dict] = []
+
+    async def test_token(self) -> bool:
+        return True
+
+    async def get_profile(self) -> Optional[Dict]:
+        return {'status': 'success', 'data': {'user_name': 'SIMULATED'}}
+
+    async def get_funds(self) -> Optional[Dict]:
+        return {'status': 'success', 'data': {}}
+
+    async def get_positions(self) -> Optional[Dict]:
+        return {'status': 'success', 'data': []}
+
+    async def get_market_data(self, instrument_key: str) -> Optional[Dict]:
+        return {'status': 'success', 'data': {}}
+
+    async def get_quotes(self, instrument_keys: List[str], max_age: Optional[float] = None) -> Dict[str, Dict]:
+        return {}
+
+    async def place_order(self, order_data: Dict) -> Optional[Dict]:
+        order_id = f"SIM_{len(self.orders) + 1}"
+        self.orders.append({**order_data, 'order_id': order_id})
+        return {'status': 'success', 'data': {'order_id': order_id}}
+
+    async def get_order_history(self) -> Optional[Dict]:
+        return {'status': 'success', 'data': self.orders}
+
+
+def simulation_settings(**overrides) -> Settings:
+    """Settings for a simulated bot - paper trading with notifications off"""
+    values = {
+        'upstox_api_key': 'SIMULATED',
+        'upstox_api_secret': 'SIMULATED',
+        'upstox_redirect_uri': 'http://localhost',
+        'paper_trading': True,
+        'enable_notifications': False,
+        # Wall-clock deadlines would make replays depend on machine load
+        'strategy_deadline_ms': 60000
+    }
+    values.update(overrides)
+    return Settings(**values)
+
+
+class EventDrivenBacktest:
+    """Replays candles through a production TradingBot with simulated time"""
+
+    # Loggers on the per-candle path that are raised to WARNING while replaying
+    QUIET_LOGGERS = ('src.trading_bot', 'trading', 'src.utils.position_sizing', 'src.websocket.websocket_manager')
+
+    def __init__(self, bot: TradingBot, timeframe_minutes: int = 1, min_candles: int = 15,
+                 history_size: int = 100, dispatch: str = 'ha_candle', quiet: bool = True,
+                 initial_capital: float = 20000):
+        """
+        Args:
+            bot: TradingBot or MultiStrategyTradingBot with strategies added
+            timeframe_minutes: Candle length - the clock is set to candle close
+            min_candles: HA candles required before dispatching (as the websocket manager does)
+            history_size: HA history kept per symbol
+            dispatch: 'ha_candle' for on_ha_candle_received, 'new_candle' for
+                evaluate_strategies_on_new_candle
+            quiet: Silence per-candle INFO logging while replaying
+            initial_capital: Equity baseline for drawdown/Sharpe (the bot sizes against Rs.20k)
+        """
+        if dispatch not in ('ha_candle', 'new_candle'):
+            raise ValueError(f"Unknown dispatch mode: {dispatch}")
+
+        self.bot = bot
+        self.timeframe = timedelta(minutes=timeframe_minutes)
+        self.min_candles = min_candles
+        self.history_size = history_size
+        self.dispatch = dispatch
+        self.quiet = quiet
+        self.logger = logging.getLogger(__name__)
+
+        # Replace the bot's side effects with simulated ones
+        self.clock = SimulatedClock()
+        self.broker = InMemoryBroker()
+        self.notifier = MutedNotifier()
+        bot.clock = self.clock
+        for strategy in bot.strategies:
+            strategy.clock = self.clock
+        bot.upstox_client = self.broker
+        bot.notifier = self.notifier
+        bot.paper_trading = True
+        bot.orders.journal_path = None  # Replays keep the live order journal untouched
+
+        self.ha_converter = HeikinAshiConverter()
+        self.ha_history: Dict[str, deque] = {}
+        self.initial_capital = initial_capital
+        self.metrics = StreamingMetrics(initial_capital, periods_per_year=int(252 * 375 / timeframe_minutes))
+        self.candles_processed = 0
+
+    async def run(self, data: pd.DataFrame, symbol: Optional[str] = None) -> Dict:
+        """
+        Replay OHLCV bars through the bot
+
+        Args:
+            data: Bars with timestamp/open/high/low/close/volume columns and
+                either a 'symbol' column or the symbol argument
+            symbol: Symbol for all bars when data has no 'symbol' column
+
+        Returns:
+            Summary statistics taken from the bot
+        """
+        saved_levels = {}
+        if self.quiet:
+            for name in self.QUIET_LOGGERS + tuple(f'trading.strategy.{s.name}' for s in self.bot.strategies):
+                log = logging.getLogger(name)
+                saved_levels[name] = log.level
+                log.setLevel(logging.WARNING)
+
+        try:
+            has_symbol = 'symbol' in data.columns
+            for row in data.itertuples(index=False):
+                await self.process_candle(row.symbol if has_symbol else symbol, {
+                    'open': row.open,
+                    'high': row.high,
+                    'low': row.low,
+                    'close': row.close,
+                    'volume': row.volume,
+                    'start_time': row.timestamp
+                })
+        finally:
+            for name, level in saved_levels.items():
+                logging.getLogger(name).setLevel(level)
+
+        return self.get_summary()
+
+    async def process_candle(self, symbol: str, candle: Dict):
+        """Complete one candle: advance the clock, convert to HA and dispatch"""
+        close_time = candle['start_time'] + self.timeframe
+        self.clock.set(close_time)
+
+        candle['symbol'] = symbol
+        candle['end_time'] = close_time
+        ha_candle = self.ha_converter.convert_candle(symbol, candle)
+
+        history = self.ha_history.get(symbol)
+        if history is None:
+            history = self.ha_history[symbol] = deque(maxlen=self.history_size)
+        history.append(ha_candle)
+
+        # Tick used by update_positions for marking open positions
+        self.bot.latest_ticks[symbol] = {
+            'instrument_key': symbol,
+            'ltp': candle['close'],
+            'volume': candle['volume'],
+            'timestamp': close_time,
+            'symbol': symbol
+        }
+
+        if len(history) >= self.min_candles:
+            if self.dispatch == 'ha_candle':
+                ha_candle['candle_history'] = list(history)
+                ha_candle['symbol'] = symbol
+                await self.bot.on_ha_candle_received(ha_candle)
+            else:
+                await self.bot.evaluate_strategies_on_new_candle(symbol, ha_candle)
+
+        await self.bot.update_positions()
+        self.candles_processed += 1
+
+        positions = self.bot.positions
+        self.metrics.update(close_time, self.initial_capital + self.bot.total_pnl + positions.unrealized_pnl,
+                            positions.exposure)
+
+    def get_summary(self) -> Dict:
+        """Summary statistics as tracked by the bot itself"""
+        summary = {
+            'candles': self.candles_processed,
+            'total_trades': self.bot.total_trades,
+            'winning_trades': self.bot.winning_trades,
+            'win_rate': (self.bot.winning_trades / max(1, self.bot.total_trades)) * 100,
+            'total_pnl': self.bot.total_pnl,
+            'best_trade': self.bot.best_trade,
+            'worst_trade': self.bot.worst_trade,
+            'open_positions': len(self.bot.positions),
+            'orders': self.bot.orders.total_orders,
+            'notifications_muted': self.notifier.messages_muted,
+            'final_value': self.metrics.last_value,
+            'max_drawdown': self.metrics.max_drawdown,
+            'sharpe_ratio': self.metrics.sharpe_ratio,
+            'time_in_market': self.metrics.bars_exposed / max(1, self.metrics.bars)
+        }
+
+        strategy_performance = getattr(self.bot, 'strategy_performance', None)
+        if strategy_performance:
+            summary['strategy_performance'] = strategy_performance
+
+        return summary
+
+
+def build_simulated_bot(strategies: List[BaseStrategy], bot_cls=TradingBot,
+                        settings: Optional[Settings] = None) -> TradingBot:
+    """Create a bot of the given class with strategies attached, ready for EventDrivenBacktest"""
+    bot = bot_cls(settings or simulation_settings())
+    for strategy in strategies:
+        bot.add_strategy(strategy)
+    return bot
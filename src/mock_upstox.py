@@ -0,0 +1,488 @@
+# ==================== src/mock_upstox.py ====================
+"""
+Local stand-in for the Upstox API, for end-to-end and performance tests.
+
+MockUpstoxServer implements the REST endpoints UpstoxClient calls, plus the
+feed authorize endpoints and the two websockets behind them:
+
+- /ws/market streams SyntheticFeed messages for the subscribed instruments
+  (protobuf FeedResponse when the SDK's generated classes are importable,
+  JSON text otherwise or with ?format=json)
+- /ws/portfolio pushes order updates in the portfolio-stream format
+
+Latency, errors and fills are scripted through MockBehavior, which can be
+loaded from a JSON file or changed at runtime via POST /mock/behavior.
+Point the bot at it with UPSTOX_API_HOST=http://127.0.0.1:<port>.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import random
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Union
+
+from src.websocket.synthetic_feed import SyntheticFeed
+
+try:
+    from aiohttp import web, WSMsgType
+except ImportError:
+    web = None
+
+try:
+    from google.protobuf.json_format import ParseDict
+    from upstox_client.feeder.proto.MarketDataFeedV3_pb2 import FeedResponse
+except ImportError:
+    FeedResponse = None
+
+TERMINAL_STATUSES = ('complete', 'cancelled', 'rejected')
+
+
+@dataclass
+class MockBehavior:
+    """Scripted broker behaviour"""
+    latency: float = 0.0  # Seconds added to every REST response
+    latency_jitter: float = 0.0  # Up to this many extra seconds, uniformly random
+    order_latency: Optional[float] = None  # Overrides latency for /order/* endpoints
+    error_rate: float = 0.0  # Fraction of REST requests failing with error_status
+    error_status: int = 500
+    rate_limit_every: int = 0  # Every n-th REST request is answered 429 (0 = never)
+    retry_after: float = 1.0
+    fill_delay: float = 0.2  # Seconds from acceptance to fill
+    partial_fill_rate: float = 0.0  # Fraction of orders filled in two steps
+    reject_rate: float = 0.0
+    slippage: float = 0.0  # Relative adverse price move on market fills
+    feed_rate: float = 5.0  # Ticks per second per subscribed instrument
+    feed_volatility: float = 0.0002
+    fail_next: Dict[str, List[int]] = field(default_factory=dict)  # Path -> statuses of its next requests
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> 'MockBehavior':
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+    @classmethod
+    def from_dict(cls, values: Dict) -> 'MockBehavior':
+        known = {f.name for f in fields(cls)}
+        unknown = set(values) - known
+        if unknown:
+            raise ValueError(f"Unknown mock behaviour settings: {', '.join(sorted(unknown))}")
+        return cls(**values)
+
+
+class MockUpstoxServer:
+    """Upstox-compatible REST API and feed websockets on localhost"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080, behavior: Optional[MockBehavior] = None,
+                 seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.behavior = behavior or MockBehavior()
+        self.random = random.Random(seed)
+        self.logger = logging.getLogger(__name__)
+
+        self.orders: Dict[str, Dict] = {}
+        self.prices: Dict[str, float] = {}
+        self.requests = 0
+        self.injected_errors = 0
+
+        self._order_ids = itertools.count(1)
+        self._portfolio_clients: Set = set()
+        self._market_clients: Set = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._runner = None
+
+    @property
+    def api_host(self) -> str:
+        """Value for UPSTOX_API_HOST / UpstoxClient(api_host=...)"""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> bool:
+        if web is None:
+            self.logger.error("aiohttp not installed - mock Upstox server unavailable")
+            return False
+
+        @web.middleware
+        async def inject(request, handler):
+            return await self._inject(request, handler)
+
+        app = web.Application(middlewares=[inject])
+        routes = [
+            ('GET', '/v2', self._root),
+            ('GET', '/v2/login/authorization/dialog', self._login_dialog),
+            ('POST', '/v2/login/authorization/token', self._token),
+            ('GET', '/v2/user/profile', self._profile),
+            ('GET', '/v2/user/funds', self._funds),
+            ('GET', '/v2/user/get-funds-and-margin', self._funds),
+            ('GET', '/v2/portfolio/long-term-positions', self._positions),
+            ('GET', '/v2/portfolio/short-term-positions', self._positions),
+            ('GET', '/v2/search/instruments', self._search),
+            ('GET', '/v2/market-quote/quotes', self._quotes),
+            ('POST', '/v2/order/place', self._place_order),
+            ('DELETE', '/v2/order/cancel', self._cancel_order),
+            ('GET', '/v2/order/details', self._order_details),
+            ('GET', '/v2/order/retrieve-all', self._order_book),
+            ('GET', '/v2/feed/market-data-feed/authorize', self._authorize_market),
+            ('GET', '/v3/feed/market-data-feed/authorize', self._authorize_market),
+            ('GET', '/v2/feed/portfolio-stream-feed/authorize', self._authorize_portfolio),
+            ('GET', '/ws/market', self._market_socket),
+            ('GET', '/ws/portfolio', self._portfolio_socket),
+            ('GET', '/mock/state', self._state),
+            ('POST', '/mock/behavior', self._update_behavior)
+        ]
+        for method, path, handler in routes:
+            app.router.add_route(method, path, handler)
+
+        try:
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, self.host, self.port)
+            await site.start()
+            if self.port == 0:
+                self.port = site._server.sockets[0].getsockname()[1]
+            self.logger.info(f"🧪 Mock Upstox API at {self.api_host}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to start mock Upstox server: {e}")
+            await self.stop()
+            return False
+
+    async def stop(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for ws in list(self._portfolio_clients | self._market_clients):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def fail_next(self, path: str, count: int = 1, status: int = 500):
+        """Answer the next count requests to path (e.g. '/order/place') with status"""
+        self.behavior.fail_next.setdefault(path, []).extend([status] * count)
+
+    def price(self, instrument_key: str) -> float:
+        if instrument_key not in self.prices:
+            self.prices[instrument_key] = round(self.random.uniform(50, 500), 2)
+        return self.prices[instrument_key]
+
+    # ---- Scripted latency and errors ----
+
+    async def _inject(self, request, handler):
+        path = request.path
+        if not path.startswith(('/v2', '/v3')):
+            return await handler(request)
+
+        self.requests += 1
+        behavior = self.behavior
+        endpoint = path[3:] or '/'
+
+        scripted = behavior.fail_next.get(endpoint)
+        if scripted:
+            status = scripted.pop(0)
+            return self._error(status, f"Scripted failure for {endpoint}")
+
+        if behavior.rate_limit_every and self.requests % behavior.rate_limit_every == 0:
+            return self._error(429, "Too many requests", {'Retry-After': str(behavior.retry_after)})
+        if behavior.error_rate and self.random.random() < behavior.error_rate:
+            return self._error(behavior.error_status, "Injected error")
+
+        latency = behavior.order_latency if endpoint.startswith('/order/') and behavior.order_latency is not None \
+            else behavior.latency
+        latency += self.random.uniform(0, behavior.latency_jitter) if behavior.latency_jitter else 0.0
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+        public = ('/', '/login/authorization/dialog', '/login/authorization/token')
+        if endpoint not in public and not request.headers.get('Authorization', '').startswith('Bearer '):
+            return web.json_response({'status': 'error', 'errors': [
+                {'errorCode': 'UDAPI100050', 'message': 'Invalid token used to access API'}]}, status=401)
+        return await handler(request)
+
+    def _error(self, status: int, message: str, headers: Optional[Dict] = None):
+        self.injected_errors += 1
+        return web.json_response({'status': 'error', 'errors': [{'errorCode': f"MOCK{status}", 'message': message}]},
+                                 status=status, headers=headers)
+
+    # ---- REST ----
+
+    async def _root(self, request):
+        return web.json_response({'status': 'success', 'data': 'mock upstox'})
+
+    async def _login_dialog(self, request):
+        raise web.HTTPFound(f"{request.query.get('redirect_uri', '/')}?code=mock-auth-code")
+
+    async def _token(self, request):
+        return web.json_response({
+            'email': 'mock@example.com', 'user_id': 'MOCK01', 'user_name': 'Mock Trader', 'broker': 'UPSTOX',
+            'is_active': True, 'access_token': f"mock-{self.random.getrandbits(64):016x}", 'extended_token': None
+        })
+
+    async def _profile(self, request):
+        return web.json_response({'status': 'success', 'data': {
+            'email': 'mock@example.com', 'exchanges': ['NSE', 'NFO', 'BSE', 'BFO'], 'products': ['D', 'I', 'CO'],
+            'broker': 'UPSTOX', 'user_id': 'MOCK01', 'user_name': 'Mock Trader', 'user_type': 'individual',
+            'is_active': True
+        }})
+
+    async def _funds(self, request):
+        return web.json_response({'status': 'success', 'data': {
+            'equity': {'used_margin': 0.0, 'payin_amount': 0.0, 'span_margin': 0.0, 'adhoc_margin': 0.0,
+                       'notional_cash': 0.0, 'available_margin': 20000.0, 'exposure_margin': 0.0}
+        }})
+
+    async def _positions(self, request):
+        net: Dict[str, Dict] = {}
+        for order in self.orders.values():
+            if not order['filled_quantity']:
+                continue
+            position = net.setdefault(order['instrument_token'], {
+                'instrument_token': order['instrument_token'], 'quantity': 0, 'buy_value': 0.0, 'sell_value': 0.0
+            })
+            value = order['filled_quantity'] * order['average_price']
+            if order['transaction_type'] == 'BUY':
+                position['quantity'] += order['filled_quantity']
+                position['buy_value'] += value
+            else:
+                position['quantity'] -= order['filled_quantity']
+                position['sell_value'] += value
+        for key, position in net.items():
+            position['last_price'] = self.price(key)
+        return web.json_response({'status': 'success', 'data': list(net.values())})
+
+    async def _search(self, request):
+        query = request.query.get('query', '').lower()
+        matches = [{'instrument_key': key, 'trading_symbol': key.split('|', 1)[-1]}
+                   for key in self.prices if query in key.lower()]
+        return web.json_response({'status': 'success', 'data': matches})
+
+    async def _quotes(self, request):
+        data = {}
+        for key in filter(None, request.query.get('instrument_key', '').split(',')):
+            price = self.price(key)
+            data[key.replace('|', ':', 1)] = {
+                'instrument_token': key,
+                'last_price': price,
+                'timestamp': datetime.now().isoformat(),
+                'volume': 0,
+                'ohlc': {'open': price, 'high': price, 'low': price, 'close': price},
+                'depth': {
+                    'buy': [{'quantity': 75 * (i + 1), 'price': round(price - 0.05 * (i + 1), 2), 'orders': 1}
+                            for i in range(5)],
+                    'sell': [{'quantity': 75 * (i + 1), 'price': round(price + 0.05 * (i + 1), 2), 'orders': 1}
+                             for i in range(5)]
+                }
+            }
+        return web.json_response({'status': 'success', 'data': data})
+
+    async def _place_order(self, request):
+        try:
+            payload = await request.json()
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict) or not payload.get('instrument_token') or int(payload.get('quantity') or 0) <= 0:
+            return web.json_response({'status': 'error', 'errors': [
+                {'errorCode': 'UDAPI1026', 'message': 'Instrument key and a positive quantity are required'}]}, status=400)
+
+        order_id = f"{datetime.now():%y%m%d}{next(self._order_ids):09d}"
+        self.orders[order_id] = {
+            'order_id': order_id,
+            'instrument_token': payload['instrument_token'],
+            'transaction_type': str(payload.get('transaction_type', 'BUY')).upper(),
+            'order_type': str(payload.get('order_type', 'MARKET')).upper(),
+            'product': payload.get('product', 'I'),
+            'quantity': int(payload['quantity']),
+            'price': float(payload.get('price') or 0),
+            'tag': payload.get('tag'),
+            'status': 'open',
+            'filled_quantity': 0,
+            'pending_quantity': int(payload['quantity']),
+            'average_price': 0.0,
+            'status_message': None,
+            'order_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        self._spawn(self._work_order(order_id))
+        return web.json_response({'status': 'success', 'data': {'order_id': order_id}})
+
+    async def _cancel_order(self, request):
+        order = self.orders.get(request.query.get('order_id', ''))
+        if order is None:
+            return web.json_response({'status': 'error', 'errors': [
+                {'errorCode': 'UDAPI100010', 'message': 'Order not found'}]}, status=404)
+        if order['status'] not in TERMINAL_STATUSES:
+            await self._update(order, 'cancelled')
+        return web.json_response({'status': 'success', 'data': {'order_id': order['order_id']}})
+
+    async def _order_details(self, request):
+        order = self.orders.get(request.query.get('order_id', ''))
+        if order is None:
+            return web.json_response({'status': 'error', 'errors': [
+                {'errorCode': 'UDAPI100010', 'message': 'Order not found'}]}, status=404)
+        return web.json_response({'status': 'success', 'data': order})
+
+    async def _order_book(self, request):
+        return web.json_response({'status': 'success', 'data': list(self.orders.values())})
+
+    # ---- Fills ----
+
+    async def _work_order(self, order_id: str):
+        order = self.orders[order_id]
+        await self._update(order, 'open')
+        await asyncio.sleep(self.behavior.fill_delay)
+        if order['status'] in TERMINAL_STATUSES:
+            return
+
+        if self.behavior.reject_rate and self.random.random() < self.behavior.reject_rate:
+            await self._update(order, 'rejected', message='Rejected by mock RMS')
+            return
+
+        fill_price = self._fill_price(order)
+        if self.behavior.partial_fill_rate and self.random.random() < self.behavior.partial_fill_rate \
+                and order['quantity'] > 1:
+            await self._update(order, 'open', filled=order['quantity'] // 2, price=fill_price)
+            await asyncio.sleep(self.behavior.fill_delay)
+            if order['status'] in TERMINAL_STATUSES:
+                return
+        await self._update(order, 'complete', filled=order['quantity'], price=fill_price)
+
+    def _fill_price(self, order: Dict) -> float:
+        if order['order_type'] == 'LIMIT' and order['price']:
+            return order['price']
+        price = self.price(order['instrument_token'])
+        direction = 1 if order['transaction_type'] == 'BUY' else -1
+        return round(price * (1 + direction * self.behavior.slippage), 2)
+
+    async def _update(self, order: Dict, status: str, filled: Optional[int] = None, price: Optional[float] = None,
+                      message: Optional[str] = None):
+        order['status'] = status
+        if filled is not None:
+            order['filled_quantity'] = filled
+            order['pending_quantity'] = order['quantity'] - filled
+        if price is not None:
+            order['average_price'] = price
+        order['status_message'] = message
+
+        update = json.dumps({'update_type': 'order', **order})
+        for ws in list(self._portfolio_clients):
+            try:
+                await ws.send_str(update)
+            except Exception:
+                self._portfolio_clients.discard(ws)
+
+    # ---- Feeds ----
+
+    async def _authorize_market(self, request):
+        return self._authorized(f"ws://{request.host}/ws/market")
+
+    async def _authorize_portfolio(self, request):
+        return self._authorized(f"ws://{request.host}/ws/portfolio")
+
+    @staticmethod
+    def _authorized(uri: str):
+        return web.json_response({'status': 'success', 'data': {'authorizedRedirectUri': uri,
+                                                                'authorized_redirect_uri': uri}})
+
+    async def _portfolio_socket(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        self._portfolio_clients.add(ws)
+        try:
+            async for _ in ws:
+                pass
+        finally:
+            self._portfolio_clients.discard(ws)
+        return ws
+
+    async def _market_socket(self, request):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        as_json = FeedResponse is None or request.query.get('format') == 'json'
+        subscribed: Dict[str, str] = {}
+        streamer = self._spawn(self._stream(ws, subscribed, as_json))
+        self._market_clients.add(ws)
+        try:
+            async for message in ws:
+                if message.type not in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    continue
+                try:
+                    request_data = json.loads(message.data)
+                    method = request_data.get('method')
+                    data = request_data.get('data', {})
+                    keys = data.get('instrumentKeys', [])
+                except (ValueError, AttributeError):
+                    continue
+                if method == 'sub' or method == 'change_mode':
+                    subscribed.update({key: data.get('mode', 'ltpc') for key in keys})
+                elif method == 'unsub':
+                    for key in keys:
+                        subscribed.pop(key, None)
+        finally:
+            streamer.cancel()
+            self._market_clients.discard(ws)
+        return ws
+
+    async def _stream(self, ws, subscribed: Dict[str, str], as_json: bool):
+        feeds: Dict[tuple, SyntheticFeed] = {}
+        interval = 1 / max(self.behavior.feed_rate, 0.001)
+        while not ws.closed:
+            await asyncio.sleep(interval)
+            if not subscribed:
+                continue
+
+            # One feed per mode; rebuilt when the subscription changes
+            merged = {}
+            for mode in set(subscribed.values()):
+                keys = tuple(sorted(key for key, key_mode in subscribed.items() if key_mode == mode))
+                feed = feeds.get(keys)
+                if feed is None:
+                    feed = feeds[keys] = SyntheticFeed(
+                        feed_type=self._feed_type(mode, keys), volatility=self.behavior.feed_volatility,
+                        ticks_per_message=len(keys), keys=list(keys),
+                        prices={key: self.price(key) for key in keys}, seed=self.random.getrandbits(32)
+                    )
+                message = feed.message()
+                for key, price in zip(feed.keys, feed.prices):
+                    self.prices[key] = round(price, 2)
+                merged.update(message['feeds'])
+                merged_ts = message['currentTs']
+
+            message = {'type': 'live_feed', 'feeds': merged, 'currentTs': merged_ts}
+            try:
+                if as_json:
+                    await ws.send_str(json.dumps(message))
+                else:
+                    await ws.send_bytes(ParseDict(message, FeedResponse(), ignore_unknown_fields=True).SerializeToString())
+            except (ConnectionResetError, RuntimeError):
+                return
+
+    @staticmethod
+    def _feed_type(mode: str, keys: tuple) -> str:
+        if mode == 'ltpc':
+            return 'ltpc'
+        return 'index' if all('_INDEX|' in key for key in keys) else 'market'
+
+    # ---- Control ----
+
+    async def _state(self, request):
+        statuses: Dict[str, int] = {}
+        for order in self.orders.values():
+            statuses[order['status']] = statuses.get(order['status'], 0) + 1
+        return web.json_response({
+            'requests': self.requests, 'injected_errors': self.injected_errors, 'orders': statuses,
+            'portfolio_clients': len(self._portfolio_clients), 'behavior': asdict(self.behavior)
+        })
+
+    async def _update_behavior(self, request):
+        try:
+            values = {**asdict(self.behavior), **(await request.json())}
+            self.behavior = MockBehavior.from_dict(values)
+        except (ValueError, TypeError) as e:
+            return web.json_response({'status': 'error', 'message': str(e)}, status=400)
+        return web.json_response(asdict(self.behavior))
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
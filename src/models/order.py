@@ -1,11 +1,13 @@
 # ==================== src/models/order.py ====================
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import KW_ONLY, dataclass, field
+from typing import Dict
 from datetime import datetime
 from enum import Enum
 
 class OrderStatus(Enum):
     PENDING = "PENDING"
+    OPEN = "OPEN"
+    PARTIALLY_FILLED = "PARTIALLY_FILLED"
     FILLED = "FILLED"
     CANCELLED = "CANCELLED"
     REJECTED = "REJECTED"
@@ -19,53 +21,56 @@ class TransactionType(Enum):
     BUY = "BUY"
     SELL = "SELL"
     
-@dataclass
+@dataclass(slots=True)
 class Order:
+    """
+    An order from signal to fill
+
+    Slotted with a fixed field set: construction on the signal path is
+    cheap, orders carry no per-instance __dict__, and setting an attribute
+    that isn't a field raises instead of silently adding one.
+    """
     symbol: str
     quantity: int
     price: float
     order_type: OrderType
     transaction_type: TransactionType
     instrument_key: str = ""
+    
+    # Multi-strategy fields
+    option_type: str = "CE"  # CE, PE
+    strategy_name: str = ""  # Strategy identifier
+    strategy_mode: str = ""  # CE_ONLY, PE_ONLY, BIDIRECTIONAL
+    
+    # Order status fields (keyword-only)
+    _: KW_ONLY
+    order_id: str = ""
     status: OrderStatus = OrderStatus.PENDING
-    order_id: Optional[str] = None
-    filled_price: Optional[float] = None
-    filled_quantity: Optional[int] = None
-    timestamp: Optional[datetime] = None
+    filled_price: float = 0.0
+    filled_quantity: int = 0
+    timestamp: datetime = field(default_factory=datetime.now)
     
-    # Strategy-specific attributes for CE/PE support
-    option_type: Optional[str] = None  # 'CE' or 'PE'
-    strategy_name: Optional[str] = None
-    strategy_mode: Optional[str] = None
+    # Additional tracking
+    error_message: str = ""
+    broker_order_id: str = ""
     
-    def __post_init__(self):
-        if self.timestamp is None:
-            self.timestamp = datetime.now()
-            
-    def __init__(self, symbol: str, quantity: int, price: float, order_type: OrderType, 
-                 transaction_type: TransactionType, instrument_key: str = "",
-                 option_type: str = "CE", strategy_name: str = "", strategy_mode: str = ""):
-    # Existing fields
-        self.symbol = symbol
-        self.quantity = quantity
-        self.price = price
-        self.order_type = order_type
-        self.transaction_type = transaction_type
-        self.instrument_key = instrument_key
-        
-        # Enhanced fields for multi-strategy
-        self.option_type = option_type  # CE, PE
-        self.strategy_name = strategy_name  # Strategy identifier
-        self.strategy_mode = strategy_mode  # CE_ONLY, PE_ONLY, BIDIRECTIONAL
-        
-        # Order status fields
-        self.order_id = ""
-        self.status = OrderStatus.PENDING
-        self.filled_price = 0.0
-        self.filled_quantity = 0
-        self.timestamp = datetime.now()
-        
-        # Additional tracking
-        self.error_message = ""
-        self.broker_order_id = ""
-        
\ No newline at end of file
+    def to_dict(self) -> Dict:
+        """JSON-ready record for journals and snapshots"""
+        return {
+            'symbol': self.symbol,
+            'quantity': self.quantity,
+            'price': self.price,
+            'order_type': self.order_type.value,
+            'transaction_type': self.transaction_type.value,
+            'instrument_key': self.instrument_key,
+            'status': self.status.value,
+            'order_id': self.order_id,
+            'broker_order_id': self.broker_order_id,
+            'filled_price': self.filled_price,
+            'filled_quantity': self.filled_quantity,
+            'timestamp': str(self.timestamp),
+            'option_type': self.option_type,
+            'strategy_name': self.strategy_name,
+            'strategy_mode': self.strategy_mode,
+            'error_message': self.error_message
+        }
@@ -0,0 +1,255 @@
+# ==================== src/models/order_book.py ====================
+import asyncio
+import itertools
+import json
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+from src.models.order import Order, OrderStatus
+
+TERMINAL_STATUSES = frozenset({OrderStatus.FILLED, OrderStatus.CANCELLED, OrderStatus.REJECTED})
+
+# Allowed status transitions; anything else (e.g. a stale 'open' after 'complete') is ignored
+TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.OPEN, OrderStatus.PARTIALLY_FILLED, OrderStatus.FILLED,
+                          OrderStatus.CANCELLED, OrderStatus.REJECTED},
+    OrderStatus.OPEN: {OrderStatus.PARTIALLY_FILLED, OrderStatus.FILLED, OrderStatus.CANCELLED,
+                       OrderStatus.REJECTED},
+    OrderStatus.PARTIALLY_FILLED: {OrderStatus.PARTIALLY_FILLED, OrderStatus.FILLED, OrderStatus.CANCELLED},
+    OrderStatus.FILLED: set(),
+    OrderStatus.CANCELLED: set(),
+    OrderStatus.REJECTED: set()
+}
+
+# Upstox portfolio-stream order statuses
+BROKER_STATUSES = {
+    'put order req received': OrderStatus.PENDING,
+    'validation pending': OrderStatus.PENDING,
+    'open pending': OrderStatus.PENDING,
+    'after market order req received': OrderStatus.PENDING,
+    'open': OrderStatus.OPEN,
+    'trigger pending': OrderStatus.OPEN,
+    'modify pending': OrderStatus.OPEN,
+    'modify validation pending': OrderStatus.OPEN,
+    'modified': OrderStatus.OPEN,
+    'cancel pending': OrderStatus.OPEN,
+    'complete': OrderStatus.FILLED,
+    'cancelled': OrderStatus.CANCELLED,
+    'rejected': OrderStatus.REJECTED
+}
+
+
+class OrderBook:
+    """
+    Orders indexed by order_id and broker order id, with a status state machine
+
+    Streamed order updates are applied as O(1) transitions. Callers can await
+    an order reaching a final status with wait_for_completion(). Completed
+    orders beyond max_completed are evicted to a JSONL journal (or dropped
+    when no journal is configured), so memory stays bounded in long sessions.
+    Evicted orders are buffered and written journal_batch at a time on a
+    background thread, so the order path never waits on the disk.
+    """
+
+    def __init__(self, journal_path: Optional[Union[str, Path]] = None, max_completed: int = 500,
+                 journal_batch: int = 100):
+        self.journal_path = Path(journal_path) if journal_path else None
+        self.max_completed = max_completed
+        self.journal_batch = journal_batch
+        self.logger = logging.getLogger(__name__)
+
+        self._by_id: Dict[str, Order] = {}
+        self._by_broker_id: Dict[str, Order] = {}
+        self._completed: 'OrderedDict[str, Order]' = OrderedDict()
+        self._waiters: Dict[str, asyncio.Future] = {}
+        self._sequence = itertools.count(1)
+
+        # Evicted order records waiting for the journal writer thread
+        self._journal_buffer: List[Dict] = []
+        self._journal_writer: Optional[ThreadPoolExecutor] = None
+        self._journal_pending: Optional[Future] = None
+
+        self.total_orders = 0
+        self.evicted_orders = 0
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Order]:
+        return iter(list(self._by_id.values()))
+
+    def __contains__(self, order_id: str) -> bool:
+        return order_id in self._by_id
+
+    def append(self, order: Order) -> Order:
+        """Track an order (list-style alias of add)"""
+        return self.add(order)
+
+    def add(self, order: Order) -> Order:
+        """Track an order, giving it a unique order_id if it has none or a duplicate"""
+        if not order.order_id:
+            order.order_id = f"ORD_{next(self._sequence)}"
+        elif order.order_id in self._by_id:
+            order.order_id = f"{order.order_id}_{next(self._sequence)}"
+
+        self._by_id[order.order_id] = order
+        if order.broker_order_id:
+            self._by_broker_id[order.broker_order_id] = order
+        self.total_orders += 1
+
+        if order.status in TERMINAL_STATUSES:
+            self._complete(order)
+        return order
+
+    def get(self, order_id: str) -> Optional[Order]:
+        return self._by_id.get(order_id)
+
+    def by_broker_id(self, broker_order_id: str) -> Optional[Order]:
+        return self._by_broker_id.get(broker_order_id)
+
+    def bind_broker_id(self, order_id: str, broker_order_id: str):
+        """Link an order to the id the broker assigned when accepting it"""
+        order = self._by_id[order_id]
+        order.broker_order_id = broker_order_id
+        self._by_broker_id[broker_order_id] = order
+
+    def transition(self, order: Order, status: OrderStatus, filled_quantity: Optional[int] = None,
+                   filled_price: Optional[float] = None) -> bool:
+        """
+        Move an order to a new status
+
+        Returns:
+            False if the transition isn't allowed from the current status (stale update)
+        """
+        if status != order.status and status not in TRANSITIONS[order.status]:
+            self.logger.debug(f"Ignoring {order.status.value} -> {status.value} for order {order.order_id}")
+            return False
+
+        order.status = status
+        if filled_quantity is not None:
+            order.filled_quantity = filled_quantity
+        if filled_price:
+            order.filled_price = filled_price
+
+        if status in TERMINAL_STATUSES:
+            self._complete(order)
+        return True
+
+    def apply_update(self, update: Union[str, Dict]) -> Optional[Order]:
+        """
+        Apply one portfolio-stream order update
+
+        Returns:
+            The updated order, or None for unknown orders, non-order updates and stale transitions
+        """
+        if isinstance(update, (str, bytes)):
+            update = json.loads(update)
+        if update.get('update_type', 'order') != 'order':
+            return None
+
+        order = self._by_broker_id.get(str(update.get('order_id', '')))
+        if order is None:
+            return None
+
+        status = BROKER_STATUSES.get(str(update.get('status', '')).lower())
+        if status is None:
+            self.logger.debug(f"Unknown broker order status: {update.get('status')}")
+            return None
+
+        filled_quantity = update.get('filled_quantity')
+        if status == OrderStatus.OPEN and filled_quantity:
+            status = OrderStatus.PARTIALLY_FILLED
+
+        if not self.transition(order, status, filled_quantity, update.get('average_price')):
+            return None
+        return order
+
+    async def wait_for_completion(self, order_id: str, timeout: Optional[float] = None) -> Order:
+        """
+        Wait until an order is filled, cancelled or rejected
+
+        Raises:
+            asyncio.TimeoutError: If the order is still working after timeout seconds
+        """
+        order = self._by_id[order_id]
+        if order.status in TERMINAL_STATUSES:
+            return order
+
+        future = self._waiters.get(order_id)
+        if future is None:
+            future = self._waiters[order_id] = asyncio.get_running_loop().create_future()
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    def flush(self):
+        """Journal every completed order still in memory and wait for the writes (call on shutdown)"""
+        while self._completed:
+            self._evict_oldest()
+        self.drain_journal()
+        if self._journal_writer is not None:
+            self._journal_writer.shutdown(wait=True)
+            self._journal_writer = None
+
+    def drain_journal(self):
+        """Write buffered evicted orders and wait until every journal write has finished"""
+        pending = self._submit_journal()
+        if pending is not None:
+            pending.result()
+
+    def _complete(self, order: Order):
+        future = self._waiters.pop(order.order_id, None)
+        if future is not None:
+            self._resolve(future, order)
+
+        self._completed[order.order_id] = order
+        while len(self._completed) > self.max_completed:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        order_id, order = self._completed.popitem(last=False)
+        self._by_id.pop(order_id, None)
+        if order.broker_order_id:
+            self._by_broker_id.pop(order.broker_order_id, None)
+        self.evicted_orders += 1
+
+        if self.journal_path is not None:
+            self._journal_buffer.append(order.to_dict())
+            if len(self._journal_buffer) >= self.journal_batch:
+                self._submit_journal()
+
+    def _submit_journal(self) -> Optional[Future]:
+        """Hand the buffered records to the writer thread; a single worker keeps batches in order"""
+        if self._journal_buffer and self.journal_path is not None:
+            records, self._journal_buffer = self._journal_buffer, []
+            if self._journal_writer is None:
+                self._journal_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='order-journal')
+            self._journal_pending = self._journal_writer.submit(self._write_journal, self.journal_path, records)
+        return self._journal_pending
+
+    def _write_journal(self, path: Path, records: List[Dict]):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'a') as f:
+                f.write(''.join(json.dumps(record) + '\n' for record in records))
+        except Exception as e:
+            self.logger.error(f"Failed to journal {len(records)} orders: {e}")
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, order: Order):
+        # Updates may arrive on the websocket thread; futures must be resolved on their own loop
+        def set_result():
+            if not future.done():
+                future.set_result(order)
+
+        loop = future.get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            set_result()
+        else:
+            loop.call_soon_threadsafe(set_result)
@@ -1,9 +1,10 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Dict, Optional
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True)
 class Position:
+    """An open position; slotted like Order, so only these fields can be set"""
     symbol: str
     quantity: int
     average_price: float
@@ -16,8 +17,20 @@ class Position:
     strategy_name: Optional[str] = None
     option_type: Optional[str] = None  # 'CE' or 'PE'
     strategy_mode: Optional[str] = None
-    entry_time: Optional[datetime] = None
+    entry_time: datetime = field(default_factory=datetime.now)
     
-    def __post_init__(self):
-        if self.entry_time is None:
-            self.entry_time = datetime.now()
\ No newline at end of file
+    def to_dict(self) -> Dict:
+        """JSON-ready record for snapshots"""
+        return {
+            'symbol': self.symbol,
+            'quantity': self.quantity,
+            'average_price': self.average_price,
+            'current_price': self.current_price,
+            'pnl': self.pnl,
+            'unrealized_pnl': self.unrealized_pnl,
+            'instrument_key': self.instrument_key,
+            'strategy_name': self.strategy_name,
+            'option_type': self.option_type,
+            'strategy_mode': self.strategy_mode,
+            'entry_time': str(self.entry_time)
+        }
@@ -0,0 +1,160 @@
+# ==================== src/models/position_book.py ====================
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.models.position import Position
+
+
+class PositionBook(MutableMapping):
+    """
+    Open positions with secondary indexes by symbol, strategy and option type
+
+    Behaves like the plain Dict[str, Position] it replaces, so existing key
+    formats keep working. Aggregate exposure (quantity x current price) and
+    unrealized P&L are kept up to date incrementally; quantity and price
+    changes should go through resize()/mark() (or refresh() after mutating a
+    position directly) so the aggregates stay in sync.
+
+    Quantities are in lots when a multiplier (the lot size) is given, so
+    exposure and P&L come out in rupees like the bot's realized P&L.
+    """
+
+    def __init__(self, multiplier: float = 1):
+        self.multiplier = multiplier
+        self._positions: Dict[str, Position] = {}
+
+        # index value -> {position_key: position}; dicts keep insertion order
+        self._by_symbol: Dict[str, Dict[str, Position]] = {}
+        self._by_strategy: Dict[str, Dict[str, Position]] = {}
+        self._by_option_type: Dict[str, Dict[str, Position]] = {}
+
+        # Contribution of each position to the aggregates, so updates are O(1)
+        self._contributions: Dict[str, Tuple[float, float]] = {}
+        self.exposure = 0.0
+        self.unrealized_pnl = 0.0
+
+    # ---- Mapping interface ----
+
+    def __getitem__(self, key: str) -> Position:
+        return self._positions[key]
+
+    def __setitem__(self, key: str, position: Position):
+        if key in self._positions:
+            del self[key]
+
+        self._positions[key] = position
+        self._index(self._by_symbol, position.symbol, key, position)
+        self._index(self._by_strategy, position.strategy_name or '', key, position)
+        self._index(self._by_option_type, position.option_type or '', key, position)
+        self.refresh(key)
+
+    def __delitem__(self, key: str):
+        position = self._positions.pop(key)
+        self._unindex(self._by_symbol, position.symbol, key)
+        self._unindex(self._by_strategy, position.strategy_name or '', key)
+        self._unindex(self._by_option_type, position.option_type or '', key)
+
+        exposure, unrealized = self._contributions.pop(key)
+        self.exposure -= exposure
+        self.unrealized_pnl -= unrealized
+        if not self._positions:
+            # Reset exactly so float drift can't accumulate across sessions
+            self.exposure = 0.0
+            self.unrealized_pnl = 0.0
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    # ---- Indexed lookups ----
+
+    def for_symbol(self, symbol: str) -> List[Tuple[str, Position]]:
+        """(position_key, position) pairs for one underlying symbol"""
+        return list(self._by_symbol.get(symbol, {}).items())
+
+    def for_strategy(self, strategy_name: str) -> List[Tuple[str, Position]]:
+        """(position_key, position) pairs opened by one strategy"""
+        return list(self._by_strategy.get(strategy_name or '', {}).items())
+
+    def for_option_type(self, option_type: str) -> List[Tuple[str, Position]]:
+        """(position_key, position) pairs of one option type ('CE'/'PE')"""
+        return list(self._by_option_type.get(option_type or '', {}).items())
+
+    def select(self, symbol: Optional[str] = None, strategy_name: Optional[str] = None,
+               option_type: Optional[str] = None) -> List[Tuple[str, Position]]:
+        """Positions matching every given filter, scanning only the smallest matching index"""
+        candidates = []
+        if symbol is not None:
+            candidates.append(self._by_symbol.get(symbol, {}))
+        if strategy_name is not None:
+            candidates.append(self._by_strategy.get(strategy_name, {}))
+        if option_type is not None:
+            candidates.append(self._by_option_type.get(option_type, {}))
+
+        if not candidates:
+            return list(self._positions.items())
+
+        smallest = min(candidates, key=len)
+        return [(key, position) for key, position in smallest.items()
+                if all(key in index for index in candidates)]
+
+    def symbols(self) -> List[str]:
+        """Symbols with at least one open position"""
+        return list(self._by_symbol)
+
+    # ---- Updates ----
+
+    def resize(self, key: str, quantity: int, average_price: Optional[float] = None):
+        """Change a position's quantity (and average price after adding to it)"""
+        position = self._positions[key]
+        position.quantity = quantity
+        if average_price is not None:
+            position.average_price = average_price
+        position.unrealized_pnl = (position.current_price - position.average_price) * position.quantity * self.multiplier
+        self.refresh(key)
+
+    def mark(self, symbol: str, price: float) -> int:
+        """
+        Mark every position in a symbol to a new price
+
+        Returns:
+            Number of positions updated
+        """
+        positions = self._by_symbol.get(symbol)
+        if not positions:
+            return 0
+
+        for key in positions:
+            self.mark_position(key, price)
+        return len(positions)
+
+    def mark_position(self, key: str, price: float):
+        """Mark one position to a new price (e.g. the premium of the contract it holds)"""
+        position = self._positions[key]
+        position.current_price = price
+        position.unrealized_pnl = (price - position.average_price) * position.quantity * self.multiplier
+        self.refresh(key)
+
+    def refresh(self, key: str):
+        """Recompute one position's contribution to the aggregates"""
+        position = self._positions[key]
+        old_exposure, old_unrealized = self._contributions.get(key, (0.0, 0.0))
+
+        exposure = position.quantity * position.current_price * self.multiplier
+        unrealized = position.unrealized_pnl or 0.0
+        self._contributions[key] = (exposure, unrealized)
+
+        self.exposure += exposure - old_exposure
+        self.unrealized_pnl += unrealized - old_unrealized
+
+    def _index(self, index: Dict[str, Dict[str, Position]], value: str, key: str, position: Position):
+        index.setdefault(value, {})[key] = position
+
+    def _unindex(self, index: Dict[str, Dict[str, Position]], value: str, key: str):
+        bucket = index.get(value)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del index[value]
@@ -1,9 +1,15 @@
 # ==================== src/strategy/base_strategy.py (FIXED) ====================
+from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
 import logging
 from src.models.order import Order, OrderType, TransactionType
 from src.models.position import Position
+from src.utils.hot_log import get_hot_logger
+from src.utils.lazy_import import lazy_import
+
+np = lazy_import('numpy')
 
 class BaseStrategy(ABC):
     """Base strategy class"""
@@ -12,10 +18,18 @@ class BaseStrategy(ABC):
         self.name = name
         self.params = params or {}
         self.logger = logging.getLogger(f'trading.strategy.{name}')
+        self.hot = get_hot_logger(self.logger.name)
         self.positions: Dict[str, Position] = {}
         self.orders: List[Order] = []
         self.is_active = True
         
+        # Time source for signal timestamps - the bot hands over its own clock (simulated in replays)
+        self.clock: Callable[[], datetime] = datetime.now
+
+        # Trailing candles evaluate_batch needs to reproduce the per-event
+        # result for the latest candle (set by strategies that implement it)
+        self.batch_window = 0
+        
     @abstractmethod
     async def should_enter(self, market_data: Dict) -> Optional[Order]:
         """
@@ -43,10 +57,41 @@ class BaseStrategy(ABC):
         """
         pass
     
+    def evaluate_batch(self, candles: Dict[str, np.ndarray]) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Optional columnar evaluation over a window of candles
+
+        Args:
+            candles: Equal-length arrays keyed by field - open/high/low/close/volume,
+                ha_open/ha_high/ha_low/ha_close and timestamp, whichever are available
+
+        Returns:
+            Arrays aligned with the window: boolean 'ce_entry', 'pe_entry', 'ce_exit'
+            and 'pe_exit' masks plus the strategy's indicator values, or None when the
+            strategy only supports per-event evaluation. A row of these arrays can be
+            passed to should_enter/should_exit as market_data['signals'].
+        """
+        return None
+
+    @property
+    def supports_batch(self) -> bool:
+        """Whether the strategy overrides evaluate_batch"""
+        return type(self).evaluate_batch is not BaseStrategy.evaluate_batch
+
+    @staticmethod
+    def signals_at(signals: Dict[str, np.ndarray], index: int) -> Dict:
+        """One row of evaluate_batch output as plain Python values"""
+        return {key: values[index].item() if hasattr(values[index], 'item') else values[index]
+                for key, values in signals.items()}
+
     async def on_order_filled(self, order: Order):
         """Called when an order is filled"""
         self.logger.info(f"Order filled: {order.symbol} {order.transaction_type.value} {order.quantity} @ {order.filled_price}")
     
+    async def on_entry_dropped(self, order: Order):
+        """Called when an entry signal was discarded before submission (late or cancelled)"""
+        self.logger.info(f"Entry dropped: {order.symbol} {order.transaction_type.value} {order.quantity}")
+    
     async def on_error(self, error: Exception):
         """Called when an error occurs"""
         self.logger.error(f"Strategy error: {error}")
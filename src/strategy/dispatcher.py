@@ -0,0 +1,201 @@
+# ==================== src/strategy/dispatcher.py ====================
+"""
+Concurrent strategy evaluation with per-strategy deadlines.
+
+All strategies for a candle are evaluated as concurrent tasks, so a strategy
+that awaits something slow no longer holds up the ones after it. A strategy
+that misses its deadline is reported and its entry signal is dropped as
+stale; the orders of every strategy that made it are then submitted together,
+so the last strategy's signal reaches the broker as quickly as the first.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.models.order import Order
+from src.models.position import Position
+from src.strategy.base_strategy import BaseStrategy
+from src.utils.metrics import metrics
+
+
+@dataclass
+class StrategyResult:
+    """Signals produced by one strategy for one candle"""
+    strategy: BaseStrategy
+    entry_order: Optional[Order] = None
+    exit_orders: List[Tuple[str, Position, Order]] = field(default_factory=list)
+    elapsed: float = 0.0
+    late: bool = False
+    signalled_at: float = 0.0  # perf_counter() when evaluation finished
+
+
+@dataclass
+class DispatchResult:
+    """Outcome of evaluating all strategies for one candle"""
+    results: List[StrategyResult] = field(default_factory=list)
+    late: List[str] = field(default_factory=list)  # Strategies that missed their deadline
+    failed: List[str] = field(default_factory=list)
+
+
+class StrategyDispatcher:
+    """Evaluates strategies concurrently and submits their orders in parallel"""
+
+    def __init__(self, deadline: float = 0.5):
+        """
+        Args:
+            deadline: Default seconds a strategy has to produce its signals;
+                a strategy's params['deadline'] overrides it
+        """
+        self.deadline = deadline
+        self.logger = logging.getLogger(__name__)
+
+        # Per-strategy counters for status reporting
+        self.stats: Dict[str, Dict] = {}
+
+    def deadline_for(self, strategy: BaseStrategy) -> float:
+        return strategy.params.get('deadline', self.deadline)
+
+    async def dispatch(self, strategies: List[BaseStrategy],
+                       market_data_for: Callable[[BaseStrategy], Dict],
+                       positions_for: Callable[[BaseStrategy], List[Tuple[str, Position]]]) -> DispatchResult:
+        """
+        Evaluate strategies concurrently for one candle
+
+        Args:
+            strategies: Active strategies
+            market_data_for: Market data handed to a strategy
+            positions_for: (position_key, position) pairs a strategy may exit
+
+        Returns:
+            DispatchResult with on-time signals and the late/failed strategy names
+        """
+        outcome = DispatchResult()
+        if not strategies:
+            return outcome
+
+        # Results are filled in as evaluation goes, so a cancelled strategy's entry can still be seen
+        partial = {strategy: StrategyResult(strategy) for strategy in strategies}
+        tasks = {
+            asyncio.ensure_future(self._evaluate(partial[strategy], market_data_for(strategy), positions_for(strategy))): strategy
+            for strategy in strategies
+        }
+        done, pending = await asyncio.wait(tasks, timeout=max(self.deadline_for(s) for s in strategies))
+
+        # Still running at the longest deadline: report and stop waiting
+        for task in pending:
+            task.cancel()
+            strategy = tasks[task]
+            self._report_late(strategy, outcome)
+            if partial[strategy].entry_order:
+                await self._drop_entry(strategy, partial[strategy].entry_order)
+
+        for task in done:
+            strategy = tasks[task]
+            try:
+                result = task.result()
+            except Exception as e:
+                self.logger.error(f"Error in strategy {strategy.name}: {e}")
+                outcome.failed.append(strategy.name)
+                continue
+
+            self._record(strategy, result.elapsed)
+
+            # CPU-bound strategies can't be interrupted, so the deadline is also checked afterwards
+            if result.elapsed > self.deadline_for(strategy):
+                result.late = True
+                self._report_late(strategy, outcome, result.elapsed)
+                if result.entry_order:
+                    await self._drop_entry(strategy, result.entry_order)
+                    result.entry_order = None
+
+            outcome.results.append(result)
+
+        # Keep strategy registration order for submission and exit de-duplication
+        order = {strategy: i for i, strategy in enumerate(strategies)}
+        outcome.results.sort(key=lambda r: order[r.strategy])
+        return outcome
+
+    async def submit(self, outcome: DispatchResult,
+                     submit_entry: Callable[[BaseStrategy, Order], Awaitable],
+                     submit_exit: Callable[[BaseStrategy, str, Position, Order], Awaitable]) -> List:
+        """
+        Submit all entry and exit orders concurrently
+
+        A position that several strategies want to exit is exited once, by the
+        first strategy in registration order.
+        """
+        coroutines = []
+        exiting = set()
+
+        for result in outcome.results:
+            if result.entry_order:
+                metrics.signals.inc(result.strategy.name, 'entry')
+                coroutines.append(self._timed(submit_entry(result.strategy, result.entry_order), result.signalled_at))
+            for position_key, position, exit_order in result.exit_orders:
+                if position_key in exiting:
+                    continue
+                exiting.add(position_key)
+                metrics.signals.inc(result.strategy.name, 'exit')
+                coroutines.append(self._timed(submit_exit(result.strategy, position_key, position, exit_order),
+                                              result.signalled_at))
+
+        if not coroutines:
+            return []
+
+        submitted = await asyncio.gather(*coroutines, return_exceptions=True)
+        for item in submitted:
+            if isinstance(item, Exception):
+                self.logger.error(f"Order submission failed: {item}")
+        return submitted
+
+    async def _drop_entry(self, strategy: BaseStrategy, entry_order: Order):
+        """Discard a stale entry and let the strategy undo the state it set for it"""
+        self.logger.warning(f"⏰ Dropping stale {entry_order.option_type} entry from {strategy.name}")
+        try:
+            await strategy.on_entry_dropped(entry_order)
+        except Exception as e:
+            self.logger.error(f"Error in {strategy.name}.on_entry_dropped: {e}")
+
+    async def _evaluate(self, result: StrategyResult, market_data: Dict,
+                        positions: List[Tuple[str, Position]]) -> StrategyResult:
+        start = time.perf_counter()
+        strategy = result.strategy
+
+        result.entry_order = await strategy.should_enter(market_data)
+        for position_key, position in positions:
+            exit_order = await strategy.should_exit(position, market_data)
+            if exit_order:
+                result.exit_orders.append((position_key, position, exit_order))
+
+        result.signalled_at = time.perf_counter()
+        result.elapsed = result.signalled_at - start
+        return result
+
+    async def _timed(self, submission: Awaitable, signalled_at: float):
+        """Await an order submission, recording signal-to-order latency and the outcome"""
+        try:
+            placed = await submission
+        except Exception:
+            metrics.orders.inc('error')
+            raise
+        metrics.signal_to_order.observe(time.perf_counter() - signalled_at)
+        metrics.orders.inc('placed' if placed is not False else 'failed')
+        return placed
+
+    def _record(self, strategy: BaseStrategy, elapsed: float):
+        stats = self.stats.setdefault(strategy.name, {'evaluations': 0, 'late': 0, 'max_ms': 0.0})
+        stats['evaluations'] += 1
+        stats['max_ms'] = max(stats['max_ms'], elapsed * 1000)
+
+    def _report_late(self, strategy: BaseStrategy, outcome: DispatchResult, elapsed: Optional[float] = None):
+        stats = self.stats.setdefault(strategy.name, {'evaluations': 0, 'late': 0, 'max_ms': 0.0})
+        stats['late'] += 1
+        outcome.late.append(strategy.name)
+
+        deadline_ms = self.deadline_for(strategy) * 1000
+        if elapsed is None:
+            self.logger.warning(f"⏰ Strategy {strategy.name} missed its {deadline_ms:.0f}ms deadline - not waiting")
+        else:
+            self.logger.warning(f"⏰ Strategy {strategy.name} took {elapsed * 1000:.0f}ms (deadline {deadline_ms:.0f}ms)")
@@ -1,12 +1,16 @@
 # ==================== src/strategy/enhanced_pine_script_strategy.py ====================
+from __future__ import annotations
 from typing import Dict, Optional, List
-import numpy as np
-import pandas as pd
 from src.strategy.base_strategy import BaseStrategy
 from src.models.order import Order, OrderType, TransactionType
 from src.models.position import Position
 from datetime import datetime, time
 from src.utils.position_sizing import PositionSizer
+from src.utils.indicators import heikin_ashi, rolling_mean, windowed_ema, windowed_rma
+from src.utils.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
 
 class EnhancedPineScriptStrategy(BaseStrategy):
     """
@@ -44,9 +48,9 @@ class EnhancedPineScriptStrategy(BaseStrategy):
         # Data storage for calculations
         self.ha_candles_history: List[Dict] = []
         self.max_history = 50
+        self.batch_window = self.max_history
         
         # Enhanced monitoring
-        self.last_analysis_log = datetime.now()
         self.analysis_log_interval = 180  # Log detailed analysis every 3 minutes
         self.signal_attempts = 0
         self.last_signal_time = None
@@ -63,9 +67,9 @@ class EnhancedPineScriptStrategy(BaseStrategy):
         if len(self.ha_candles_history) > self.max_history:
             self.ha_candles_history = self.ha_candles_history[-self.max_history:]
         
-        self.logger.debug(f"Added HA candle: O:{ha_candle.get('ha_open', 0):.2f} "
-                         f"H:{ha_candle.get('ha_high', 0):.2f} L:{ha_candle.get('ha_low', 0):.2f} "
-                         f"C:{ha_candle.get('ha_close', 0):.2f} | Total: {len(self.ha_candles_history)}")
+        self.hot.debug('add_candle', "Added HA candle: O:%.2f H:%.2f L:%.2f C:%.2f | Total: %d",
+                       ha_candle.get('ha_open', 0), ha_candle.get('ha_high', 0),
+                       ha_candle.get('ha_low', 0), ha_candle.get('ha_close', 0), len(self.ha_candles_history))
     
     def calculate_trend_line(self, candles: List[Dict]) -> Optional[float]:
         """Calculate trend line: (EMA9 + SMA9) / 2"""
@@ -205,32 +209,128 @@ class EnhancedPineScriptStrategy(BaseStrategy):
         
         return strong_green, strong_red, body_pct
     
+    def evaluate_batch(self, candles: Dict[str, np.ndarray]) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Trend line, ADX and candle-strength signals for every candle in a window
+
+        Each bar sees the same trailing max_history candles the per-event path
+        keeps, so values match calculate_trend_line/calculate_adx. Raw OHLC
+        columns are converted to Heikin Ashi first.
+        """
+        if 'ha_close' not in candles:
+            candles = heikin_ashi(*(np.asarray(candles[k], dtype=float) for k in ('open', 'high', 'low', 'close')))
+
+        o, h, l, c = (np.asarray(candles[k], dtype=float) for k in ('ha_open', 'ha_high', 'ha_low', 'ha_close'))
+        n = len(c)
+        window = self.max_history
+        history_len = np.minimum(np.arange(n) + 1, window)
+
+        # Trend line = (EMA9 + SMA9) / 2
+        sma9 = rolling_mean(c, 9)
+        trend_line = np.where(history_len >= 9, (windowed_ema(c, 9, window) + sma9) / 2, np.nan)
+
+        # Directional movement and true range (index 0 has no previous candle)
+        up_move = np.zeros(n)
+        down_move = np.zeros(n)
+        tr = np.zeros(n)
+        up_move[1:] = h[1:] - h[:-1]
+        down_move[1:] = l[:-1] - l[1:]
+        tr[1:] = np.maximum(h[1:] - l[1:], np.maximum(np.abs(h[1:] - c[:-1]), np.abs(l[1:] - c[:-1])))
+        plus_dm = np.where((up_move > 0) & (up_move > down_move), up_move, 0.0)
+        minus_dm = np.where((down_move > 0) & (down_move > up_move), down_move, 0.0)
+
+        smooth_tr = windowed_rma(tr, self.adx_length, window)
+        smooth_plus_dm = windowed_rma(plus_dm, self.adx_length, window)
+        smooth_minus_dm = windowed_rma(minus_dm, self.adx_length, window)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            plus_di = np.where(smooth_tr > 0, 100 * smooth_plus_dm / smooth_tr, 0.0)
+            minus_di = np.where(smooth_tr > 0, 100 * smooth_minus_dm / smooth_tr, 0.0)
+            di_sum = plus_di + minus_di
+            adx = np.where(di_sum > 0, 100 * np.abs(plus_di - minus_di) / di_sum, 0.0)
+
+            candle_range = h - l
+            body_pct = np.where(candle_range > 0, np.abs(c - o) / candle_range, 0.0)
+
+        ready = history_len >= self.adx_length + 1
+        adx = np.where(ready, adx, np.nan)
+
+        strong_green = (c > o) & (body_pct > self.strong_candle_threshold)
+        strong_red = (c < o) & (body_pct > self.strong_candle_threshold)
+        has_trend = ~np.isnan(trend_line)
+        price_above = has_trend & (c > trend_line)
+        price_below = has_trend & (c < trend_line)
+        trend_ok = ready & (adx > self.adx_threshold)
+
+        ce_entry = price_above & strong_green & trend_ok
+        pe_entry = price_below & strong_red & trend_ok
+        if self.trading_mode == 'PE_ONLY':
+            ce_entry = np.zeros(n, dtype=bool)
+        elif self.trading_mode == 'CE_ONLY':
+            pe_entry = np.zeros(n, dtype=bool)
+
+        return {
+            'ce_entry': ce_entry,
+            'pe_entry': pe_entry,
+            'ce_exit': price_below | (has_trend & strong_red),
+            'pe_exit': price_above | (has_trend & strong_green),
+            'price': c,
+            'trend_line': trend_line,
+            'adx': adx,
+            'body_pct': body_pct,
+            'strong_green': strong_green,
+            'strong_red': strong_red
+        }
+
+    def latest_signals(self, ha_candle: Dict, with_adx: bool = True) -> Dict:
+        """
+        Per-event signals for one candle from the strategy's own history
+
+        Same fields as a row of evaluate_batch; the scalar calculations are
+        cheaper than a batch pass when only the newest candle is needed.
+        """
+        trend_line = self.calculate_trend_line(self.ha_candles_history)
+        adx = self.calculate_adx(self.ha_candles_history)[0] if with_adx else None
+        strong_green, strong_red, body_pct = self.analyze_candle_strength(ha_candle)
+
+        return {
+            'price': ha_candle['ha_close'],
+            'trend_line': np.nan if trend_line is None else trend_line,
+            'adx': np.nan if adx is None else adx,
+            'body_pct': body_pct,
+            'strong_green': strong_green,
+            'strong_red': strong_red
+        }
+
     async def should_enter(self, market_data: Dict) -> Optional[Order]:
         """Enhanced entry logic supporting multiple trading modes"""
         try:
             # Get Heikin Ashi candle data
             ha_candle = market_data.get('ha_candle')
-            if not ha_candle:
+            signals = market_data.get('signals')
+            if not ha_candle and signals is None:
                 return None
             
             # Add to history
-            self.add_ha_candle(ha_candle)
-            
-            # Need enough data for calculations
-            if len(self.ha_candles_history) < self.adx_length + 1:
-                current_time = datetime.now()
-                if (current_time - self.last_analysis_log).total_seconds() > 60:
-                    self.logger.info(f"🔄 {self.strategy_id} - Building data: {len(self.ha_candles_history)}/{self.adx_length + 1} HA candles")
-                    self.last_analysis_log = current_time
-                return None
-            
-            # Calculate trend line
-            trend_line = self.calculate_trend_line(self.ha_candles_history)
-            if trend_line is None:
+            if ha_candle:
+                self.add_ha_candle(ha_candle)
+            
+            # Need enough data for calculations (runners may pass precomputed batch signals)
+            if signals is None:
+                if len(self.ha_candles_history) < self.adx_length + 1:
+                    self.hot.info('building_data', "🔄 %s - Building data: %d/%d HA candles", self.strategy_id,
+                                  len(self.ha_candles_history), self.adx_length + 1, every=60)
+                    return None
+                signals = self.latest_signals(ha_candle)
+            
+            # Trend line and ADX
+            trend_line = signals['trend_line']
+            adx = signals['adx']
+            if np.isnan(trend_line) or np.isnan(adx):
                 return None
             
             # Current price
-            current_price = ha_candle['ha_close']
+            current_price = signals['price']
             
             # Market condition analysis
             price_above = current_price > trend_line
@@ -238,27 +338,22 @@ class EnhancedPineScriptStrategy(BaseStrategy):
             price_diff = current_price - trend_line
             price_diff_pct = (price_diff / trend_line) * 100
             
-            # Analyze candle strength
-            strong_green, strong_red, body_pct = self.analyze_candle_strength(ha_candle)
-            
-            # Calculate ADX
-            adx, plus_di, minus_di = self.calculate_adx(self.ha_candles_history)
-            if adx is None:
-                return None
+            # Candle strength
+            strong_green = signals['strong_green']
+            strong_red = signals['strong_red']
+            body_pct = signals['body_pct']
             
             # Check trend strength
             trend_ok = adx > self.adx_threshold
             
             # Enhanced analysis logging
-            current_time = datetime.now()
-            if (current_time - self.last_analysis_log).total_seconds() > self.analysis_log_interval:
+            if self.hot.enabled('entry_analysis', every=self.analysis_log_interval):
                 self.logger.info(f"🎯 {self.strategy_id} Entry Analysis:")
                 self.logger.info(f"   💰 Current Price: Rs.{current_price:.2f}")
                 self.logger.info(f"   📈 Trend Line: Rs.{trend_line:.2f} (Diff: {price_diff:+.2f} | {price_diff_pct:+.2f}%)")
                 self.logger.info(f"   🕯️ Candle: Green: {strong_green} ({body_pct:.1%}), Red: {strong_red}")
                 self.logger.info(f"   📊 ADX: {adx:.2f} ({'✅' if trend_ok else '❌'} > {self.adx_threshold})")
                 self.logger.info(f"   🎯 Mode: {self.trading_mode} | CE Trade: {self.in_ce_trade} | PE Trade: {self.in_pe_trade}")
-                self.last_analysis_log = current_time
             
             # Trading logic based on mode
             if self.trading_mode == 'CE_ONLY':
@@ -303,7 +398,7 @@ class EnhancedPineScriptStrategy(BaseStrategy):
             
             # Set trade state
             self.in_ce_trade = True
-            self.last_signal_time = datetime.now()
+            self.last_signal_time = self.clock()
             
             return Order(
                 symbol=str(market_data.get('symbol', 'NIFTY')),
@@ -338,7 +433,7 @@ class EnhancedPineScriptStrategy(BaseStrategy):
             
             # Set trade state
             self.in_pe_trade = True
-            self.last_signal_time = datetime.now()
+            self.last_signal_time = self.clock()
             
             return Order(
                 symbol=str(market_data.get('symbol', 'NIFTY')),
@@ -357,25 +452,29 @@ class EnhancedPineScriptStrategy(BaseStrategy):
     async def should_exit(self, position: Position, market_data: Dict) -> Optional[Order]:
         """Enhanced exit logic for both CE and PE positions"""
         try:
-            # Get Heikin Ashi candle data
-            ha_candle = market_data.get('ha_candle')
-            if not ha_candle:
-                return None
-            
-            # Calculate trend line
-            trend_line = self.calculate_trend_line(self.ha_candles_history)
-            if trend_line is None:
+            # Get Heikin Ashi candle data (or precomputed batch signals)
+            signals = market_data.get('signals')
+            if signals is None:
+                ha_candle = market_data.get('ha_candle')
+                if not ha_candle:
+                    return None
+                signals = self.latest_signals(ha_candle, with_adx=False)
+            
+            # Trend line
+            trend_line = signals['trend_line']
+            if np.isnan(trend_line):
                 return None
             
             # Current price
-            current_price = ha_candle['ha_close']
+            current_price = signals['price']
             
             # Market conditions
             price_above = current_price > trend_line
             price_below = current_price < trend_line
             
-            # Analyze candle strength
-            strong_green, strong_red, body_pct = self.analyze_candle_strength(ha_candle)
+            # Candle strength
+            strong_green = signals['strong_green']
+            strong_red = signals['strong_red']
             
             # Get position details
             option_type = getattr(position, 'option_type', 'CE')
@@ -442,6 +541,19 @@ class EnhancedPineScriptStrategy(BaseStrategy):
             self.logger.info(f"📈 {self.strategy_id} - {option_type} ENTRY FILLED @ Rs.{order.filled_price}")
         else:
             self.logger.info(f"📉 {self.strategy_id} - {option_type} EXIT FILLED @ Rs.{order.filled_price}")
+            # Exits not raised by should_exit (e.g. a forced close) must clear the side too
+            if option_type == 'PE':
+                self.in_pe_trade = False
+            else:
+                self.in_ce_trade = False
+    
+    async def on_entry_dropped(self, order: Order):
+        """Clear the trade flag set by the dropped entry so the next signal on that side can enter"""
+        await super().on_entry_dropped(order)
+        if order.option_type == 'PE':
+            self.in_pe_trade = False
+        else:
+            self.in_ce_trade = False
     
     @property
     def in_trade(self) -> bool:
@@ -1,7 +1,6 @@
 # ==================== src/strategy/options_strategy.py ====================
+from __future__ import annotations
 from typing import Dict, Optional
-import numpy as np
-import pandas as pd
 try:
     import pandas_ta as ta
 except ImportError:
@@ -9,6 +8,10 @@ except ImportError:
 from src.strategy.base_strategy import BaseStrategy
 from src.models.order import Order, OrderType, TransactionType
 from src.models.position import Position
+from src.utils.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
 
 class OptionsStrategy(BaseStrategy):
     """
@@ -30,7 +33,36 @@ class OptionsStrategy(BaseStrategy):
         # Technical indicators
         self.price_history = []
         self.rsi_period = params.get('rsi_period', 14)
+
+        # Manual RSI only looks back rsi_period + 1 prices; pandas-ta's smoothing uses the whole history
+        self.batch_window = 100 if ta is not None else self.rsi_period + 1
         
+    def evaluate_batch(self, candles: Dict[str, np.ndarray]) -> Optional[Dict[str, np.ndarray]]:
+        """RSI and time-window signals for every candle in a window"""
+        prices = np.asarray(candles['close'] if 'close' in candles else candles['ha_close'], dtype=float)
+        n = len(prices)
+        rsi = self.calculate_rsi_series(prices, self.rsi_period)
+
+        at_entry_time = np.zeros(n, dtype=bool)
+        after_exit_time = np.zeros(n, dtype=bool)
+        if 'timestamp' in candles:
+            timestamps = pd.DatetimeIndex(candles['timestamp'])
+            minutes = np.asarray(timestamps.hour * 60 + timestamps.minute)
+            entry_hour, entry_minute = map(int, self.entry_time.split(':'))
+            exit_hour, exit_minute = map(int, self.exit_time.split(':'))
+            at_entry_time = minutes == entry_hour * 60 + entry_minute
+            after_exit_time = minutes >= exit_hour * 60 + exit_minute
+
+        no_signal = np.zeros(n, dtype=bool)
+        return {
+            'ce_entry': at_entry_time & (rsi < 30),
+            'pe_entry': no_signal,
+            'ce_exit': after_exit_time | (rsi > 70),
+            'pe_exit': no_signal,
+            'price': prices,
+            'rsi': rsi
+        }
+    
     async def should_enter(self, market_data: Dict) -> Optional[Order]:
         """
         Entry logic - implement your strategy here
@@ -57,9 +89,10 @@ class OptionsStrategy(BaseStrategy):
             # Add your entry conditions here
             # Example: Simple time-based entry with RSI
             if current_time and current_time.strftime('%H:%M') == self.entry_time:
-                # Check RSI for oversold condition
-                if len(self.price_history) >= self.rsi_period:
-                    rsi = self.calculate_rsi(self.price_history, self.rsi_period)
+                # Check RSI for oversold condition (precomputed by batch runners)
+                signals = market_data.get('signals')
+                if signals is not None or len(self.price_history) >= self.rsi_period:
+                    rsi = signals['rsi'] if signals is not None else self.calculate_rsi(self.price_history, self.rsi_period)
                     
                     # Enter long if RSI < 30 (oversold)
                     if rsi < 30:
@@ -140,8 +173,9 @@ class OptionsStrategy(BaseStrategy):
                 )
             
             # RSI-based exit (if overbought)
-            if len(self.price_history) >= self.rsi_period:
-                rsi = self.calculate_rsi(self.price_history, self.rsi_period)
+            signals = market_data.get('signals')
+            if signals is not None or len(self.price_history) >= self.rsi_period:
+                rsi = signals['rsi'] if signals is not None else self.calculate_rsi(self.price_history, self.rsi_period)
                 if rsi > 70:  # Overbought
                     self.logger.info(f"RSI overbought exit: {rsi:.2f}")
                     return Order(
@@ -191,6 +225,26 @@ class OptionsStrategy(BaseStrategy):
             
             return rsi.iloc[-1] if not pd.isna(rsi.iloc[-1]) else 50
     
+    def calculate_rsi_series(self, prices: np.ndarray, period: int = 14) -> np.ndarray:
+        """RSI for every price, matching calculate_rsi on the trailing history"""
+        price_series = pd.Series(prices)
+
+        if ta is not None:
+            rsi = ta.rsi(price_series, length=period)
+        else:
+            deltas = price_series.diff()
+            gains = deltas.where(deltas > 0, 0)
+            losses = -deltas.where(deltas < 0, 0)
+
+            rs = gains.rolling(window=period).mean() / losses.rolling(window=period).mean()
+            rsi = 100 - (100 / (1 + rs))
+
+        # Neutral until period + 1 prices exist, and where RSI is undefined
+        rsi = rsi.to_numpy(dtype=float, copy=True)
+        rsi[:period] = 50
+        rsi[np.isnan(rsi)] = 50
+        return rsi
+    
     def calculate_moving_average(self, prices: list, period: int) -> float:
         """Calculate simple moving average"""
         if len(prices) < period:
@@ -1,12 +1,14 @@
 # ==================== src/strategy/pine_script_strategy.py (ENHANCED) ====================
 from typing import Dict, Optional, List
-import numpy as np
-import pandas as pd
 from src.strategy.base_strategy import BaseStrategy
 from src.models.order import Order, OrderType, TransactionType
 from src.models.position import Position
 from datetime import datetime, time
 from src.utils.position_sizing import PositionSizer
+from src.utils.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
 
 
 class PineScriptStrategy(BaseStrategy):
@@ -42,7 +44,6 @@ class PineScriptStrategy(BaseStrategy):
         self.max_history = 50
         
         # Enhanced monitoring
-        self.last_analysis_log = datetime.now()
         self.analysis_log_interval = 180  # Log detailed analysis every 3 minutes
         self.signal_attempts = 0
         self.last_signal_time = None
@@ -59,9 +60,9 @@ class PineScriptStrategy(BaseStrategy):
             self.ha_candles_history = self.ha_candles_history[-self.max_history:]
         
         # Log candle addition
-        self.logger.debug(f"Added HA candle: O:{ha_candle.get('ha_open', 0):.2f} "
-                         f"H:{ha_candle.get('ha_high', 0):.2f} L:{ha_candle.get('ha_low', 0):.2f} "
-                         f"C:{ha_candle.get('ha_close', 0):.2f} | Total: {len(self.ha_candles_history)}")
+        self.hot.debug('add_candle', "Added HA candle: O:%.2f H:%.2f L:%.2f C:%.2f | Total: %d",
+                       ha_candle.get('ha_open', 0), ha_candle.get('ha_high', 0),
+                       ha_candle.get('ha_low', 0), ha_candle.get('ha_close', 0), len(self.ha_candles_history))
     
     def calculate_trend_line(self, candles: List[Dict]) -> Optional[float]:
         """Calculate trend line: (EMA9 + SMA9) / 2"""
@@ -218,10 +219,8 @@ class PineScriptStrategy(BaseStrategy):
             
             # Need enough data for calculations
             if len(self.ha_candles_history) < self.adx_length + 1:
-                current_time = datetime.now()
-                if (current_time - self.last_analysis_log).total_seconds() > 60:  # Log every minute
-                    self.logger.info(f"🔄 Building data: {len(self.ha_candles_history)}/{self.adx_length + 1} HA candles required")
-                    self.last_analysis_log = current_time
+                self.hot.info('building_data', "🔄 Building data: %d/%d HA candles required",
+                              len(self.ha_candles_history), self.adx_length + 1, every=60)
                 return None
             
             # Check if already in trade
@@ -253,8 +252,7 @@ class PineScriptStrategy(BaseStrategy):
             trend_ok = adx > self.adx_threshold
             
             # Enhanced analysis logging
-            current_time = datetime.now()
-            if (current_time - self.last_analysis_log).total_seconds() > self.analysis_log_interval:
+            if self.hot.enabled('entry_analysis', every=self.analysis_log_interval):
                 self.logger.info(f"🎯 Pine Script Entry Analysis:")
                 self.logger.info(f"   💰 Current Price: Rs.{current_price:.2f}")
                 self.logger.info(f"   📈 Trend Line: Rs.{trend_line:.2f} (Diff: {price_diff:+.2f} | {price_diff_pct:+.2f}%)")
@@ -274,8 +272,6 @@ class PineScriptStrategy(BaseStrategy):
                 
                 self.logger.info(f"   ✅ Met: {', '.join(met) if met else 'None'}")
                 self.logger.info(f"   ⏳ Missing: {', '.join(missing) if missing else 'All conditions met!'}")
-                
-                self.last_analysis_log = current_time
             
             # Buy condition: price above trend + strong green + ADX > threshold
             buy_condition = price_above and strong_green and trend_ok
@@ -295,11 +291,11 @@ class PineScriptStrategy(BaseStrategy):
                 self.logger.info(f"   🟢 Strong Green Candle: {body_pct:.1%} body (>{self.strong_candle_threshold:.0%})")
                 self.logger.info(f"   📊 ADX: {adx:.2f} (>{self.adx_threshold}) | +DI: {plus_di:.2f} | -DI: {minus_di:.2f}")
                 self.logger.info(f"   🎯 Position: {lots} lots | Investment: Rs.{total_investment:,.2f}")
-                self.logger.info(f"   ⏰ Signal Time: {datetime.now().strftime('%I:%M:%S %p')}")
+                self.logger.info(f"   ⏰ Signal Time: {self.clock().strftime('%I:%M:%S %p')}")
                 
                 # Set trade state
                 self.in_trade = True
-                self.last_signal_time = datetime.now()
+                self.last_signal_time = self.clock()
                 
                 # Ensure symbol and instrument_key are strings
                 symbol = str(market_data.get('symbol', 'UNKNOWN'))
@@ -378,7 +374,7 @@ class PineScriptStrategy(BaseStrategy):
                 
                 # Calculate trade duration if we have entry time
                 if self.last_signal_time:
-                    duration = datetime.now() - self.last_signal_time
+                    duration = self.clock() - self.last_signal_time
                     duration_minutes = int(duration.total_seconds() / 60)
                     self.logger.info(f"   ⏱️ Trade Duration: {duration_minutes} minutes")
                 
@@ -424,6 +420,7 @@ class PineScriptStrategy(BaseStrategy):
             self.logger.info(f"📈 ENTRY FILLED: {order.symbol} @ Rs.{order.filled_price}")
         else:
             self.logger.info(f"📉 EXIT FILLED: {order.symbol} @ Rs.{order.filled_price}")
+            self.in_trade = False
             
             # Calculate P&L for the trade (simplified)
             if order.filled_price and len(self.ha_candles_history) > 0:
@@ -436,6 +433,11 @@ class PineScriptStrategy(BaseStrategy):
                 pnl = (filled_price - entry_price) * quantity * 75  # 75 shares per lot
                 self.logger.info(f"💰 Trade P&L: Rs.{pnl:.2f}")
     
+    async def on_entry_dropped(self, order: Order):
+        """Clear the trade flag set by the dropped entry so the next signal can enter"""
+        await super().on_entry_dropped(order)
+        self.in_trade = False
+    
     async def on_error(self, error: Exception):
         """Enhanced error handling"""
         self.logger.error(f"PineScript Strategy Error: {error}")
@@ -1,15 +1,25 @@
 # ==================== src/trading_bot.py (COMPLETELY FIXED) ====================
 import asyncio
 import logging
-from datetime import datetime, time
-from typing import Dict, List, Optional
+from datetime import datetime, time, timedelta
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
 from config.settings import Settings
 from src.upstox_client import UpstoxClient
 from src.utils.notification import TelegramNotifier
 from src.strategy.base_strategy import BaseStrategy
+from src.strategy.dispatcher import StrategyDispatcher
 from src.models.order import Order, OrderStatus, OrderType, TransactionType
 from src.models.position import Position
+from src.models.position_book import PositionBook
+from src.models.order_book import OrderBook
 from src.utils.market_utils import MarketUtils
+from src.utils.indicators import candles_to_columns
+from src.utils.option_pricing import OptionPremiumModel
+from src.utils.rate_limiter import standard_limits
+from src.utils.hot_log import get_hot_logger, log_suppressed_summaries
+from src.utils.metrics import MetricsServer, metrics
+from src.utils import startup, tracing
 
 # Import websocket manager
 try:
@@ -17,25 +27,45 @@ try:
     WEBSOCKET_AVAILABLE = True
 except ImportError:
     WEBSOCKET_AVAILABLE = False
+
+# NIFTY option lot size; quantities are in lots
+LOT_SIZE = 75
+
 class TradingBot:
     """Enhanced trading bot with comprehensive monitoring and auto-reconnection"""
     
     def __init__(self, settings: Settings):
         self.settings = settings
         self.logger = logging.getLogger(__name__)
+        self.hot = get_hot_logger(__name__)
         self.trading_logger = logging.getLogger('trading')
         
         # Initialize clients
         self.upstox_client = UpstoxClient(
             settings.upstox_api_key,
             settings.upstox_api_secret,
-            settings.upstox_redirect_uri
+            settings.upstox_redirect_uri,
+            pool_size=settings.upstox_pool_size,
+            keepalive_timeout=settings.upstox_keepalive_timeout,
+            dns_cache_ttl=settings.upstox_dns_cache_ttl,
+            request_timeout=settings.upstox_request_timeout,
+            connect_timeout=settings.upstox_connect_timeout,
+            rate_limits=standard_limits(
+                settings.upstox_rate_per_second,
+                settings.upstox_rate_per_minute,
+                settings.upstox_rate_per_30_minutes
+            ),
+            quote_ttl=settings.upstox_quote_ttl,
+            api_host=settings.upstox_api_host
         )
         
         self.notifier = TelegramNotifier(
             settings.telegram_bot_token,
             settings.telegram_chat_id,
-            settings.enable_notifications
+            settings.enable_notifications,
+            outbox_size=settings.telegram_outbox_size,
+            max_retries=settings.telegram_max_retries,
+            coalesce_window=settings.telegram_coalesce_seconds
         )
         
         # Initialize WebSocket Manager
@@ -44,11 +74,21 @@ class TradingBot:
         
         # Trading state
         self.strategies: List[BaseStrategy] = []
-        self.positions: Dict[str, Position] = {}
-        self.orders: List[Order] = []
+        self.positions = PositionBook(multiplier=LOT_SIZE)
+        self.orders = OrderBook(settings.data_dir / "orders" / f"orders_{datetime.now():%Y%m%d}.jsonl")
         self.is_running = False
         self.paper_trading = settings.paper_trading
         
+        # Paper CE/PE orders fill at synthetic premiums of the contract each position holds
+        self.option_model: Optional[OptionPremiumModel] = None
+        if settings.paper_option_pricing:
+            self.option_model = OptionPremiumModel(settings.option_strike_step, settings.option_iv,
+                                                   expiry_weekday=settings.option_expiry_weekday)
+        self.contracts: Dict[str, Dict] = {}
+        
+        # Clock used on the trade path - replaced by a simulated clock in backtests
+        self.clock: Callable[[], datetime] = datetime.now
+        
         # Real-time data
         self.latest_ticks: Dict[str, Dict] = {}
         self.latest_candles: Dict[str, Dict] = {}
@@ -72,6 +112,25 @@ class TradingBot:
         self.signal_analysis_interval = 180  # Detailed analysis every 3 minutes
         self.telegram_update_interval = 3600  # Telegram update every hour
         
+        # Concurrent strategy evaluation with per-strategy deadlines
+        self.dispatcher = StrategyDispatcher(settings.strategy_deadline_ms / 1000)
+        
+        # Prometheus endpoint (port 8000 in docker-compose); queue depths are read at scrape time
+        self.metrics_server = MetricsServer(settings.metrics_host, settings.metrics_port) if settings.metrics_enabled else None
+        
+        # The profiler costs nothing until a session starts, so SIGUSR1 always toggles it;
+        # profiling_enabled only exposes the HTTP controls
+        from src.utils.profiling import Profiler
+        self.profiler = Profiler(settings.data_dir / "profiles", settings.profiling_seconds, settings.profiling_mode)
+        if settings.profiling_enabled and self.metrics_server:
+            self.metrics_server.add_routes(self.profiler.control_routes(settings.profiling_token or None))
+        metrics.register_gauge('trading_notification_outbox', 'Telegram messages waiting to be sent',
+                               lambda: self.notifier.pending)
+        metrics.register_gauge('trading_live_orders', 'Orders tracked in the order book', lambda: len(self.orders))
+        metrics.register_gauge('trading_open_positions', 'Open paper/live positions', lambda: len(self.positions))
+        metrics.register_gauge('upstox_requests_waiting', 'Requests queued by the rate limiter',
+                               lambda: self.upstox_client.scheduler.waiting)
+        
         # Default instruments to subscribe
         self.default_instruments = [
             'NSE_INDEX|Nifty 50',
@@ -89,7 +148,9 @@ class TradingBot:
                 return
         
             # 2. LOG THE NEW CANDLE
-            self.logger.info(f"NEW HA CANDLE - {symbol}: O:{ha_candle.get('ha_open', 0):.2f} H:{ha_candle.get('ha_high', 0):.2f} L:{ha_candle.get('ha_low', 0):.2f} C:{ha_candle.get('ha_close', 0):.2f}")
+            self.hot.info('new_ha_candle', "NEW HA CANDLE - %s: O:%.2f H:%.2f L:%.2f C:%.2f", symbol,
+                          ha_candle.get('ha_open', 0), ha_candle.get('ha_high', 0),
+                          ha_candle.get('ha_low', 0), ha_candle.get('ha_close', 0))
         
             # 3. GET CANDLE HISTORY (simplified logic)
             ha_candles = ha_candle.get('candle_history', [])
@@ -105,11 +166,12 @@ class TradingBot:
         
             # 4. CHECK IF WE HAVE ENOUGH CANDLES
             if candle_count < 15:
-                self.logger.info(f"Progress: {symbol} has {candle_count}/15 candles | Need {15-candle_count} more")
+                self.hot.info('candle_progress', "Progress: %s has %d/15 candles | Need %d more",
+                              symbol, candle_count, 15 - candle_count)
                 return
         
             # 5. 🚀 WE HAVE ENOUGH CANDLES - EXECUTE STRATEGIES!
-            self.logger.info(f"STRATEGY READY - {symbol} has {candle_count} candles - EXECUTING ANALYSIS...")
+            self.hot.info('strategy_ready', "STRATEGY READY - %s has %d candles - EXECUTING ANALYSIS...", symbol, candle_count)
         
             # 6. CALL THE SEPARATE STRATEGY EXECUTION METHOD
             await self._execute_strategies_on_ha_candle(symbol, ha_candle, ha_candles)
@@ -122,7 +184,7 @@ class TradingBot:
     async def _execute_strategies_on_ha_candle(self, symbol: str, ha_candle: Dict, ha_candles: List[Dict]):
         """🚨 SEPARATED: Execute all strategies when HA candle is received"""  
         try:
-            self.logger.info(f"EXECUTING STRATEGIES for {symbol}")
+            self.hot.debug('executing', "EXECUTING STRATEGIES for %s", symbol)
         
             # Prepare comprehensive market data
             market_data = {
@@ -131,7 +193,7 @@ class TradingBot:
                 'ha_candles_history': ha_candles,
                 'instrument_key': 'NSE_INDEX|Nifty 50',
                 'current_price': ha_candle.get('ha_close', 0),
-                'timestamp': datetime.now(),
+                'timestamp': self.clock(),
                 # Add compatibility fields
                 'price': ha_candle.get('ha_close', 0),
                 'high': ha_candle.get('ha_high', 0),
@@ -141,72 +203,38 @@ class TradingBot:
                 'close': ha_candle.get('ha_close', 0)
             }
         
-            self.logger.info(f" Market Data: Price={market_data['current_price']:.2f}, Candles={len(ha_candles)}")
+            self.hot.info('market_data', " Market Data: Price=%.2f, Candles=%d", market_data['current_price'], len(ha_candles))
         
-            # Process each strategy
-            strategy_count = len(self.strategies)
-            self.logger.info(f" Processing {strategy_count} strategies...")
-        
-            for i, strategy in enumerate(self.strategies):
-                if not strategy.is_active:
-                    self.logger.warning(f" Strategy {i+1}/{strategy_count} ({strategy.name}) is INACTIVE")
-                    continue
-                
-                try:
-                    self.logger.info(f" Analyzing strategy {i+1}/{strategy_count}: {strategy.name}")
-                
-                    # 🚨 ENTRY SIGNAL CHECK 🚨
-                    entry_order = await strategy.should_enter(market_data)
-                    if entry_order:
-                        option_type = getattr(entry_order, 'option_type', 'CE')
-                        self.logger.info(f" *** ENTRY SIGNAL *** {option_type} from {strategy.name}")
-                        self.logger.info(f"    Price: Rs.{entry_order.price:.2f} | Quantity: {entry_order.quantity}")
-                    
-                        # Place order
-                        if await self.place_order(entry_order):
-                            self.orders.append(entry_order)
-                            await strategy.on_order_filled(entry_order)
-                            await self.send_trade_notification(entry_order, "ENTRY")
-                            self.logger.info(f"Entry order executed successfully")
-                        else:
-                            self.logger.error(f"Failed to place entry order")
-                    else:
-                        self.logger.info(f"No entry signal from {strategy.name}")
-                
-                    # 🚨 EXIT SIGNAL CHECK 🚨
-                    positions_for_symbol = [pos for pos in self.positions.values() if pos.symbol == symbol]
-                
-                    if positions_for_symbol:
-                        self.logger.info(f"Checking {len(positions_for_symbol)} positions for exit...")
-                    
-                        for j, position in enumerate(positions_for_symbol):
-                            exit_order = await strategy.should_exit(position, market_data)
-                            if exit_order:
-                                option_type = getattr(exit_order, 'option_type', 'CE')
-                                self.logger.info(f"*** EXIT SIGNAL *** {option_type} from {strategy.name}")
-                            
-                                if await self.place_order(exit_order):
-                                    self.orders.append(exit_order)
-                                    await strategy.on_order_filled(exit_order)
-                                    await self.send_trade_notification(exit_order, "EXIT")
-                                
-                                    # Remove position if fully closed
-                                    position_key = f"{position.symbol}_{position.instrument_key}"
-                                    if position_key in self.positions:
-                                        if exit_order.quantity >= position.quantity:
-                                            del self.positions[position_key]
-                                            self.logger.info(f"Position fully closed: {position_key}")
-                            else:
-                                self.logger.info(f"No exit signal for position {j+1}")
-                    else:
-                        self.logger.debug(f"No positions to check for {symbol}")
-                
-                except Exception as strategy_error:
-                    self.logger.error(f"Error in strategy {strategy.name}: {strategy_error}")
-                    import traceback
-                    self.logger.error(f"Strategy error details: {traceback.format_exc()}")
-        
-            self.logger.info(f"Strategy execution completed for {symbol}")
+            # Evaluate all active strategies concurrently
+            started = perf_counter()
+            strategies = self.active_strategies()
+            self.hot.debug('processing', " Processing %d/%d active strategies...", len(strategies), len(self.strategies))
+
+            columns = {}
+            with tracing.follow(ha_candle.pop('trace', None)):
+                outcome = await self.dispatcher.dispatch(
+                    strategies,
+                    lambda strategy: self.with_batch_signals(strategy, market_data, ha_candles, columns),
+                    lambda strategy: self.positions.for_symbol(symbol)
+                )
+                metrics.candle_to_signal.observe(perf_counter() - ha_candle.get('ready_at', started))
+                tracing.mark('strategy_decision')
+
+                for result in outcome.results:
+                    if result.entry_order:
+                        option_type = getattr(result.entry_order, 'option_type', 'CE')
+                        self.logger.info(f" *** ENTRY SIGNAL *** {option_type} from {result.strategy.name}")
+                        self.logger.info(f"    Price: Rs.{result.entry_order.price:.2f} | Quantity: {result.entry_order.quantity}")
+                    elif not result.late:
+                        self.hot.info('no_entry', "No entry signal from %s", result.strategy.name)
+                    for _, _, exit_order in result.exit_orders:
+                        option_type = getattr(exit_order, 'option_type', 'CE')
+                        self.logger.info(f"*** EXIT SIGNAL *** {option_type} from {result.strategy.name}")
+
+                # Place every order together so the last strategy's order isn't queued behind the first
+                await self.dispatcher.submit(outcome, self._submit_entry_order, self._submit_exit_order)
+
+            self.hot.debug('execution_completed', "Strategy execution completed for %s", symbol)
                 
         except Exception as e:
             self.logger.error(f"Critical error executing strategies: {e}")
@@ -217,12 +245,13 @@ class TradingBot:
             
     def add_strategy(self, strategy: BaseStrategy):
         """Add a trading strategy"""
+        strategy.clock = self.clock
         self.strategies.append(strategy)
         self.logger.info(f"Added strategy: {strategy.name}")
     
     def is_market_open(self) -> bool:
         """Check if market is open"""
-        return MarketUtils.is_market_open()
+        return MarketUtils.is_market_open(self.clock())
     
     async def setup_websockets(self):
         """Setup websocket connections for real-time data"""
@@ -238,7 +267,8 @@ class TradingBot:
             # Initialize WebSocket Manager
             self.websocket_manager = WebSocketManager(
                 api_key=self.settings.upstox_api_key,
-                access_token=self.upstox_client.access_token
+                access_token=self.upstox_client.access_token,
+                api_host=self.settings.upstox_api_host
             )
             
             # Set up callbacks with enhanced error handling
@@ -285,7 +315,7 @@ class TradingBot:
             symbol = self._extract_symbol_from_key(instrument_key)
             
             # Add timestamp for monitoring
-            tick_data['timestamp'] = datetime.now()
+            tick_data['timestamp'] = self.clock()
             tick_data['price'] = tick_data.get('ltp', 0)
             
             # Store latest tick
@@ -335,7 +365,17 @@ class TradingBot:
     async def on_order_update_received(self, order_update: Dict):
         """Handle order status updates"""
         try:
-            self.trading_logger.info(f"Order update: {order_update}")
+            order = self.orders.apply_update(order_update)
+            if order:
+                self.trading_logger.info(f"Order {order.order_id} ({order.broker_order_id}): {order.status.value} "
+                                         f"{order.filled_quantity or 0}/{order.quantity} @ {order.filled_price or 0}")
+                if order.status == OrderStatus.REJECTED:
+                    reason = order_update.get('status_message') if isinstance(order_update, dict) else None
+                    await self.notifier.send_error_alert(
+                        f"Order {order.order_id} for {order.symbol} rejected: {reason or 'no reason given'}"
+                    )
+            else:
+                self.logger.debug(f"Order update ignored: {order_update}")
         except Exception as e:
             self.logger.error(f"Error processing order update: {e}")
     
@@ -388,7 +428,7 @@ class TradingBot:
     async def check_websocket_health(self):
         """Monitor WebSocket health and auto-reconnect if needed"""
         try:
-            current_time = datetime.now()
+            current_time = self.clock()
         
             # Check every 5 minutes
             if (current_time - self.last_websocket_check).total_seconds() < 300:
@@ -463,7 +503,7 @@ class TradingBot:
     async def log_market_status_with_analysis(self):
         """Enhanced market status logging with candle countdown"""
         try:
-            current_time = datetime.now()
+            current_time = self.clock()
         
             # Log status every 30 seconds
             if (current_time - self.last_price_update).total_seconds() >= 30:
@@ -656,34 +696,51 @@ class TradingBot:
             if not self.is_market_open():
                 return
                 
-            for strategy in self.strategies:
-                if not strategy.is_active:
-                    continue
-                    
-                # Prepare market data with HA candle for Pine Script strategy
-                market_data = self.prepare_market_data_for_strategy(symbol, ha_candle)
-                
-                # Check for entry signals
-                entry_order = await strategy.should_enter(market_data)
-                if entry_order:
-                    if await self.place_order(entry_order):
-                        self.orders.append(entry_order)
-                        await strategy.on_order_filled(entry_order)
-                
-                # Check for exit signals on existing positions
-                for position_key, position in list(self.positions.items()):
-                    if position.symbol == symbol:
-                        exit_order = await strategy.should_exit(position, market_data)
-                        if exit_order:
-                            if await self.place_order(exit_order):
-                                self.orders.append(exit_order)
-                                await strategy.on_order_filled(exit_order)
-                                if exit_order.quantity >= position.quantity:
-                                    del self.positions[position_key]
+            started = perf_counter()
+            market_data = self.prepare_market_data_for_strategy(symbol, ha_candle)
+            columns = {}
+            with tracing.follow(ha_candle.pop('trace', None)):
+                outcome = await self.dispatcher.dispatch(
+                    self.active_strategies(),
+                    lambda strategy: self.with_batch_signals(strategy, market_data, market_data['historical_ha_candles'], columns),
+                    lambda strategy: self.positions.for_symbol(symbol)
+                )
+                metrics.candle_to_signal.observe(perf_counter() - ha_candle.get('ready_at', started))
+                tracing.mark('strategy_decision')
+                await self.dispatcher.submit(outcome, self._submit_entry_order, self._submit_exit_order)
                                     
         except Exception as e:
             self.logger.error(f"Error evaluating strategies: {e}")
     
+    def active_strategies(self) -> List[BaseStrategy]:
+        """Strategies that should be evaluated on the next candle"""
+        return [strategy for strategy in self.strategies if strategy.is_active]
+
+    async def _submit_entry_order(self, strategy: BaseStrategy, order: Order) -> bool:
+        """Place an entry order produced by the dispatcher"""
+        if not await self.place_order(order):
+            self.logger.error(f"Failed to place entry order from {strategy.name}")
+            return False
+
+        self.orders.append(order)
+        await strategy.on_order_filled(order)
+        self.logger.info(f"Entry order executed successfully")
+        return True
+
+    async def _submit_exit_order(self, strategy: BaseStrategy, position_key: str, position: Position, order: Order) -> bool:
+        """Place an exit order produced by the dispatcher and drop the position once fully closed"""
+        if not await self.place_order(order):
+            self.logger.error(f"Failed to place exit order from {strategy.name}")
+            return False
+
+        self.orders.append(order)
+        await strategy.on_order_filled(order)
+        if order.quantity >= position.quantity:
+            self.contracts.pop(position_key, None)
+            if self.positions.pop(position_key, None):
+                self.logger.info(f"Position fully closed: {position_key}")
+        return True
+
     def prepare_market_data_for_strategy(self, symbol: str, ha_candle: Dict) -> Dict:
         """Prepare comprehensive market data for strategy evaluation"""
         
@@ -700,7 +757,7 @@ class TradingBot:
         
         market_data = {
             'symbol': symbol,
-            'timestamp': datetime.now(),
+            'timestamp': self.clock(),
             'price': ha_candle.get('ha_close', 0),
             'ha_candle': ha_candle,
             'current_tick': current_tick,
@@ -718,6 +775,46 @@ class TradingBot:
         
         return market_data
     
+    def with_batch_signals(self, strategy: BaseStrategy, market_data: Dict, ha_candles: List[Dict],
+                           columns: Optional[Dict[int, Dict]] = None) -> Dict:
+        """
+        Attach the latest candle's evaluate_batch signals for strategies that implement it
+
+        Falls back to the strategy's per-event path (market_data unchanged) when
+        the history is shorter than the strategy's batch window.
+
+        Args:
+            columns: Per-candle cache of converted windows keyed by length, so
+                strategies with the same window share one conversion
+        """
+        if not strategy.supports_batch or not ha_candles:
+            return market_data
+
+        # The window must end with the candle being evaluated
+        ha_candle = market_data.get('ha_candle')
+        if ha_candle is not None and ha_candles[-1] is not ha_candle:
+            if ha_candles[-1].get('timestamp') != ha_candle.get('timestamp'):
+                ha_candles = list(ha_candles) + [ha_candle]
+
+        if len(ha_candles) < strategy.batch_window:
+            return market_data
+
+        try:
+            size = min(strategy.batch_window or len(ha_candles), len(ha_candles))
+            window = columns.get(size) if columns is not None else None
+            if window is None:
+                window = candles_to_columns(ha_candles[-size:])
+                if columns is not None:
+                    columns[size] = window
+            signals = strategy.evaluate_batch(window)
+        except Exception as e:
+            self.logger.error(f"Batch evaluation failed for {strategy.name}: {e}")
+            return market_data
+
+        if not signals:
+            return market_data
+        return {**market_data, 'signals': strategy.signals_at(signals, -1)}
+
     def _extract_symbol_from_key(self, instrument_key: str) -> str:
         """Extract symbol from instrument key"""
         key_to_symbol = {
@@ -733,6 +830,9 @@ class TradingBot:
     async def authenticate(self):
         """Authenticate with Upstox"""
         
+        # One pooled session for the whole run - closed in run()'s cleanup
+        await self.upstox_client.open()
+        
         if self.upstox_client.access_token:
             self.logger.info("Found stored access token, testing...")
             
@@ -744,7 +844,8 @@ class TradingBot:
                 self.logger.info("Stored token is invalid, requesting new authentication")
         
         print(f"Please visit: {self.upstox_client.get_login_url()}")
-        auth_code = input("Enter the authorization code: ")
+        # Read in a thread so the other startup steps keep running while we wait
+        auth_code = await asyncio.to_thread(input, "Enter the authorization code: ")
         
         if await self.upstox_client.get_access_token(auth_code):
             self.logger.info("Successfully authenticated with Upstox")
@@ -758,21 +859,23 @@ class TradingBot:
     async def place_order(self, order: Order) -> bool:
         """Place an order with enhanced logging"""
         try:
+            tracing.mark('order_submit')
             if self.paper_trading:
                 # Enhanced paper trading simulation
                 order.status = OrderStatus.FILLED
-                order.filled_price = order.price
+                order.filled_price = self.paper_fill_price(order)
                 order.filled_quantity = order.quantity
-                order.order_id = f"PAPER_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                order.order_id = f"PAPER_{self.clock().strftime('%Y%m%d_%H%M%S')}"
+                tracing.mark('broker_ack')
                 
                 # Calculate investment details
-                lot_size = 75
-                total_investment = order.quantity * lot_size * order.price
+                lot_size = LOT_SIZE
+                total_investment = order.quantity * lot_size * order.filled_price
                 total_shares = order.quantity * lot_size
                 
                 self.trading_logger.info(
                     f"📋 PAPER TRADE - {order.transaction_type.value} {order.quantity} lots "
-                    f"({total_shares:,} shares) of {order.symbol} @ Rs.{order.price:.2f}"
+                    f"({total_shares:,} shares) of {order.symbol} @ Rs.{order.filled_price:.2f}"
                 )
                 self.trading_logger.info(f"💰 Total Investment: Rs.{total_investment:,.2f}")
                 
@@ -796,7 +899,7 @@ class TradingBot:
     async def send_enhanced_trade_notification(self, order: Order, total_investment: float):
         """Send enhanced trade notification via Telegram"""
         try:
-            lot_size = 75
+            lot_size = LOT_SIZE
             total_shares = order.quantity * lot_size
             current_capital = 20000 + self.total_pnl
             
@@ -809,7 +912,7 @@ class TradingBot:
 💰 *PAPER TRADE EXECUTED:*
 🔹 *Symbol:* {order.symbol}
 🔹 *Action:* BUY {order.quantity} lots ({total_shares:,} shares)
-🔹 *Price:* Rs.{order.price:.2f} per share
+🔹 *Price:* Rs.{order.filled_price:.2f} per share
 🔹 *Investment:* Rs.{total_investment:,.2f}
 
 📈 *Capital Management:*
@@ -827,28 +930,63 @@ class TradingBot:
         except Exception as e:
             self.logger.error(f"Error sending enhanced trade notification: {e}")
     
+    def paper_position_key(self, order: Order) -> str:
+        """Key of the paper position an order opens or closes"""
+        return f"{order.symbol}_{order.instrument_key or 'default'}"
+    
+    def paper_fill_price(self, order: Order) -> float:
+        """
+        Paper fill price - the premium of the traded option contract when pricing options
+        
+        Entries buy the ATM contract on the nearest expiry; adds and exits trade
+        the contract the position already holds.
+        """
+        if self.option_model is None:
+            return order.price
+        
+        tick = self.latest_ticks.get(order.symbol)
+        spot = float(tick['ltp']) if tick and tick.get('ltp') is not None else order.price
+        
+        position_key = self.paper_position_key(order)
+        contract = self.contracts.get(position_key)
+        if contract is None:
+            if order.transaction_type == TransactionType.SELL:
+                return order.price
+            contract = self.contracts[position_key] = {
+                'option_type': order.option_type,
+                'strike': float(self.option_model.atm_strikes(spot)),
+                'expiry': self.option_model.expiries_for([self.clock()])[0]
+            }
+        
+        return self.contract_price(contract, spot)
+    
+    def contract_price(self, contract: Dict, spot: float) -> float:
+        """Current premium of a held contract"""
+        return self.option_model.contract_premium(
+            self.clock(), spot, contract['strike'], contract['expiry'], contract['option_type']
+        )
+    
     async def update_paper_positions(self, order: Order):
         """Update paper trading positions with tracking"""
         try:
-            position_key = f"{order.symbol}_{order.instrument_key or 'default'}"
+            position_key = self.paper_position_key(order)
             
             if order.transaction_type == TransactionType.BUY:
-                entry_time = datetime.now()
+                entry_time = self.clock()
                 
                 if position_key in self.positions:
                     existing = self.positions[position_key]
                     total_quantity = existing.quantity + order.quantity
-                    total_cost = (existing.quantity * existing.average_price) + (order.quantity * order.price)
+                    total_cost = (existing.quantity * existing.average_price) + (order.quantity * order.filled_price)
                     new_avg_price = total_cost / total_quantity
                     
-                    existing.quantity = total_quantity
-                    existing.average_price = new_avg_price
+                    self.positions.resize(position_key, total_quantity, new_avg_price)
                 else:
                     position = Position(
                         symbol=order.symbol,
                         quantity=order.quantity,
-                        average_price=order.price,
-                        current_price=order.price,
+                        average_price=order.filled_price,
+                        current_price=order.filled_price,
                         pnl=0,
                         unrealized_pnl=0,
                         instrument_key=order.instrument_key or 'default'
@@ -859,13 +997,13 @@ class TradingBot:
             elif order.transaction_type == TransactionType.SELL:
                 if position_key in self.positions:
                     existing = self.positions[position_key]
-                    entry_time = getattr(existing, 'entry_time', datetime.now())
-                    exit_time = datetime.now()
+                    entry_time = getattr(existing, 'entry_time', self.clock())
+                    exit_time = self.clock()
                     
                     if order.quantity >= existing.quantity:
                         # Close position completely
-                        lot_size = 75
-                        pnl = (order.price - existing.average_price) * existing.quantity * lot_size
+                        lot_size = LOT_SIZE
+                        pnl = (order.filled_price - existing.average_price) * existing.quantity * lot_size
                         
                         # Update statistics
                         self.total_pnl += pnl
@@ -881,13 +1019,14 @@ class TradingBot:
                         
                         # Send P&L notification
                         await self.send_pnl_notification(order.symbol, pnl, existing.average_price, 
-                                                       order.price, existing.quantity, entry_time, exit_time)
+                                                       order.filled_price, existing.quantity, entry_time, exit_time)
                         
                         del self.positions[position_key]
+                        self.contracts.pop(position_key, None)
                         self.trading_logger.info(f"Position closed: {order.symbol} P&L: Rs.{pnl:.2f}")
                     else:
                         # Partial close
-                        existing.quantity -= order.quantity
+                        self.positions.resize(position_key, existing.quantity - order.quantity)
                         
         except Exception as e:
             self.logger.error(f"Error updating paper positions: {e}")
@@ -896,7 +1035,7 @@ class TradingBot:
                                   exit_price: float, quantity: int, entry_time: datetime, exit_time: datetime):
         """Send comprehensive P&L notification"""
         try:
-            lot_size = 75
+            lot_size = LOT_SIZE
             total_shares = quantity * lot_size
             trade_value = entry_price * total_shares
             pnl_pct = (pnl / trade_value) * 100 if trade_value > 0 else 0
@@ -954,30 +1093,102 @@ class TradingBot:
                 # Real positions update would go here
                 pass
             else:
-                # Update paper positions with current market prices
-                for position_key, position in self.positions.items():
-                    symbol = position.symbol
-                    if symbol in self.latest_ticks:
-                        current_price = float(self.latest_ticks[symbol].get('ltp', position.current_price))
-                        position.current_price = current_price
-                        position.unrealized_pnl = (current_price - position.average_price) * position.quantity
+                # Mark paper positions to current market prices, one symbol at a time
+                for symbol in self.positions.symbols():
+                    tick = self.latest_ticks.get(symbol)
+                    if not tick or tick.get('ltp') is None:
+                        continue
+                    
+                    spot = float(tick['ltp'])
+                    if self.option_model is None:
+                        self.positions.mark(symbol, spot)
+                        continue
+                    
+                    # Option positions are marked to the premium of the contract they hold
+                    for position_key, position in self.positions.for_symbol(symbol):
+                        contract = self.contracts.get(position_key)
+                        self.positions.mark_position(position_key, self.contract_price(contract, spot) if contract else spot)
                 
         except Exception as e:
             self.logger.error(f"Error updating positions: {e}")
     
+    def setup_default_strategies(self):
+        """Add the Pine Script strategy when none were configured"""
+        if not self.strategies:
+            from src.strategy.pine_script_strategy import PineScriptStrategy
+            pine_strategy = PineScriptStrategy("dhana_pine_script_strategy", {
+                'adx_length': 14,
+                'adx_threshold': 20,
+                'strong_candle_threshold': 0.6,
+                'max_positions': 1,
+                'total_capital': 20000,
+                'max_risk_pct': 0.75,
+                'risk_per_trade': 15000
+            })
+            self.add_strategy(pine_strategy)
+    
+    async def prime_latest_ticks(self) -> bool:
+        """Seed latest prices with one batched quote request, before the first websocket tick"""
+        return await self.refresh_quotes()
+    
+    async def refresh_quotes(self) -> bool:
+        """
+        Refresh latest prices for every subscribed instrument with one batched quote request
+
+        Quotes are counted in trading_rest_quotes_total; trading_ticks_total
+        only counts feed ticks (in the websocket handler).
+        """
+        quotes = await self.upstox_client.get_quotes(self.default_instruments)
+        for instrument_key, quote in quotes.items():
+            metrics.quotes.inc(self._extract_symbol_from_key(instrument_key))
+            await self.on_tick_received({
+                'instrument_key': instrument_key,
+                'ltp': quote.get('last_price', 0),
+                'volume': quote.get('volume', 0)
+            })
+        return bool(quotes)
+    
+    def build_startup_graph(self) -> startup.StartupGraph:
+        """Startup steps; independent ones overlap and only authentication is required to carry on"""
+        graph = startup.StartupGraph()
+        graph.add('http_pool', self.upstox_client.open)
+        graph.add('authenticate', self.authenticate, after=['http_pool'], required=True)
+        graph.add('http_warm_up', self.upstox_client.warm_up, after=['http_pool'])
+        if self.metrics_server:
+            graph.add('metrics_server', self.metrics_server.start)
+        if self.notifier.enabled:
+            graph.add('notifier', self.notifier.open)
+        # numpy/pandas load off the loop so the first candle doesn't pay for them
+        graph.add('deferred_imports', lambda: asyncio.to_thread(startup.load_deferred))
+        graph.add('strategies', self.setup_default_strategies, after=['deferred_imports'])
+        # Ticks start flowing once streams are up, so the strategies must be in place first
+        graph.add('websockets', self.setup_websockets, after=['authenticate', 'deferred_imports', 'strategies'])
+        graph.add('prime_quotes', self.prime_latest_ticks, after=['authenticate'])
+        return graph
+    
     async def run(self):
         """Enhanced main bot execution loop"""
         self.logger.info("Starting enhanced trading bot...")
         
-        # Store session start price for reference
-        await asyncio.sleep(1)  # Small delay to ensure everything is initialized
+        self.profiler.install_signal_handler()
+        if self.settings.trace_enabled:
+            extension = 'json' if self.settings.trace_format == 'chrome' else 'jsonl'
+            tracing.configure_tracing(
+                self.settings.data_dir / "traces" / f"trace_{datetime.now():%Y%m%d_%H%M%S}.{extension}",
+                self.settings.trace_sample_rate,
+                self.settings.trace_format
+            )
+        
+        startup.mark("ready to authenticate")
         
-        # Authenticate
-        if not await self.authenticate():
+        graph = self.build_startup_graph()
+        if not await graph.run():
+            await self.cleanup()
             return
         
-        # Setup websockets
-        websocket_success = await self.setup_websockets()
+        websocket_success = graph.results.get('websockets') is True
+        startup.mark("trading ready")
+        startup.log_report()
         
         # Send enhanced startup notification
         startup_message = f"""🚀 *AstraRise Trading Bot Started*
@@ -1008,20 +1219,6 @@ Bot is ready for market action! 💪"""
         
         await self.notifier.send_message(startup_message)
         
-        # Add Pine Script strategy
-        if not self.strategies:
-            from src.strategy.pine_script_strategy import PineScriptStrategy
-            pine_strategy = PineScriptStrategy("dhana_pine_script_strategy", {
-                'adx_length': 14,
-                'adx_threshold': 20,
-                'strong_candle_threshold': 0.6,
-                'max_positions': 1,
-                'total_capital': 20000,
-                'max_risk_pct': 0.75,
-                'risk_per_trade': 15000
-            })
-            self.add_strategy(pine_strategy)
-        
         # Store initial NIFTY price for session tracking
         if "NIFTY" in self.latest_ticks:
             self.session_start_price = self.latest_ticks['NIFTY'].get('ltp', 0)
@@ -1031,6 +1228,9 @@ Bot is ready for market action! 💪"""
         try:
             while self.is_running:
                 if self.is_market_open():
+                    # Keep an order connection open so placement doesn't pay connection setup
+                    await self.upstox_client.keep_warm()
+                    
                     # Enhanced monitoring during market hours
                     await self.check_websocket_health()
                     await self.log_market_status_with_analysis()
@@ -1045,8 +1245,13 @@ Bot is ready for market action! 💪"""
                     await asyncio.sleep(30)
                 else:
                     self.logger.info("Market closed, waiting...")
+                    log_suppressed_summaries()
                     await asyncio.sleep(300)
                     
+                    # Warm the API connections on the last wait before the open
+                    if MarketUtils.is_market_open(self.clock() + timedelta(minutes=5)):
+                        await self.upstox_client.warm_up()
+                    
         except KeyboardInterrupt:
             self.logger.info("Bot stopped by user")
             
@@ -1066,21 +1271,34 @@ Bot is ready for market action! 💪"""
 
 Thanks for testing! See you tomorrow! 👋"""
             
-            await self.notifier.send_message(shutdown_message)
-            await self.notifier.send_status_update("Stopped", "Bot stopped by user")
+            await self.notifier.send_message(shutdown_message, critical=True)
+            await self.notifier.send_status_update("Stopped", "Bot stopped by user", critical=True)
             
         except Exception as e:
             self.logger.error(f"Bot error: {e}")
             await self.notifier.send_error_alert(f"Bot crashed: {str(e)}")
         finally:
-            # Cleanup
-            if self.websocket_manager:
-                self.websocket_manager.stop_all_streams()
-            self.is_running = False
-            self.logger.info("Enhanced trading bot stopped")
+            await self.cleanup()
+    
+    async def cleanup(self):
+        """Release connections and flush journals, traces and profiles; used on shutdown and failed startup"""
+        if self.websocket_manager:
+            self.websocket_manager.stop_all_streams()
+        await self.notifier.close()
+        await self.upstox_client.close()
+        self.orders.flush()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        tracing.tracer.flush()
+        await self.profiler.stop_async()
+        log_suppressed_summaries()
+        self.is_running = False
+        self.logger.info("Enhanced trading bot stopped")
     
     async def run_strategies_with_rest_api(self):
         """Fallback method using REST API when websockets fail"""
+        await self.refresh_quotes()
+        
         for strategy in self.strategies:
             if not strategy.is_active:
                 continue
@@ -1090,7 +1308,7 @@ Thanks for testing! See you tomorrow! 👋"""
                 market_data = {
                     'symbol': 'FALLBACK',
                     'price': 0,
-                    'timestamp': datetime.now()
+                    'timestamp': self.clock()
                 }
                 
                 # Check for entry signals
@@ -1164,68 +1382,69 @@ class MultiStrategyTradingBot(TradingBot):  # Extend your existing TradingBot
                 return
             
             # Prepare market data
+            started = perf_counter()
             market_data = self.prepare_market_data_for_strategy(symbol, ha_candle)
             
-            # Process each strategy
-            for strategy in self.strategies:
-                if not strategy.is_active:
-                    continue
-                
-                try:
-                    # Check for entry signals
-                    entry_order = await strategy.should_enter(market_data)
-                    if entry_order:
-                        if await self.place_enhanced_order(entry_order):
-                            self.orders.append(entry_order)
-                            await strategy.on_order_filled(entry_order)
-                            
-                            # Send strategy-specific notification
-                            await self.send_multi_strategy_notification(entry_order, "ENTRY")
-                    
-                    # Check for exit signals on existing positions
-                    for position_key, position in list(self.positions.items()):
-                        # Only check positions belonging to this strategy
-                        if getattr(position, 'strategy_name', '') == strategy.name:
-                            exit_order = await strategy.should_exit(position, market_data)
-                            if exit_order:
-                                if await self.place_enhanced_order(exit_order):
-                                    self.orders.append(exit_order)
-                                    await strategy.on_order_filled(exit_order)
-                                    
-                                    # Update performance tracking
-                                    await self.update_strategy_performance(exit_order, position)
-                                    
-                                    # Send exit notification
-                                    await self.send_multi_strategy_notification(exit_order, "EXIT")
-                                    
-                                    # Remove closed position
-                                    if exit_order.quantity >= position.quantity:
-                                        del self.positions[position_key]
-                
-                except Exception as e:
-                    self.logger.error(f"Error processing strategy {strategy.name}: {e}")
+            # Evaluate all strategies concurrently - each only exits its own positions
+            columns = {}
+            with tracing.follow(ha_candle.pop('trace', None)):
+                outcome = await self.dispatcher.dispatch(
+                    self.active_strategies(),
+                    lambda strategy: self.with_batch_signals(strategy, market_data, market_data['historical_ha_candles'], columns),
+                    lambda strategy: self.positions.for_strategy(strategy.name)
+                )
+                metrics.candle_to_signal.observe(perf_counter() - ha_candle.get('ready_at', started))
+                tracing.mark('strategy_decision')
+                await self.dispatcher.submit(outcome, self._submit_enhanced_entry, self._submit_enhanced_exit)
                     
         except Exception as e:
             self.logger.error(f"Error evaluating strategies: {e}")
     
+    async def _submit_enhanced_entry(self, strategy: BaseStrategy, order: Order) -> bool:
+        """Place an entry order and send the strategy-specific notification"""
+        if not await self.place_enhanced_order(order):
+            return False
+
+        self.orders.append(order)
+        await strategy.on_order_filled(order)
+        await self.send_multi_strategy_notification(order, "ENTRY")
+        return True
+
+    async def _submit_enhanced_exit(self, strategy: BaseStrategy, position_key: str, position: Position, order: Order) -> bool:
+        """Place an exit order (performance is tracked by update_enhanced_paper_positions)"""
+        if not await self.place_enhanced_order(order):
+            return False
+
+        self.orders.append(order)
+        await strategy.on_order_filled(order)
+        await self.send_multi_strategy_notification(order, "EXIT")
+
+        # Remove closed position
+        if order.quantity >= position.quantity:
+            self.positions.pop(position_key, None)
+            self.contracts.pop(position_key, None)
+        return True
+
     async def place_enhanced_order(self, order: Order) -> bool:
         """Enhanced order placement with multi-strategy support"""
         try:
+            tracing.mark('order_submit')
             if self.paper_trading:
                 # Enhanced paper trading with strategy tracking
                 order.status = OrderStatus.FILLED
-                order.filled_price = order.price
+                order.filled_price = self.paper_fill_price(order)
                 order.filled_quantity = order.quantity
-                order.order_id = f"PAPER_{order.strategy_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                order.order_id = f"PAPER_{order.strategy_name}_{self.clock().strftime('%Y%m%d_%H%M%S')}"
+                tracing.mark('broker_ack')
                 
                 # Calculate investment details
-                lot_size = 75
-                total_investment = order.quantity * lot_size * order.price
+                lot_size = LOT_SIZE
+                total_investment = order.quantity * lot_size * order.filled_price
                 total_shares = order.quantity * lot_size
                 
                 self.trading_logger.info(
                     f"📋 PAPER TRADE [{order.strategy_name}] - {order.transaction_type.value} {order.quantity} lots "
-                    f"({total_shares:,} shares) of {order.symbol} @ Rs.{order.price:.2f}"
+                    f"({total_shares:,} shares) of {order.symbol} @ Rs.{order.filled_price:.2f}"
                 )
                 self.trading_logger.info(f"💰 Total Investment: Rs.{total_investment:,.2f}")
                 
@@ -1242,28 +1461,31 @@ class MultiStrategyTradingBot(TradingBot):  # Extend your existing TradingBot
             self.logger.error(f"Error placing enhanced order: {e}")
             return False
     
+    def paper_position_key(self, order: Order) -> str:
+        """Key of the paper position an order opens or closes (one per strategy and option type)"""
+        return f"{order.symbol}_{order.strategy_name}_{getattr(order, 'option_type', 'CE')}"
+    
     async def update_enhanced_paper_positions(self, order: Order):
         """Update paper positions with multi-strategy tracking"""
         try:
-            position_key = f"{order.symbol}_{order.strategy_name}_{getattr(order, 'option_type', 'CE')}"
+            position_key = self.paper_position_key(order)
             
             if order.transaction_type == TransactionType.BUY:
-                entry_time = datetime.now()
+                entry_time = self.clock()
                 
                 if position_key in self.positions:
                     existing = self.positions[position_key]
                     total_quantity = existing.quantity + order.quantity
-                    total_cost = (existing.quantity * existing.average_price) + (order.quantity * order.price)
+                    total_cost = (existing.quantity * existing.average_price) + (order.quantity * order.filled_price)
                     new_avg_price = total_cost / total_quantity
                     
-                    existing.quantity = total_quantity
-                    existing.average_price = new_avg_price
+                    self.positions.resize(position_key, total_quantity, new_avg_price)
                 else:
                     position = Position(
                         symbol=order.symbol,
                         quantity=order.quantity,
-                        average_price=order.price,
-                        current_price=order.price,
+                        average_price=order.filled_price,
+                        current_price=order.filled_price,
                         pnl=0,
                         unrealized_pnl=0,
                         instrument_key=order.instrument_key or 'default'
@@ -1279,13 +1501,13 @@ class MultiStrategyTradingBot(TradingBot):  # Extend your existing TradingBot
             elif order.transaction_type == TransactionType.SELL:
                 if position_key in self.positions:
                     existing = self.positions[position_key]
-                    entry_time = getattr(existing, 'entry_time', datetime.now())
-                    exit_time = datetime.now()
+                    entry_time = getattr(existing, 'entry_time', self.clock())
+                    exit_time = self.clock()
                     
                     if order.quantity >= existing.quantity:
                         # Close position completely
-                        lot_size = 75
-                        pnl = (order.price - existing.average_price) * existing.quantity * lot_size
+                        lot_size = LOT_SIZE
+                        pnl = (order.filled_price - existing.average_price) * existing.quantity * lot_size
                         
                         # Update global statistics
                         self.total_pnl += pnl
@@ -1314,13 +1536,14 @@ class MultiStrategyTradingBot(TradingBot):  # Extend your existing TradingBot
                         
                         # Send P&L notification
                         await self.send_enhanced_pnl_notification(order.symbol, pnl, existing.average_price, 
-                                                       order.price, existing.quantity, entry_time, exit_time, order.strategy_name)
+                                                       order.filled_price, existing.quantity, entry_time, exit_time, order.strategy_name)
                         
                         del self.positions[position_key]
+                        self.contracts.pop(position_key, None)
                         self.trading_logger.info(f"Position closed [{order.strategy_name}]: {order.symbol} P&L: Rs.{pnl:.2f}")
                     else:
                         # Partial close
-                        existing.quantity -= order.quantity
+                        self.positions.resize(position_key, existing.quantity - order.quantity)
                         
         except Exception as e:
             self.logger.error(f"Error updating enhanced paper positions: {e}")
@@ -1342,9 +1565,9 @@ class MultiStrategyTradingBot(TradingBot):  # Extend your existing TradingBot
             info = strategy_info.get(strategy_mode, strategy_info['CE'])
             
             if action == "ENTRY":
-                lot_size = 75
+                lot_size = LOT_SIZE
                 total_shares = order.quantity * lot_size
-                total_investment = order.quantity * lot_size * order.price
+                total_investment = order.quantity * lot_size * order.filled_price
                 current_capital = 20000 + self.total_pnl
                 
                 message = f"""{info['emoji']} {info['name']} SIGNAL - AstraRise Bot
@@ -1356,7 +1579,7 @@ class MultiStrategyTradingBot(TradingBot):  # Extend your existing TradingBot
 💰 *PAPER TRADE EXECUTED:*
 🔹 *Symbol:* {order.symbol}
 🔹 *Action:* BUY {order.quantity} lots ({total_shares:,} shares)
-🔹 *Price:* Rs.{order.price:.2f} per share
+🔹 *Price:* Rs.{order.filled_price:.2f} per share
 🔹 *Investment:* Rs.{total_investment:,.2f}
 
 📈 *Capital Management:*
@@ -1378,7 +1601,7 @@ class MultiStrategyTradingBot(TradingBot):  # Extend your existing TradingBot
                                            exit_time: datetime, strategy_name: str):
         """Send enhanced P&L notification with strategy performance"""
         try:
-            lot_size = 75
+            lot_size = LOT_SIZE
             total_shares = quantity * lot_size
             trade_value = entry_price * total_shares
             pnl_pct = (pnl / trade_value) * 100 if trade_value > 0 else 0
@@ -1,24 +1,69 @@
 # ==================== src/upstox_client.py (FIXED) ====================
-import requests
 import json
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
 import asyncio
+import time
 import aiohttp
 from pathlib import Path
+from src.utils.rate_limiter import RequestScheduler, classify_endpoint, standard_limits
+from src.utils.metrics import metrics
+from src.utils import tracing
 
 class UpstoxClient:
-    """Upstox API client with token persistence"""
+    """Upstox API client with token persistence and a pooled keep-alive session"""
     
-    def __init__(self, api_key: str, api_secret: str, redirect_uri: str):
+    # Most instrument keys the quotes endpoint accepts per request
+    QUOTE_BATCH_SIZE = 500
+    
+    API_HOST = "https://api.upstox.com"
+    
+    def __init__(self, api_key: str, api_secret: str, redirect_uri: str,
+                 pool_size: int = 10, keepalive_timeout: float = 60.0, dns_cache_ttl: int = 300,
+                 request_timeout: float = 10.0, connect_timeout: float = 5.0,
+                 rate_limits: Optional[Dict] = None, max_retries: int = 2, quote_ttl: float = 1.0,
+                 api_host: Optional[str] = None):
+        """
+        Args:
+            pool_size: Maximum open connections to the API host
+            keepalive_timeout: Seconds an idle connection is kept for reuse
+            dns_cache_ttl: Seconds a resolved API address is cached
+            request_timeout: Default total timeout per request (overridable per call)
+            connect_timeout: Timeout for establishing a new connection
+            rate_limits: Endpoint class -> [(requests, period_seconds)], see rate_limiter.standard_limits
+            max_retries: Retries of a request the broker rejected with 429
+            quote_ttl: Seconds a quote fetched by get_quotes is served from cache
+            api_host: API scheme and host, e.g. a local mock broker (default API_HOST)
+        """
         self.api_key = api_key
         self.api_secret = api_secret
         self.redirect_uri = redirect_uri
         self.access_token = None
-        self.base_url = "https://api.upstox.com/v2"
+        self.base_url = f"{(api_host or self.API_HOST).rstrip('/')}/v2"
         self.logger = logging.getLogger(__name__)
         
+        # Connection pool settings - the session itself is opened by open()
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.last_request_time = 0.0
+        
+        # Client-side rate limiting - orders are granted ahead of quotes and history
+        self.scheduler = RequestScheduler(rate_limits or standard_limits(50, 500, 2000))
+        self.max_retries = max_retries
+        
+        # Identical GETs already in flight share one request
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Quote cache (instrument_key -> (fetched_at, quote)) and per-key in-flight fetches
+        self.quote_ttl = quote_ttl
+        self._quote_cache: Dict[str, tuple] = {}
+        self._quote_inflight: Dict[str, asyncio.Future] = {}
+        
         # Token storage
         self.token_file = Path("data") / "access_token.json"
         self.load_stored_token()
@@ -59,9 +104,77 @@ class UpstoxClient:
             
         return False
     
+    async def open(self) -> aiohttp.ClientSession:
+        """Open the pooled session (no-op if already open)"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout, connect=self.connect_timeout),
+                headers={'Accept': 'application/json'}
+            )
+            self.logger.info(f"Opened Upstox HTTP pool ({self.pool_size} connections, keep-alive {self.keepalive_timeout:.0f}s)")
+        return self.session
+    
+    async def close(self):
+        """Close the pooled session and its connections"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+            self.logger.info("Closed Upstox HTTP pool")
+        self.session = None
+    
+    async def __aenter__(self):
+        await self.open()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    async def warm_up(self, connections: int = 2) -> int:
+        """
+        Establish connections ahead of time so the next order skips DNS/TCP/TLS setup
+        
+        Args:
+            connections: Number of pooled connections to open concurrently
+            
+        Returns:
+            Number of connections that completed a round trip
+        """
+        session = await self.open()
+        
+        async def touch() -> bool:
+            try:
+                await self.scheduler.acquire('default')
+                # Unauthenticated GET: any response (even 401/404) means the connection is up.
+                # aiohttp doesn't keep empty HEAD responses alive, so HEAD can't be used here
+                async with session.get(self.base_url, allow_redirects=False) as response:
+                    await response.read()
+                    return True
+            except Exception as e:
+                self.logger.debug(f"Connection warm-up failed: {e}")
+                return False
+        
+        results = await asyncio.gather(*(touch() for _ in range(max(1, min(connections, self.pool_size)))))
+        self.last_request_time = asyncio.get_running_loop().time()
+        warmed = sum(results)
+        self.logger.info(f"Warmed {warmed}/{len(results)} Upstox connections")
+        return warmed
+    
+    async def keep_warm(self, connections: int = 1) -> int:
+        """Re-warm the pool if it has been idle long enough for keep-alive to lapse"""
+        idle = asyncio.get_running_loop().time() - self.last_request_time
+        if self.session is not None and not self.session.closed and idle < self.keepalive_timeout / 2:
+            return 0
+        return await self.warm_up(connections)
+    
     def get_login_url(self) -> str:
         """Generate login URL for authorization"""
-        auth_url = "https://api.upstox.com/v2/login/authorization/dialog"
+        auth_url = f"{self.base_url}/login/authorization/dialog"
         params = {
             'response_type': 'code',
             'client_id': self.api_key,
@@ -84,37 +197,38 @@ class UpstoxClient:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, data=data) as response:
-                    response.raise_for_status()
-                    token_response = await response.json()
-                    
-                    # Handle both response formats
-                    if isinstance(token_response, dict):
-                        # Direct response format (what you're getting)
-                        if 'access_token' in token_response:
-                            self.access_token = token_response.get('access_token')
-                            
-                            if self.access_token:
-                                # Save token for future use
-                                self.save_token(token_response)
-                                self.logger.info("Access token obtained and saved successfully")
-                                return True
+            session = await self.open()
+            await self.scheduler.acquire('default')
+            async with session.post(url, data=data) as response:
+                response.raise_for_status()
+                token_response = await response.json()
+                
+                # Handle both response formats
+                if isinstance(token_response, dict):
+                    # Direct response format (what you're getting)
+                    if 'access_token' in token_response:
+                        self.access_token = token_response.get('access_token')
                         
-                        # Wrapped response format
-                        elif token_response.get('status') == 'success':
-                            token_data = token_response.get('data', {})
-                            self.access_token = token_data.get('access_token')
-                            
-                            if self.access_token:
-                                # Save token for future use
-                                self.save_token(token_data)
-                                self.logger.info("Access token obtained and saved successfully")
-                                return True
+                        if self.access_token:
+                            # Save token for future use
+                            self.save_token(token_response)
+                            self.logger.info("Access token obtained and saved successfully")
+                            return True
                     
-                    self.logger.error(f"Token request failed: {token_response}")
-                    return False
+                    # Wrapped response format
+                    elif token_response.get('status') == 'success':
+                        token_data = token_response.get('data', {})
+                        self.access_token = token_data.get('access_token')
                         
+                        if self.access_token:
+                            # Save token for future use
+                            self.save_token(token_data)
+                            self.logger.info("Access token obtained and saved successfully")
+                            return True
+                
+                self.logger.error(f"Token request failed: {token_response}")
+                return False
+                    
         except Exception as e:
             self.logger.error(f"Error getting access token: {e}")
             return False
@@ -131,41 +245,68 @@ class UpstoxClient:
             self.logger.debug(f"Token test failed: {e}")
             return False
     
-    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Optional[Dict]:  # FIX: Optional[Dict] instead of Dict = None
-        """Make authenticated API request"""
+    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None,
+                            timeout: Optional[float] = None) -> Optional[Dict]:  # FIX: Optional[Dict] instead of Dict = None
+        """Make authenticated API request on the pooled session (timeout overrides the default, in seconds)"""
         if not self.access_token:
             self.logger.error("No access token available")
             return None
             
-        url = f"{self.base_url}{endpoint}"
         headers = {
             'Authorization': f'Bearer {self.access_token}',
             'Content-Type': 'application/json'
         }
         
+        if method.upper() != 'GET':
+            return await self._send(method, endpoint, headers, data, timeout)
+        
+        # Callers asking for the same resource while it's in flight get the same response
+        pending = self._inflight.get(endpoint)
+        if pending is None:
+            pending = asyncio.ensure_future(self._send(method, endpoint, headers, data, timeout))
+            self._inflight[endpoint] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(endpoint, None))
+        return await asyncio.shield(pending)
+    
+    async def _send(self, method: str, endpoint: str, headers: Dict, data: Optional[Dict],
+                    timeout: Optional[float]) -> Optional[Dict]:
+        """Send one request through the rate limiter, retrying after 429 responses"""
+        endpoint_class = classify_endpoint(endpoint)
+        url = f"{self.base_url}{endpoint}"
+        
         try:
-            async with aiohttp.ClientSession() as session:
-                if method.upper() == 'GET':
-                    async with session.get(url, headers=headers) as response:
-                        response.raise_for_status()
-                        return await response.json()
-                        
-                elif method.upper() == 'POST':
-                    async with session.post(url, headers=headers, json=data) as response:
-                        response.raise_for_status()
-                        return await response.json()
-                        
-                elif method.upper() == 'PUT':
-                    async with session.put(url, headers=headers, json=data) as response:
-                        response.raise_for_status()
-                        return await response.json()
-                        
-                elif method.upper() == 'DELETE':
-                    async with session.delete(url, headers=headers) as response:
-                        response.raise_for_status()
-                        return await response.json()
+            session = await self.open()
+            kwargs = {'headers': headers}
+            if method.upper() in ('POST', 'PUT'):
+                kwargs['json'] = data
+            if timeout is not None:
+                kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout, connect=self.connect_timeout)
+            
+            for attempt in range(self.max_retries + 1):
+                await self.scheduler.acquire(endpoint_class)
+                
+                started = time.perf_counter()
+                async with session.request(method.upper(), url, **kwargs) as response:
+                    self.last_request_time = asyncio.get_running_loop().time()
+                    metrics.api_latency.observe(time.perf_counter() - started, endpoint_class)
+                    
+                    if response.status >= 400:
+                        metrics.api_errors.inc(endpoint_class, str(response.status))
+                    
+                    # A 429 means the request was not processed, so it is safe to resend
+                    if response.status == 429 and attempt < self.max_retries:
+                        retry_after = float(response.headers.get('Retry-After', 1))
+                        self.scheduler.penalize(endpoint_class, retry_after)
+                        continue
+                    
+                    response.raise_for_status()
+                    return await response.json()
             
+        except aiohttp.ClientResponseError as e:
+            self.logger.error(f"API request failed: {e}")
+            return None
         except Exception as e:
+            metrics.api_errors.inc(endpoint_class, type(e).__name__)
             self.logger.error(f"API request failed: {e}")
             return None
     
@@ -191,9 +332,76 @@ class UpstoxClient:
         endpoint = f"/market-quote/quotes?instrument_key={instrument_key}"
         return await self._make_request('GET', endpoint)
     
-    async def place_order(self, order_data: Dict) -> Optional[Dict]:
+    async def get_quotes(self, instrument_keys: List[str], max_age: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Get quotes for many instruments in as few requests as possible
+        
+        Keys are fetched in batches of QUOTE_BATCH_SIZE concurrently. Quotes
+        younger than max_age (default quote_ttl) come from cache, and a key
+        already being fetched by another caller is awaited instead of refetched.
+        
+        Args:
+            instrument_keys: Instrument keys, e.g. 'NSE_INDEX|Nifty 50'
+            max_age: Oldest cached quote (seconds) acceptable to this caller
+            
+        Returns:
+            Dict of instrument_key to quote data - keys that failed are omitted
+        """
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        max_age = self.quote_ttl if max_age is None else max_age
+        
+        quotes = {}
+        pending = {}
+        missing = []
+        for key in dict.fromkeys(instrument_keys):
+            cached = self._quote_cache.get(key)
+            if cached and now - cached[0] <= max_age:
+                quotes[key] = cached[1]
+            elif key in self._quote_inflight:
+                pending[key] = self._quote_inflight[key]
+            else:
+                missing.append(key)
+        
+        if missing:
+            for key in missing:
+                pending[key] = self._quote_inflight[key] = loop.create_future()
+            
+            chunks = [missing[i:i + self.QUOTE_BATCH_SIZE] for i in range(0, len(missing), self.QUOTE_BATCH_SIZE)]
+            await asyncio.gather(*(self._fetch_quote_batch(chunk) for chunk in chunks))
+        
+        for key, future in pending.items():
+            quote = await asyncio.shield(future)
+            if quote is not None:
+                quotes[key] = quote
+        
+        return quotes
+    
+    async def _fetch_quote_batch(self, instrument_keys: List[str]):
+        """Fetch one batch of quotes and resolve the waiting futures"""
+        received = {}
+        try:
+            response = await self._make_request('GET', f"/market-quote/quotes?instrument_key={','.join(instrument_keys)}")
+            if response and response.get('status') == 'success':
+                for response_key, quote in (response.get('data') or {}).items():
+                    # Data is keyed 'EXCHANGE:symbol'; instrument_token carries the requested key
+                    received[quote.get('instrument_token') or response_key.replace(':', '|', 1)] = quote
+        finally:
+            fetched_at = asyncio.get_running_loop().time()
+            for key in instrument_keys:
+                quote = received.get(key)
+                if quote is not None:
+                    self._quote_cache[key] = (fetched_at, quote)
+                future = self._quote_inflight.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(quote)
+    
+    async def place_order(self, order_data: Dict, timeout: Optional[float] = None) -> Optional[Dict]:
         """Place a trading order"""
-        return await self._make_request('POST', '/order/place', order_data)
+        tracing.mark('order_submit')
+        result = await self._make_request('POST', '/order/place', order_data, timeout=timeout)
+        tracing.mark('broker_ack')
+        return result
     
     async def get_order_history(self) -> Optional[Dict]:
         """Get order history"""
@@ -0,0 +1,145 @@
+# ==================== src/utils/hot_log.py ====================
+"""
+Logging for per-tick and per-candle code paths.
+
+HotPathLogger wraps a standard logger. Messages use %-style arguments, so
+nothing is formatted unless the record is actually emitted, and each call
+names a message key that can be rate limited ("at most once every N
+seconds") or sampled ("1 in N"). Suppressed calls are counted and the count
+is appended to the next message emitted for that key, so the log still
+shows how often something happened without paying for every line.
+"""
+import logging
+import time
+from typing import Dict, Hashable, Optional
+
+# Default seconds between messages of one key (None = no limit); set from LOG_HOT_INTERVAL
+DEFAULT_INTERVAL: Optional[float] = None
+
+
+def set_default_interval(seconds: Optional[float]):
+    """Rate limit applied to hot-path messages that don't pass `every`"""
+    global DEFAULT_INTERVAL
+    DEFAULT_INTERVAL = seconds if seconds and seconds > 0 else None
+
+
+class _KeyState:
+    __slots__ = ('calls', 'last_emitted', 'suppressed')
+
+    def __init__(self):
+        self.calls = 0
+        self.last_emitted: Optional[float] = None
+        self.suppressed = 0
+
+
+class HotPathLogger:
+    """Rate-limited, sampled and lazily formatted logging for hot paths"""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self._keys: Dict[Hashable, _KeyState] = {}
+
+    def debug(self, key: Hashable, msg: str, *args, every: Optional[float] = None, sample: Optional[int] = None):
+        self._log(logging.DEBUG, key, msg, args, every, sample)
+
+    def info(self, key: Hashable, msg: str, *args, every: Optional[float] = None, sample: Optional[int] = None):
+        self._log(logging.INFO, key, msg, args, every, sample)
+
+    def warning(self, key: Hashable, msg: str, *args, every: Optional[float] = None, sample: Optional[int] = None):
+        self._log(logging.WARNING, key, msg, args, every, sample)
+
+    def log(self, level: int, key: Hashable, msg: str, *args,
+            every: Optional[float] = None, sample: Optional[int] = None) -> bool:
+        """
+        Log `msg % args` unless the key is rate limited or sampled out
+
+        Args:
+            key: Message identity for rate limiting (e.g. 'new_candle'); keep it
+                independent of the symbol so cost doesn't grow with subscriptions
+            every: Emit at most once per this many seconds (default DEFAULT_INTERVAL)
+            sample: Emit only every n-th call
+
+        Returns:
+            True if the message was emitted
+        """
+        return self._log(level, key, msg, args, every, sample)
+
+    def _log(self, level: int, key: Hashable, msg: str, args: tuple,
+             every: Optional[float], sample: Optional[int]) -> bool:
+        suppressed = self._admit(level, key, every, sample)
+        if suppressed is None:
+            return False
+
+        if suppressed:
+            msg = f"{msg} (+%d suppressed)"
+            args = args + (suppressed,)
+        self.logger.log(level, msg, *args, stacklevel=3)
+        return True
+
+    def enabled(self, key: Hashable, level: int = logging.INFO,
+                every: Optional[float] = None, sample: Optional[int] = None) -> bool:
+        """
+        Admit a multi-line block under one key
+
+        The caller logs the block itself when this returns True; suppressed
+        blocks are counted like single messages.
+        """
+        return self._admit(level, key, every, sample) is not None
+
+    def suppressed(self) -> Dict[Hashable, int]:
+        """Calls suppressed since each key last emitted"""
+        return {key: state.suppressed for key, state in self._keys.items() if state.suppressed}
+
+    def log_summary(self, level: int = logging.INFO):
+        """Log and reset the suppressed counts of every key"""
+        counts = self.suppressed()
+        if not counts:
+            return
+        summary = ", ".join(f"{key}: {count}" for key, count in counts.items())
+        self.logger.log(level, "Suppressed hot-path messages - %s", summary)
+        for key in counts:
+            self._keys[key].suppressed = 0
+
+    def _admit(self, level: int, key: Hashable, every: Optional[float], sample: Optional[int]) -> Optional[int]:
+        """Suppressed count to report if the message should be emitted, else None"""
+        if not self.logger.isEnabledFor(level):
+            return None
+
+        state = self._keys.get(key)
+        if state is None:
+            state = self._keys[key] = _KeyState()
+        state.calls += 1
+
+        if sample and sample > 1 and (state.calls - 1) % sample:
+            state.suppressed += 1
+            return None
+
+        if every is None:
+            every = DEFAULT_INTERVAL
+        if every:
+            now = time.monotonic()
+            if state.last_emitted is not None and now - state.last_emitted < every:
+                state.suppressed += 1
+                return None
+            state.last_emitted = now
+
+        suppressed = state.suppressed
+        state.suppressed = 0
+        return suppressed
+
+
+_hot_loggers: Dict[str, HotPathLogger] = {}
+
+
+def get_hot_logger(name: str) -> HotPathLogger:
+    """Shared HotPathLogger for a logger name (like logging.getLogger)"""
+    hot = _hot_loggers.get(name)
+    if hot is None:
+        hot = _hot_loggers[name] = HotPathLogger(logging.getLogger(name))
+    return hot
+
+
+def log_suppressed_summaries(level: int = logging.INFO):
+    """Log and reset the suppressed counts of every hot-path logger"""
+    for hot in list(_hot_loggers.values()):
+        hot.log_summary(level)
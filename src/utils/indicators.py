@@ -0,0 +1,142 @@
+# ==================== src/utils/indicators.py ====================
+"""
+Vectorized indicator helpers for batch strategy evaluation.
+
+The per-event strategies recompute indicators over a rolling history list
+(e.g. the last 50 HA candles), seeding EMA/RMA at the start of that window.
+The windowed_* helpers reproduce those values for every bar of a series in
+one pass: the full-series recursion is computed once and the contribution of
+the different seed is removed in closed form, so results match the
+per-event calculation instead of drifting from it.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Sequence
+from src.utils.lazy_import import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+CANDLE_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'ha_open', 'ha_high', 'ha_low', 'ha_close')
+
+# Below this length a plain loop beats pandas' per-call overhead (live windows are ~50 candles)
+SHORT_SERIES = 256
+
+
+def candles_to_columns(candles: List[Dict], fields: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """Convert a list of candle dicts into equal-length numpy columns"""
+    if not candles:
+        return {}
+
+    first = candles[0]
+    fields = [f for f in (fields or CANDLE_FIELDS) if f in first]
+    columns = {
+        field: np.fromiter((candle.get(field, 0) for candle in candles), dtype=float, count=len(candles))
+        for field in fields
+    }
+
+    for key in ('start_time', 'timestamp'):
+        if key in first:
+            columns['timestamp'] = np.array([candle.get(key) for candle in candles], dtype=object)
+            break
+
+    return columns
+
+
+def ema(values: np.ndarray, alpha: float) -> np.ndarray:
+    """Recursive EMA (pandas ewm with adjust=False) seeded with the first value"""
+    if len(values) > SHORT_SERIES:
+        return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+    result = np.empty(len(values))
+    acc = 0.0
+    for i, value in enumerate(values.tolist()):
+        acc = value if i == 0 else alpha * value + (1 - alpha) * acc
+        result[i] = acc
+    return result
+
+
+def rolling_mean(values: np.ndarray, period: int) -> np.ndarray:
+    """Trailing mean over `period` values (NaN until the window is full)"""
+    n = len(values)
+    result = np.full(n, np.nan)
+    if n < period:
+        return result
+
+    if n > SHORT_SERIES:
+        # Summing each window avoids cumulative-sum cancellation on long series
+        result[period - 1:] = np.lib.stride_tricks.sliding_window_view(values, period).mean(axis=1)
+    else:
+        csum = np.cumsum(values)
+        result[period - 1] = csum[period - 1]
+        result[period:] = csum[period:] - csum[:-period]
+        result[period - 1:] /= period
+    return result
+
+
+def heikin_ashi(opens: np.ndarray, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray) -> Dict[str, np.ndarray]:
+    """Heikin Ashi columns, matching HeikinAshiConverter candle by candle"""
+    ha_close = (opens + highs + lows + closes) / 4
+
+    # ha_open[t] = (ha_open[t-1] + ha_close[t-1]) / 2 is an EMA with alpha 0.5
+    seeds = np.empty_like(ha_close)
+    seeds[0] = (opens[0] + closes[0]) / 2
+    seeds[1:] = ha_close[:-1]
+    ha_open = ema(seeds, 0.5)
+
+    return {
+        'ha_open': ha_open,
+        'ha_high': np.maximum(highs, np.maximum(ha_open, ha_close)),
+        'ha_low': np.minimum(lows, np.minimum(ha_open, ha_close)),
+        'ha_close': ha_close
+    }
+
+
+def window_starts(length: int, window: int) -> np.ndarray:
+    """Index of the first bar in the trailing window ending at each bar"""
+    return np.maximum(np.arange(length) - window + 1, 0)
+
+
+def windowed_ema(values: np.ndarray, span: int, window: int) -> np.ndarray:
+    """
+    EMA (adjust=False) restarted at the start of each trailing window
+
+    Equivalent to pd.Series(values[s:t+1]).ewm(span=span, adjust=False).mean().iloc[-1]
+    for every bar t, with s the window start.
+    """
+    alpha = 2.0 / (span + 1)
+    full = ema(values, alpha)
+    starts = window_starts(len(values), window)
+    elapsed = np.arange(len(values)) - starts
+    return full - (1 - alpha) ** elapsed * (full[starts] - values[starts])
+
+
+def windowed_rma(values: np.ndarray, period: int, window: int) -> np.ndarray:
+    """
+    Wilder RMA seeded with the mean of the first `period` values of each trailing window
+
+    values[0] is ignored (it is the undefined first difference); the window
+    ending at bar t covers values[s+1..t]. Bars whose window holds fewer than
+    `period` values are NaN.
+    """
+    n = len(values)
+    result = np.full(n, np.nan)
+    if n <= period:
+        return result
+
+    alpha = 1.0 / period
+    starts = window_starts(n, window)
+
+    # Full recursion seeded at bar `period` with the mean of values[1..period]
+    seeded = values[period:].astype(float)
+    seeded[0] = values[1:period + 1].mean()
+    full = np.full(n, np.nan)
+    full[period:] = ema(seeded, alpha)
+
+    # Each window seeds at bar s+period with its own mean; the seed difference decays by (1-alpha)
+    seed_at = starts + period
+    valid = np.arange(n) >= seed_at
+    t = np.flatnonzero(valid)
+    seed_idx = seed_at[valid]
+    window_seed = rolling_mean(values, period)[seed_idx]
+    result[t] = full[t] + (1 - alpha) ** (t - seed_idx) * (window_seed - full[seed_idx])
+    return result
@@ -0,0 +1,74 @@
+# ==================== src/utils/lazy_import.py ====================
+"""
+Deferred imports for heavy dependencies.
+
+`np = lazy_import('numpy')` binds a module object whose code only runs on
+first attribute access, so importing the bot doesn't pay for numpy, pandas
+or the Upstox SDK until a candle is evaluated or a stream is opened. After
+the first access the module is an ordinary module again: there is no
+per-attribute overhead on hot paths.
+
+How long each deferred module took to load, and when, is recorded for the
+startup report (see src/utils/startup.py).
+"""
+import importlib.util
+import sys
+import time
+from types import ModuleType
+from typing import Dict, Optional, Tuple
+
+# Module name -> (perf_counter when loaded, seconds the load took)
+loaded: Dict[str, Tuple[float, float]] = {}
+# Deferred modules not loaded yet
+pending: set = set()
+
+
+class _TimedLoader:
+    """Wraps a module's loader to time the deferred exec_module"""
+
+    def __init__(self, loader, name: str):
+        self.loader = loader
+        self.name = name
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType):
+        started = time.perf_counter()
+        # Restore the real loader first so the module looks normally imported (resources, pickling)
+        module.__spec__.loader = module.__loader__ = self.loader
+        self.loader.exec_module(module)
+        loaded[self.name] = (started, time.perf_counter() - started)
+        pending.discard(self.name)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+def lazy_import(name: str, optional: bool = False) -> Optional[ModuleType]:
+    """
+    Import a module on first attribute access
+
+    Args:
+        name: Absolute module name, e.g. 'pandas'
+        optional: Return None instead of raising when the module isn't installed
+
+    Raises:
+        ModuleNotFoundError: If the module isn't installed and optional is False
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        if optional:
+            return None
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    spec.loader = importlib.util.LazyLoader(_TimedLoader(spec.loader, name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    pending.add(name)
+    return module
@@ -1,6 +1,8 @@
 from datetime import datetime, time
 from typing import List, Dict
-import pandas as pd
+from src.utils.lazy_import import lazy_import
+
+pd = lazy_import('pandas')
 
 class MarketUtils:
     """Market utility functions"""
@@ -1,14 +1,36 @@
 # ==================== src/utils/notification.py (FIXED) ====================
 import asyncio
 import logging
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import aiohttp
 from datetime import datetime
 
+from src.utils.rate_limiter import GLOBAL, RequestScheduler
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+TELEGRAM_MAX_LENGTH = 4096
+DIGEST_SEPARATOR = "\n➖➖➖➖➖➖➖➖\n"
+
+
 class TelegramNotifier:
-    """Telegram notification service with support for multiple chats"""
+    """
+    Telegram notification service with support for multiple chats
+
+    send_message() only queues the message in an outbox and returns. A
+    background worker delivers queued messages in order, to all chats
+    concurrently over one shared HTTP session, within Telegram's rate limits
+    (about one message per second per chat and 30 per second overall) and
+    with retries on 429/5xx responses. Telegram latency therefore never
+    delays the trading loop.
+
+    Messages queued within coalesce_window seconds of each other are merged
+    into one digest per chat. Critical messages (errors) skip the outbox and
+    are sent straight away.
+    """
     
-    def __init__(self, bot_token: Optional[str], chat_id: Optional[str], enabled: bool = True):
+    def __init__(self, bot_token: Optional[str], chat_id: Optional[str], enabled: bool = True,
+                 outbox_size: int = 1000, max_retries: int = 3, retry_delay: float = 1.0,
+                 coalesce_window: float = 0.0, api_url: str = TELEGRAM_API_URL):
         self.bot_token = bot_token
         
         # Handle multiple chat IDs separated by comma
@@ -21,29 +43,213 @@ class TelegramNotifier:
         self.enabled = enabled and bot_token and self.chat_ids
         self.logger = logging.getLogger(__name__)
         
+        self.api_url = api_url
+        self.outbox_size = outbox_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.coalesce_window = coalesce_window
+        
+        # One bucket per chat plus Telegram's overall bot limit
+        limits = {chat: [(1, 1.0)] for chat in self.chat_ids}
+        limits[GLOBAL] = [(30, 1.0)]
+        self.scheduler = RequestScheduler(limits)
+        
+        self._outbox: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._flush: Optional[asyncio.Event] = None
+        self._urgent: set = set()
+        self._closing: set = set()  # Replaced sessions being closed
+        
+        # Counters for status reporting
+        self.messages_sent = 0
+        self.messages_failed = 0
+        self.messages_dropped = 0
+        self.messages_coalesced = 0  # Messages merged into a digest with others
+        self.digests_sent = 0
+        
         if not self.enabled:
             self.logger.warning("Telegram notifications disabled - missing token or chat_id")
         else:
             self.logger.info(f"Telegram enabled for {len(self.chat_ids)} chats: {self.chat_ids}")
     
-    async def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
-        """Send message to all configured Telegram chats"""
+    async def send_message(self, message: str, parse_mode: str = "HTML", critical: bool = False) -> bool:
+        """Queue a message for all configured Telegram chats (returns without waiting for delivery)"""
         if not self.enabled:
             return False
+        return self.enqueue(message, parse_mode, critical)
+    
+    def enqueue(self, message: str, parse_mode: str = "HTML", critical: bool = False) -> bool:
+        """
+        Put a message in the outbox; must be called from the event loop thread
+        
+        Args:
+            critical: Send immediately instead of waiting for the coalescing window
+        
+        Returns:
+            True if queued. When the outbox is full the oldest message is dropped.
+        """
+        if not self.enabled:
+            return False
+        
+        outbox = self._ensure_worker()
+        if critical:
+            task = asyncio.get_running_loop().create_task(self.deliver(message, parse_mode))
+            self._urgent.add(task)
+            task.add_done_callback(self._urgent.discard)
+            return True
+        
+        if outbox.full():
+            outbox.get_nowait()
+            outbox.task_done()
+            self.messages_dropped += 1
+            self.logger.warning("Telegram outbox full - dropped oldest message")
+        outbox.put_nowait((message, parse_mode))
+        return True
+    
+    @property
+    def pending(self) -> int:
+        """Messages waiting in the outbox"""
+        return self._outbox.qsize() if self._outbox is not None else 0
+    
+    async def deliver(self, message: str, parse_mode: str = "HTML") -> bool:
+        """Send a message to all chats now and wait for the result"""
+        if not self.enabled:
+            return False
+        
+        results = await asyncio.gather(
+            *(self._send_to_single_chat(chat_id, message, parse_mode) for chat_id in self.chat_ids)
+        )
+        
+        # True if at least one chat received the message
+        if any(results):
+            self.messages_sent += 1
+            return True
+        self.messages_failed += 1
+        return False
+    
+    async def close(self, timeout: float = 5.0):
+        """Deliver what is still queued (waiting at most timeout seconds) and close the session"""
+        if self._urgent:
+            await asyncio.gather(*self._urgent, return_exceptions=True)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
         
-        success_count = 0
+        if self._worker is not None and not self._worker.done():
+            # Don't wait out the coalescing window
+            self._flush.set()
+            try:
+                await asyncio.wait_for(self._outbox.join(), timeout)
+            except asyncio.TimeoutError:
+                self.logger.warning(f"Telegram outbox not flushed - {self.pending} messages discarded")
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+        self._outbox = None
         
-        # Send to all chat IDs
-        for chat_id in self.chat_ids:
-            if await self._send_to_single_chat(chat_id, message, parse_mode):
-                success_count += 1
+        if self.enabled:
+            self.logger.info(f"Telegram: {self.messages_sent} sent, {self.messages_failed} failed, "
+                             f"{self.messages_coalesced} merged into {self.digests_sent} digests, "
+                             f"{self.messages_dropped} dropped")
         
-        # Return True if at least one message was sent successfully
-        return success_count > 0
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def open(self) -> bool:
+        """
+        Start the outbox worker and connect to Telegram ahead of the first message
+    
+        Returns:
+            True if Telegram answered getMe (False when disabled or unreachable)
+        """
+        if not self.enabled:
+            return False
+    
+        self._ensure_worker()
+        try:
+            async with self._get_session().get(f"{self.api_url}/bot{self.bot_token}/getMe") as response:
+                await response.read()
+                if response.status != 200:
+                    self.logger.warning(f"Telegram getMe returned {response.status}")
+                return response.status == 200
+        except Exception as e:
+            self.logger.warning(f"Could not reach Telegram: {e}")
+            return False
+    
+    def _ensure_worker(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._outbox = asyncio.Queue(maxsize=self.outbox_size)
+            self._flush = asyncio.Event()
+            self._worker = loop.create_task(self._run_outbox())
+            if self._session is not None and not self._session.closed:
+                # The old worker's session can't be reused; close it rather than leak its connector
+                task = loop.create_task(self._close_session(self._session))
+                self._closing.add(task)
+                task.add_done_callback(self._closing.discard)
+            self._session = None
+        return self._outbox
+    
+    async def _close_session(self, session: aiohttp.ClientSession):
+        """Close a replaced session (one from a finished event loop is still marked closed)"""
+        try:
+            await session.close()
+        except Exception as e:
+            self.logger.debug(f"Error closing previous Telegram session: {e}")
+    
+    async def _run_outbox(self):
+        """Deliver queued messages in order, merging those raised within the coalescing window"""
+        while True:
+            batch = [await self._outbox.get()]
+            try:
+                if self.coalesce_window > 0:
+                    if not self._flush.is_set():
+                        try:
+                            await asyncio.wait_for(self._flush.wait(), self.coalesce_window)
+                        except asyncio.TimeoutError:
+                            pass
+                    while not self._outbox.empty():
+                        batch.append(self._outbox.get_nowait())
+                
+                for message, parse_mode in self._digests(batch):
+                    await self.deliver(message, parse_mode)
+            except Exception as e:
+                self.logger.error(f"Error delivering Telegram message: {e}")
+            finally:
+                for _ in batch:
+                    self._outbox.task_done()
+    
+    def _digests(self, batch: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Merge consecutive messages with the same parse mode, within Telegram's length limit"""
+        digests: List[Tuple[List[str], str, int]] = []
+        for message, parse_mode in batch:
+            message = message.strip()
+            if digests:
+                parts, mode, length = digests[-1]
+                added = len(DIGEST_SEPARATOR) + len(message)
+                if mode == parse_mode and length + added <= TELEGRAM_MAX_LENGTH:
+                    parts.append(message)
+                    digests[-1] = (parts, mode, length + added)
+                    continue
+            digests.append(([message], parse_mode, len(message)))
+        
+        merged = []
+        for parts, parse_mode, _ in digests:
+            if len(parts) > 1:
+                self.messages_coalesced += len(parts)
+                self.digests_sent += 1
+            merged.append((DIGEST_SEPARATOR.join(parts), parse_mode))
+        return merged
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        return self._session
     
     async def _send_to_single_chat(self, chat_id: str, message: str, parse_mode: str = "HTML") -> bool:
-        """Send message to a single chat"""
-        url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        """Send message to a single chat, retrying on rate limits and server errors"""
+        url = f"{self.api_url}/bot{self.bot_token}/sendMessage"
         
         data = {
             'chat_id': chat_id,
@@ -51,19 +257,38 @@ class TelegramNotifier:
             'parse_mode': parse_mode
         }
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=data) as response:
+        for attempt in range(self.max_retries + 1):
+            retry_after = self.retry_delay * (2 ** attempt)
+            try:
+                await self.scheduler.acquire(chat_id)
+                async with self._get_session().post(url, json=data) as response:
                     if response.status == 200:
                         self.logger.debug(f"Telegram message sent successfully to {chat_id}")
                         return True
-                    else:
+                    
+                    if response.status == 429:
+                        try:
+                            body = await response.json(content_type=None)
+                            retry_after = float(body.get('parameters', {}).get('retry_after', retry_after))
+                        except Exception:
+                            pass
+                        self.scheduler.penalize(chat_id, retry_after)
+                        continue
+                    
+                    if response.status < 500:
                         self.logger.error(f"Failed to send Telegram message to {chat_id}: {response.status}")
                         return False
+                    
+                    self.logger.warning(f"Telegram returned {response.status} for {chat_id} - retrying")
                         
-        except Exception as e:
-            self.logger.error(f"Error sending Telegram message to {chat_id}: {e}")
-            return False
+            except Exception as e:
+                self.logger.warning(f"Error sending Telegram message to {chat_id}: {e}")
+            
+            if attempt < self.max_retries:
+                await asyncio.sleep(retry_after)
+        
+        self.logger.error(f"Giving up on Telegram message to {chat_id} after {self.max_retries + 1} attempts")
+        return False
     
     async def send_trade_alert(self, action: str, symbol: str, quantity: int, price: float, order_type: str):
         """Send enhanced trade alert with better formatting"""
@@ -170,10 +395,10 @@ Pine Script in action! 🎯
 
 Please check the logs for more details.
         """
-        await self.send_message(message)
+        await self.send_message(message, critical=True)
     
-    async def send_status_update(self, status: str, details: str = ""):
-        """Send status update"""
+    async def send_status_update(self, status: str, details: str = "", critical: bool = False):
+        """Send status update (critical ones, e.g. shutdown, skip the coalescing window)"""
         
         status_emoji = {
             "Started": "🚀",
@@ -193,7 +418,7 @@ Please check the logs for more details.
 
 Bot is {"ready for action! 💪" if status == "Started" else "monitoring..."}
         """
-        await self.send_message(message)
+        await self.send_message(message, critical=critical)
     
     async def send_daily_summary(self, total_trades: int, winning_trades: int, 
                                total_pnl: float, best_trade: float, worst_trade: float):
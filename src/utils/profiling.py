@@ -0,0 +1,324 @@
+# ==================== src/utils/profiling.py ====================
+"""
+On-demand profiling of the running bot.
+
+Nothing is installed until profiling is requested, so a bot that never
+profiles pays nothing. A session is started and stopped with SIGUSR1
+(toggle) or the /debug/profile endpoints on the metrics server, runs for an
+optional time window and writes to data/profiles/ (off the event loop, via a
+worker thread):
+
+- 'cprofile': deterministic cProfile of the event loop thread (.prof for
+  pstats/snakeviz plus a text summary). Accurate call counts, noticeable
+  overhead.
+- 'sample': a background thread samples the event loop thread's stack
+  every few milliseconds and writes collapsed stacks (flamegraph.pl,
+  speedscope). Low overhead, safe to leave on for minutes.
+
+Both modes also record tracemalloc top allocators for the window.
+
+The HTTP controls only answer loopback clients unless a token is configured,
+in which case they require it (Authorization: Bearer <token>) from anyone.
+"""
+import asyncio
+import cProfile
+import hmac
+import io
+import logging
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+MODES = ('cprofile', 'sample')
+LOOPBACK = ('127.0.0.1', '::1')
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval from a background thread"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format: 'outer;inner;leaf count' per line"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
+
+
+class Profiler:
+    """Starts and stops profiling sessions and writes their reports"""
+
+    def __init__(self, output_dir: Union[str, Path], default_seconds: float = 30.0,
+                 default_mode: str = 'sample', sample_interval: float = 0.005, top_allocations: int = 25):
+        self.output_dir = Path(output_dir)
+        self.default_seconds = default_seconds
+        self.default_mode = default_mode
+        self.sample_interval = sample_interval
+        self.top_allocations = top_allocations
+        self.logger = logging.getLogger(__name__)
+
+        self.mode: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.last_reports: Dict[str, str] = {}
+
+        self._profile: Optional[cProfile.Profile] = None
+        self._sampler: Optional[StackSampler] = None
+        self._started_tracemalloc = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Set while a stopped session's reports are still being written
+        self._writing = False
+        self._stop_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.mode is not None
+
+    def start(self, mode: Optional[str] = None, seconds: Optional[float] = None) -> bool:
+        """
+        Start a session on the calling (event loop) thread
+
+        Args:
+            mode: 'cprofile' or 'sample' (default_mode if None)
+            seconds: Stop automatically after this long; 0 runs until stop()
+
+        Returns:
+            False if a session is already running or still writing its reports
+        """
+        if self.running or self._writing:
+            return False
+        mode = mode or self.default_mode
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracemalloc = True
+
+        if mode == 'cprofile':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            self._sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            self._sampler.start()
+
+        self.mode = mode
+        self.started_at = time.monotonic()
+
+        seconds = self.default_seconds if seconds is None else seconds
+        if seconds:
+            try:
+                self._timer = asyncio.get_running_loop().call_later(seconds, self._stop_in_background)
+            except RuntimeError:
+                self._timer = None
+
+        self.logger.warning(f"🔬 Profiling started ({mode}{f', {seconds:.0f}s' if seconds else ''})")
+        return True
+
+    def stop(self) -> Dict[str, str]:
+        """
+        Stop the session and write its reports on the calling thread
+
+        Blocks while the reports are written; on the event loop use stop_async.
+
+        Returns:
+            Report name -> file path (empty if no session was running)
+        """
+        session = self._detach()
+        return self._write_reports(session) if session else {}
+
+    async def stop_async(self) -> Dict[str, str]:
+        """Stop the session on the event loop and write its reports in a worker thread"""
+        session = self._detach()
+        return await asyncio.to_thread(self._write_reports, session) if session else {}
+
+    def _stop_in_background(self):
+        """Stop from a loop callback (timer, signal handler), which can't await"""
+        try:
+            self._stop_task = asyncio.get_running_loop().create_task(self.stop_async())
+        except RuntimeError:
+            self.stop()
+
+    def _detach(self) -> Optional[Dict]:
+        """
+        End the session's collection on the thread that started it
+
+        cProfile hooks only the thread that enabled it, so it has to be
+        disabled here; everything slow is left to _write_reports.
+        """
+        if not self.running:
+            return None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._profile is not None:
+            self._profile.disable()
+
+        session = {
+            'elapsed': time.monotonic() - self.started_at,
+            'base': self.output_dir / f"profile_{datetime.now():%Y%m%d_%H%M%S}_{self.mode}",
+            'profile': self._profile,
+            'sampler': self._sampler,
+            'started_tracemalloc': self._started_tracemalloc
+        }
+        self._profile = None
+        self._sampler = None
+        self._started_tracemalloc = False
+        self.mode = None
+        self.started_at = None
+        self._writing = True
+        return session
+
+    def _write_reports(self, session: Dict) -> Dict[str, str]:
+        """Write a detached session's reports (safe to run off the event loop)"""
+        elapsed = session['elapsed']
+        base = session['base']
+        profile: Optional[cProfile.Profile] = session['profile']
+        sampler: Optional[StackSampler] = session['sampler']
+        reports = {}
+        if sampler is not None:
+            sampler.stop()
+
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+
+            if profile is not None:
+                profile.dump_stats(f"{base}.prof")
+                summary = io.StringIO()
+                pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(50)
+                Path(f"{base}.txt").write_text(summary.getvalue(), encoding='utf-8')
+                reports.update({'stats': f"{base}.prof", 'summary': f"{base}.txt"})
+
+            if sampler is not None:
+                Path(f"{base}.collapsed").write_text(sampler.collapsed(), encoding='utf-8')
+                reports['stacks'] = f"{base}.collapsed"
+
+            if tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                lines = [f"Top {self.top_allocations} allocations by line after {elapsed:.1f}s"]
+                for stat in snapshot.statistics('lineno')[:self.top_allocations]:
+                    lines.append(str(stat))
+                Path(f"{base}_memory.txt").write_text('\n'.join(lines) + '\n', encoding='utf-8')
+                reports['memory'] = f"{base}_memory.txt"
+
+        except Exception as e:
+            self.logger.error(f"Failed to write profiling reports: {e}")
+
+        finally:
+            if session['started_tracemalloc']:
+                tracemalloc.stop()
+            self._writing = False
+
+        self.last_reports = reports
+        self.logger.warning(f"🔬 Profiling stopped after {elapsed:.1f}s - reports: {', '.join(reports.values())}")
+        return reports
+
+    def toggle(self):
+        """Start a default session, or stop the running one (reports are written in the background)"""
+        if self.running:
+            self._stop_in_background()
+        else:
+            self.start()
+
+    def status(self) -> Dict:
+        return {
+            'running': self.running,
+            'writing': self._writing,
+            'mode': self.mode,
+            'elapsed': round(time.monotonic() - self.started_at, 1) if self.running else None,
+            'last_reports': self.last_reports
+        }
+
+    def install_signal_handler(self, signum: Optional[int] = None) -> bool:
+        """Toggle profiling on SIGUSR1 (Unix only; must be called from the event loop)"""
+        signum = signum if signum is not None else getattr(signal, 'SIGUSR1', None)
+        if signum is None:
+            return False
+        try:
+            asyncio.get_running_loop().add_signal_handler(signum, self.toggle)
+            return True
+        except (NotImplementedError, RuntimeError) as e:
+            self.logger.warning(f"Profiling signal handler not installed: {e}")
+            return False
+
+    def control_routes(self, token: Optional[str] = None) -> List[Tuple[str, str, Callable]]:
+        """
+        aiohttp routes: GET /debug/profile, POST /debug/profile/start?mode=&seconds=, POST /debug/profile/stop
+
+        Args:
+            token: Bearer token required on every route; without one, only
+                loopback clients are answered
+        """
+        try:
+            from aiohttp import web
+        except ImportError:
+            return []
+
+        def allowed(request) -> bool:
+            if token:
+                supplied = request.headers.get('Authorization', '')
+                return hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode())
+            return request.remote in LOOPBACK
+
+        def guarded(handler):
+            async def route(request):
+                if not allowed(request):
+                    self.logger.warning(f"🔬 Refused profiling request from {request.remote}")
+                    return web.json_response({'error': 'forbidden'}, status=403)
+                return await handler(request)
+            return route
+
+        async def status(request):
+            return web.json_response(self.status())
+
+        async def start(request):
+            try:
+                seconds = request.query.get('seconds')
+                started = self.start(request.query.get('mode'), float(seconds) if seconds is not None else None)
+            except ValueError as e:
+                return web.json_response({'error': str(e)}, status=400)
+            return web.json_response(self.status(), status=200 if started else 409)
+
+        async def stop(request):
+            return web.json_response({'reports': await self.stop_async()})
+
+        return [
+            ('GET', '/debug/profile', guarded(status)),
+            ('POST', '/debug/profile/start', guarded(start)),
+            ('POST', '/debug/profile/stop', guarded(stop))
+        ]
@@ -0,0 +1,206 @@
+# ==================== src/utils/rate_limiter.py ====================
+"""
+Client-side rate limiting for the Upstox REST API.
+
+Requests are classified by endpoint (orders, quotes, history, everything
+else). All classes draw from a shared 'global' bucket set, and a class can
+have tighter buckets of its own. When tokens are scarce, waiting requests
+are granted in priority order, so an order placed during a burst of
+quote/history fetches goes out first.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Endpoint classes in priority order (lower value is served first)
+PRIORITIES = {
+    'order': 0,
+    'default': 1,
+    'quote': 2,
+    'history': 3
+}
+
+GLOBAL = 'global'
+
+
+def classify_endpoint(endpoint: str) -> str:
+    """Endpoint class used for rate limiting and priority"""
+    if endpoint.startswith('/order'):
+        return 'order'
+    if endpoint.startswith('/market-quote'):
+        return 'quote'
+    if endpoint.startswith('/historical-candle') or endpoint.startswith('/history'):
+        return 'history'
+    return 'default'
+
+
+def standard_limits(per_second: int, per_minute: int, per_30_minutes: int, safety: float = 0.9,
+                    class_limits: Optional[Dict[str, List[Tuple[int, float]]]] = None
+                    ) -> Dict[str, List[Tuple[int, float]]]:
+    """
+    The shared global limits, plus any tighter per-class limits
+
+    Args:
+        per_second / per_minute / per_30_minutes: Broker limits per API
+        safety: Fraction of each limit actually used, leaving headroom for clock skew
+        class_limits: Endpoint class -> [(requests, period_seconds)] for classes the
+            broker limits more tightly than the global budget (safety is applied too)
+    """
+    def scaled(windows):
+        return [(max(1, int(count * safety)), period) for count, period in windows if count > 0]
+
+    limits = {GLOBAL: scaled([(per_second, 1.0), (per_minute, 60.0), (per_30_minutes, 1800.0)])}
+    for name, windows in (class_limits or {}).items():
+        limits[name] = scaled(windows)
+    return limits
+
+
+class TokenBucket:
+    """Token bucket holding up to `capacity` tokens, refilled at capacity/period per second"""
+
+    __slots__ = ('capacity', 'period', 'rate', 'tokens', 'updated')
+
+    def __init__(self, capacity: int, period: float):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def drain(self, now: float, seconds: float):
+        """Empty the bucket so the next token arrives after `seconds` (used after a 429)"""
+        self.refill(now)
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+        self.updated = now
+
+
+class RequestScheduler:
+    """Grants request slots by priority within token bucket limits"""
+
+    def __init__(self, limits: Dict[str, List[Tuple[int, float]]]):
+        """
+        Args:
+            limits: Endpoint class (or 'global') -> list of (requests, period_seconds)
+        """
+        self.buckets: Dict[str, List[TokenBucket]] = {
+            name: [TokenBucket(count, period) for count, period in specs]
+            for name, specs in limits.items()
+        }
+        self.logger = logging.getLogger(__name__)
+
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+
+        # Counters for status reporting
+        self.granted: Dict[str, int] = {}
+        self.throttled: Dict[str, int] = {}
+
+    @property
+    def waiting(self) -> int:
+        """Requests queued for a slot"""
+        return len(self._waiters)
+
+    async def acquire(self, endpoint_class: str):
+        """Wait for a slot for one request of this endpoint class"""
+        if not self._waiters and self._try_grant(endpoint_class, time.monotonic()):
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        priority = PRIORITIES.get(endpoint_class, PRIORITIES['default'])
+        heapq.heappush(self._waiters, (priority, next(self._sequence), endpoint_class, future))
+        self.throttled[endpoint_class] = self.throttled.get(endpoint_class, 0) + 1
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = loop.create_task(self._pump())
+
+        # A cancelled waiter is skipped by the pump
+        await future
+
+    def penalize(self, endpoint_class: str, retry_after: float):
+        """Back off an endpoint class (and the global set) after the broker returned 429"""
+        now = time.monotonic()
+        for name in (endpoint_class, GLOBAL):
+            for bucket in self.buckets.get(name, []):
+                bucket.drain(now, retry_after)
+        self.logger.warning(f"Rate limited on {endpoint_class} - backing off {retry_after:.2f}s")
+
+    def _wait_time(self, endpoint_class: str, now: float) -> float:
+        buckets = self.buckets.get(endpoint_class, []) + self.buckets.get(GLOBAL, [])
+        return max((bucket.wait_time(now) for bucket in buckets), default=0.0)
+
+    def _global_wait(self, now: float) -> float:
+        return max((bucket.wait_time(now) for bucket in self.buckets.get(GLOBAL, [])), default=0.0)
+
+    def _try_grant(self, endpoint_class: str, now: float) -> bool:
+        if self._wait_time(endpoint_class, now) > 0:
+            return False
+        for bucket in self.buckets.get(endpoint_class, []) + self.buckets.get(GLOBAL, []):
+            bucket.take()
+        self.granted[endpoint_class] = self.granted.get(endpoint_class, 0) + 1
+        return True
+
+    async def _pump(self):
+        """Grant queued requests in priority order as tokens become available"""
+        while self._waiters:
+            self._wakeup.clear()
+            now = time.monotonic()
+            next_wait = None
+            # Waiters held back only by their own class's buckets; lower priorities may go past them
+            deferred = []
+            blocked_classes = set()
+
+            while self._waiters:
+                _, _, endpoint_class, future = self._waiters[0]
+                if future.done():
+                    heapq.heappop(self._waiters)
+                    continue
+
+                if endpoint_class not in blocked_classes:
+                    if self._try_grant(endpoint_class, now):
+                        heapq.heappop(self._waiters)
+                        future.set_result(None)
+                        continue
+
+                    wait = self._wait_time(endpoint_class, now)
+                    next_wait = wait if next_wait is None else min(next_wait, wait)
+
+                    # A higher-priority request waiting on the shared budget keeps it for itself
+                    if self._global_wait(now) > 0:
+                        break
+                    blocked_classes.add(endpoint_class)
+
+                deferred.append(heapq.heappop(self._waiters))
+
+            for entry in deferred:
+                heapq.heappush(self._waiters, entry)
+            if not self._waiters:
+                break
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=(next_wait or 0.0) + 0.001)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,210 @@
+# ==================== src/utils/startup.py ====================
+"""
+Startup timing
+
+Stages are timed from process start (read from /proc, so interpreter and
+import time count too), falling back to when this module was imported on
+platforms without /proc. The report lists each stage and the deferred
+imports (see src/utils/lazy_import.py) with what they cost when loaded.
+
+StartupGraph runs the bot's startup steps as a dependency graph, so steps
+that don't need each other (token check, connection warm-up, notifier
+session, strategy setup) overlap instead of running one after another.
+"""
+import asyncio
+import inspect
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.utils import lazy_import
+
+logger = logging.getLogger(__name__)
+
+_imported_at = time.perf_counter()
+# (stage, seconds since process start)
+stages: List[Tuple[str, float]] = []
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, or None if /proc isn't available"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Field 22 (starttime, in clock ticks since boot); comm may contain spaces so split after it
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _offset() -> float:
+    """perf_counter value corresponding to process start"""
+    age = process_age()
+    now = time.perf_counter()
+    return now - age if age is not None else _imported_at
+
+
+_process_start = _offset()
+
+
+def elapsed() -> float:
+    """Seconds since process start"""
+    return time.perf_counter() - _process_start
+
+
+def mark(stage: str) -> float:
+    """Record that a startup stage was reached; returns seconds since process start"""
+    seconds = elapsed()
+    stages.append((stage, seconds))
+    return seconds
+
+
+def report() -> Dict:
+    """Startup stages and deferred import costs"""
+    return {
+        'stages': {stage: round(seconds, 3) for stage, seconds in stages},
+        'deferred_loaded': {
+            name: {'at': round(started - _process_start, 3), 'seconds': round(seconds, 3)}
+            for name, (started, seconds) in sorted(lazy_import.loaded.items(), key=lambda item: item[1][0])
+        },
+        'deferred_pending': sorted(lazy_import.pending)
+    }
+
+
+def log_report():
+    """Log the startup stages and deferred imports"""
+    data = report()
+    for stage, seconds in data['stages'].items():
+        logger.info(f"⏱️ Startup: {stage} after {seconds:.3f}s")
+    if data['deferred_loaded']:
+        costs = ', '.join(f"{name} {info['seconds'] * 1000:.0f}ms" for name, info in data['deferred_loaded'].items())
+        logger.info(f"⏱️ Deferred imports loaded: {costs}")
+    if data['deferred_pending']:
+        logger.info(f"⏱️ Deferred imports not loaded yet: {', '.join(data['deferred_pending'])}")
+
+
+def load_deferred():
+    """
+    Load any deferred modules that haven't been used yet
+
+    Called once the bot is connected so the first candle doesn't pay for
+    importing numpy/pandas on the hot path.
+    """
+    names = sorted(lazy_import.pending)
+    started = time.perf_counter()
+    for name in names:
+        module = sys.modules.get(name)
+        if module is not None:
+            # Any attribute access runs the deferred module's code
+            getattr(module, '__name__')
+    if names:
+        logger.info(f"⏱️ Loaded deferred imports ({', '.join(names)}) in {time.perf_counter() - started:.3f}s")
+
+
+@dataclass
+class StartupStep:
+    """One node of a StartupGraph"""
+    name: str
+    func: Callable[[], Any]
+    after: Tuple[str, ...] = ()
+    required: bool = False
+
+
+class StartupGraph:
+    """
+    Run startup steps concurrently, each as soon as the steps it depends on are done
+
+    A step is a plain or async callable. It succeeds unless it raises or
+    returns False. Dependencies only order steps: a step still runs when an
+    optional step before it failed. When a required step fails, the steps
+    still running are cancelled and the ones not started are skipped.
+    Every step's duration is logged and marked as a startup stage.
+    """
+
+    def __init__(self):
+        self.steps: Dict[str, StartupStep] = {}
+        self.results: Dict[str, Any] = {}
+        # name -> (seconds since process start when the step began, seconds it took)
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        self.failed: Optional[str] = None
+
+    def add(self, name: str, func: Callable[[], Any], after: Sequence[str] = (), required: bool = False):
+        """
+        Add a step
+
+        Args:
+            name: Unique step name, used in logs and by other steps' `after`
+            func: Callable (sync or async) taking no arguments
+            after: Names of steps that must finish before this one starts
+            required: Abort startup if this step fails
+        """
+        if name in self.steps:
+            raise ValueError(f"Duplicate startup step: {name}")
+        self.steps[name] = StartupStep(name, func, tuple(after), required)
+
+    def _check(self):
+        """Raise ValueError on unknown dependencies or cycles"""
+        state: Dict[str, str] = {}
+
+        def visit(name: str, path: List[str]):
+            if state.get(name) == 'done':
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Startup steps form a cycle: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dependency in self.steps[name].after:
+                if dependency not in self.steps:
+                    raise ValueError(f"Startup step {name} depends on unknown step {dependency}")
+                visit(dependency, path + [name])
+            state[name] = 'done'
+
+        for name in self.steps:
+            visit(name, [])
+
+    async def _run_step(self, step: StartupStep, tasks: Dict[str, asyncio.Task]) -> bool:
+        if step.after:
+            # wait() rather than gather(): cancelling this step must not cancel its dependencies
+            await asyncio.wait([tasks[name] for name in step.after])
+
+        started = elapsed()
+        ok = False
+        try:
+            result = step.func()
+            if inspect.isawaitable(result):
+                result = await result
+            self.results[step.name] = result
+            ok = result is not False
+        except Exception as e:
+            logger.error(f"Startup step {step.name} failed: {e}")
+        seconds = elapsed() - started
+        self.timings[step.name] = (started, seconds)
+        stages.append((step.name, started + seconds))
+        logger.info(f"⏱️ Startup step {step.name}: {seconds:.3f}s{'' if ok else ' (failed)'}")
+
+        if not ok and step.required and self.failed is None:
+            self.failed = step.name
+            for name, task in tasks.items():
+                if name != step.name:
+                    task.cancel()
+        return ok
+
+    async def run(self) -> bool:
+        """Run all steps; returns False if a required step failed"""
+        self._check()
+        started = elapsed()
+        tasks: Dict[str, asyncio.Task] = {}
+        for step in self.steps.values():
+            tasks[step.name] = asyncio.create_task(self._run_step(step, tasks), name=f"startup:{step.name}")
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        skipped = [name for name in self.steps if name not in self.timings]
+        if skipped:
+            logger.warning(f"Startup steps cancelled after {self.failed} failed: {', '.join(skipped)}")
+        serial = sum(seconds for _, seconds in self.timings.values())
+        logger.info(f"⏱️ Startup graph finished in {elapsed() - started:.3f}s ({serial:.3f}s if run one after another)")
+        return self.failed is None
@@ -0,0 +1,216 @@
+# ==================== src/utils/tracing.py ====================
+"""
+Sampled latency traces from feed receipt to broker acknowledgement.
+
+A Trace is a compact list of (stage, perf_counter_ns) marks. The websocket
+manager starts one when a tick arrives (sampled) or when a tick completes a
+candle (always), marking decode, aggregation and Heikin Ashi conversion.
+Candle traces ride on the HA candle dict into the bot, which makes the
+trace current for the strategy round (mark('strategy_decision')). Order
+placement then marks 'order_submit' and 'broker_ack' through the context
+variable, without the trace being passed along explicitly.
+
+Finished traces are buffered and written off the event loop, either as
+Chrome trace events (open the file in chrome://tracing or Perfetto) or as
+one JSON object per trace (JSON lines).
+"""
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+# Stages in pipeline order, for reference when reading traces
+STAGES = ('sdk_callback', 'decode', 'aggregate', 'ha_convert', 'strategy_decision', 'order_submit', 'broker_ack')
+
+_current: contextvars.ContextVar = contextvars.ContextVar('trace', default=None)
+
+
+class Trace:
+    """Timestamps of one tick or candle passing through the pipeline"""
+
+    __slots__ = ('trace_id', 'kind', 'symbol', 'marks', 'finished')
+
+    def __init__(self, trace_id: int, kind: str, symbol: str, start_ns: int):
+        self.trace_id = trace_id
+        self.kind = kind
+        self.symbol = symbol
+        self.marks: List[Tuple[str, int]] = [('sdk_callback', start_ns)]
+        self.finished = False
+
+    def mark(self, stage: str, at_ns: Optional[int] = None):
+        if not self.finished:
+            self.marks.append((stage, at_ns if at_ns is not None else time.perf_counter_ns()))
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.marks[-1][1] - self.marks[0][1]) / 1e6
+
+
+class Tracer:
+    """Starts sampled traces and exports finished ones"""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, tick_sample_rate: float = 0.01,
+                 trace_candles: bool = True, export_format: str = 'chrome', flush_every: int = 50):
+        """
+        Args:
+            path: Output file; None disables tracing
+            tick_sample_rate: Fraction of plain ticks traced
+            trace_candles: Trace every tick that completes a candle
+            export_format: 'chrome' (trace event array) or 'jsonl'
+            flush_every: Finished traces buffered before they are written
+        """
+        self.path = Path(path) if path else None
+        self.tick_sample_rate = tick_sample_rate
+        self.trace_candles = trace_candles
+        self.export_format = export_format
+        self.flush_every = flush_every
+        self.logger = logging.getLogger(__name__)
+
+        self._ids = itertools.count(1)
+        self._buffer: List[Trace] = []
+        self._write_lock = threading.Lock()
+        self._thread_ids: Dict[str, int] = {}
+        # perf_counter_ns -> wall clock, for JSON-lines timestamps
+        self._wall_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+        self.traces_started = 0
+        self.traces_exported = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def sample_tick(self) -> bool:
+        """Whether to trace a tick that did not complete a candle"""
+        return self.path is not None and random.random() < self.tick_sample_rate
+
+    def start(self, kind: str, symbol: str, start_ns: int) -> Optional[Trace]:
+        """Begin a trace whose first mark (the SDK callback) was taken at start_ns"""
+        if self.path is None:
+            return None
+        self.traces_started += 1
+        return Trace(next(self._ids), kind, symbol, start_ns)
+
+    def finish(self, trace: Optional[Trace]):
+        if trace is None or trace.finished:
+            return
+        trace.finished = True
+        self._buffer.append(trace)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Write buffered traces, on a worker thread when called from the event loop"""
+        if not self._buffer or self.path is None:
+            return
+        batch, self._buffer = self._buffer, []
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if loop is not None:
+            loop.run_in_executor(None, self._write, batch)
+        else:
+            self._write(batch)
+
+    def _write(self, batch: List[Trace]):
+        try:
+            with self._write_lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                new_file = not self.path.exists() or self.path.stat().st_size == 0
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    if self.export_format == 'chrome':
+                        if new_file:
+                            # JSON array trace format; the closing bracket is optional
+                            f.write('[\n')
+                        for trace in batch:
+                            for event in self.chrome_events(trace):
+                                f.write(json.dumps(event) + ',\n')
+                    else:
+                        for trace in batch:
+                            f.write(json.dumps(self.to_record(trace)) + '\n')
+                self.traces_exported += len(batch)
+        except Exception as e:
+            self.logger.error(f"Failed to export traces: {e}")
+
+    def to_record(self, trace: Trace) -> Dict:
+        """JSON-lines record: stage offsets in ms from the SDK callback"""
+        start_ns = trace.marks[0][1]
+        return {
+            'trace_id': trace.trace_id,
+            'kind': trace.kind,
+            'symbol': trace.symbol,
+            'start': (start_ns + self._wall_offset_ns) / 1e9,
+            'stages': [[stage, round((at_ns - start_ns) / 1e6, 4)] for stage, at_ns in trace.marks],
+            'total_ms': round(trace.duration_ms, 4)
+        }
+
+    def chrome_events(self, trace: Trace) -> List[Dict]:
+        """Chrome 'complete' events on one row per symbol: the whole trace plus one slice per stage"""
+        events = []
+        tid = self._thread_ids.get(trace.symbol)
+        if tid is None:
+            tid = self._thread_ids[trace.symbol] = len(self._thread_ids) + 1
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': trace.symbol}})
+
+        start_ns = trace.marks[0][1]
+        args = {'trace_id': trace.trace_id}
+        events.append({
+            'name': f"{trace.kind} {trace.symbol}", 'cat': trace.kind, 'ph': 'X', 'pid': 1, 'tid': tid,
+            'ts': start_ns / 1000, 'dur': (trace.marks[-1][1] - start_ns) / 1000, 'args': args
+        })
+        for (_, previous_ns), (stage, at_ns) in zip(trace.marks, trace.marks[1:]):
+            events.append({
+                'name': stage, 'cat': trace.kind, 'ph': 'X', 'pid': 1, 'tid': tid,
+                'ts': previous_ns / 1000, 'dur': (at_ns - previous_ns) / 1000, 'args': args
+            })
+        return events
+
+
+# Disabled until configure_tracing() is called
+tracer = Tracer()
+
+
+def configure_tracing(path: Optional[Union[str, Path]], tick_sample_rate: float = 0.01,
+                      export_format: str = 'chrome', flush_every: int = 50) -> Tracer:
+    """Point the module tracer at an output file (None disables tracing)"""
+    tracer.flush()
+    tracer.path = Path(path) if path else None
+    tracer.tick_sample_rate = tick_sample_rate
+    tracer.export_format = export_format
+    tracer.flush_every = flush_every
+    return tracer
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def mark(stage: str):
+    """Mark a stage on the trace current in this task, if any"""
+    trace = _current.get()
+    if trace is not None:
+        trace.mark(stage)
+
+
+@contextmanager
+def follow(trace: Optional[Trace]):
+    """Make a trace current for the block (and tasks it creates), finishing it afterwards"""
+    if trace is None:
+        yield None
+        return
+
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        tracer.finish(trace)
@@ -0,0 +1,250 @@
+# ==================== src/websocket/synthetic_feed.py ====================
+"""
+Synthetic Upstox market feed for load and soak testing.
+
+SyntheticFeed produces messages shaped like the decoded V3 market data feed
+(plain 'ltpc', full 'indexFF' or full 'marketFF' with five-level depth) for
+any number of instruments, with random-walk prices. FeedDriver pushes them
+into a message handler - normally WebSocketManager._on_market_message - at a
+target tick rate on the running event loop, so candle callbacks and strategy
+tasks run exactly as they do with the live feed.
+
+The driver measures how long the handler takes per message, the rate it
+actually sustained and the process's resident memory, logging a line per
+report interval and returning a summary at the end.
+"""
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+FEED_TYPES = ('ltpc', 'index', 'market')
+
+INDEX_KEYS = ['NSE_INDEX|Nifty 50', 'NSE_INDEX|Nifty Bank', 'BSE_INDEX|SENSEX']
+
+
+def rss_bytes() -> int:
+    """Current resident set size (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return 0
+
+
+class SyntheticFeed:
+    """Generates Upstox-shaped feed messages with random-walk prices"""
+
+    def __init__(self, instruments: int = 3, feed_type: str = 'index', volatility: float = 0.0002,
+                 ticks_per_message: int = 1, depth_levels: int = 5, seed: Optional[int] = None,
+                 keys: Optional[List[str]] = None, prices: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            instruments: Number of instruments; index feeds start with the real index keys
+            feed_type: 'ltpc', 'index' (fullFeed.indexFF) or 'market' (fullFeed.marketFF with depth)
+            volatility: Standard deviation of each tick's relative price change
+            ticks_per_message: Instrument updates batched into one message
+            depth_levels: Bid/ask levels in market feeds
+            keys: Explicit instrument keys (overrides instruments)
+            prices: Starting prices by key (random where missing)
+        """
+        if feed_type not in FEED_TYPES:
+            raise ValueError(f"Unknown feed type: {feed_type}")
+        self.feed_type = feed_type
+        self.volatility = volatility
+        self.depth_levels = depth_levels
+        self.random = random.Random(seed)
+
+        if keys:
+            self.keys = list(keys)
+        elif feed_type == 'market':
+            self.keys = [f"NSE_FO|{40000 + i}" for i in range(instruments)]
+        else:
+            self.keys = INDEX_KEYS[:instruments] + [f"NSE_INDEX|SYN {i}" for i in range(len(INDEX_KEYS), instruments)]
+        self.ticks_per_message = max(1, min(ticks_per_message, len(self.keys)))
+
+        low, high = (50, 500) if feed_type == 'market' else (20000, 80000)
+        prices = prices or {}
+        self.prices = [prices.get(key) or self.random.uniform(low, high) for key in self.keys]
+        self.close_prices = list(self.prices)
+
+        self._next = 0
+        self.messages = 0
+        self.ticks = 0
+
+    def message(self) -> Dict:
+        """Next feed message, advancing the prices of the instruments it carries"""
+        now_ms = str(int(time.time() * 1000))
+        feeds = {}
+        for _ in range(self.ticks_per_message):
+            i = self._next
+            self._next = (i + 1) % len(self.keys)
+            price = self.prices[i] * (1 + self.random.gauss(0, self.volatility))
+            self.prices[i] = price
+            feeds[self.keys[i]] = self._instrument_feed(round(price, 2), self.close_prices[i], now_ms)
+
+        self.messages += 1
+        self.ticks += len(feeds)
+        return {'type': 'live_feed', 'feeds': feeds, 'currentTs': now_ms}
+
+    def _instrument_feed(self, price: float, close_price: float, now_ms: str) -> Dict:
+        ltpc = {'ltp': price, 'ltt': now_ms, 'ltq': str(self.random.randint(1, 20) * 75), 'cp': close_price}
+        if self.feed_type == 'ltpc':
+            return {'ltpc': ltpc}
+
+        ohlc = {'marketOHLC': {'ohlc': [{'interval': 'I1', 'open': close_price, 'high': max(price, close_price),
+                                         'low': min(price, close_price), 'close': price, 'ts': now_ms}]}}
+        if self.feed_type == 'index':
+            return {'fullFeed': {'indexFF': {'ltpc': ltpc, **ohlc}}}
+
+        tick = 0.05
+        depth = [
+            {'bidQ': str(self.random.randint(1, 40) * 75), 'bidP': round(price - tick * (level + 1), 2),
+             'askQ': str(self.random.randint(1, 40) * 75), 'askP': round(price + tick * (level + 1), 2)}
+            for level in range(self.depth_levels)
+        ]
+        return {'fullFeed': {'marketFF': {
+            'ltpc': ltpc,
+            'marketLevel': {'bidAskQuote': depth},
+            **ohlc,
+            'atp': price,
+            'vtt': str(self.ticks * 75),
+            'oi': 150000.0,
+            'tbq': 250000.0,
+            'tsq': 240000.0
+        }}}
+
+
+class FeedDriver:
+    """Feeds a handler at a target tick rate and reports throughput, latency and memory"""
+
+    def __init__(self, handler: Callable[[Dict], None], feed: SyntheticFeed, rate: float = 1000.0,
+                 report_interval: float = 60.0, batch_interval: float = 0.005, reservoir_size: int = 100_000):
+        """
+        Args:
+            handler: Called with each message on the event loop (e.g. WebSocketManager._on_market_message)
+            rate: Target ticks per second across all instruments
+            report_interval: Seconds between progress lines
+            batch_interval: Pacing granularity; messages due in this window are sent back to back
+            reservoir_size: Handler latencies kept for whole-run percentiles
+        """
+        self.handler = handler
+        self.feed = feed
+        self.rate = rate
+        self.report_interval = report_interval
+        self.batch_interval = batch_interval
+        self.reservoir_size = reservoir_size
+        self.logger = logging.getLogger(__name__)
+
+        self.intervals: List[Dict] = []
+        self._reservoir: List[int] = []
+        self._observed = 0
+        self._random = random.Random(0)
+
+    async def run(self, duration: float) -> Dict:
+        """Drive the feed for duration seconds and return the summary"""
+        message_rate = self.rate / self.feed.ticks_per_message
+        start = time.perf_counter()
+        rss_start = rss_peak = rss_bytes()
+        sent = errors = 0
+
+        interval_start, interval_sent = start, 0
+        interval_latencies: List[int] = []
+
+        while True:
+            now = time.perf_counter()
+            elapsed = now - start
+            if elapsed >= duration:
+                break
+
+            due = int(elapsed * message_rate) - sent
+            for _ in range(due):
+                message = self.feed.message()
+                began = time.perf_counter_ns()
+                try:
+                    self.handler(message)
+                except Exception as e:
+                    errors += 1
+                    self.logger.debug(f"Feed handler error: {e}")
+                latency = time.perf_counter_ns() - began
+                interval_latencies.append(latency)
+                self._sample(latency)
+            sent += max(due, 0)
+            interval_sent += max(due, 0)
+
+            if now - interval_start >= self.report_interval:
+                rss = rss_bytes()
+                rss_peak = max(rss_peak, rss)
+                self._report(now - start, now - interval_start, interval_sent, interval_latencies, rss, rss_start)
+                interval_start, interval_sent, interval_latencies = now, 0, []
+
+            # Sleeping (rather than spinning) lets scheduled candle callbacks run between batches
+            await asyncio.sleep(self.batch_interval)
+
+        elapsed = time.perf_counter() - start
+        rss_end = rss_bytes()
+        if interval_latencies:
+            self._report(elapsed, time.perf_counter() - interval_start, interval_sent, interval_latencies,
+                         rss_end, rss_start)
+
+        summary = {
+            'duration': round(elapsed, 3),
+            'feed_type': self.feed.feed_type,
+            'instruments': len(self.feed.keys),
+            'target_tick_rate': self.rate,
+            'messages': sent,
+            'ticks': sent * self.feed.ticks_per_message,
+            'handler_errors': errors,
+            'achieved_message_rate': round(sent / elapsed, 1) if elapsed else 0.0,
+            'latency_us': self._percentiles(self._reservoir),
+            'rss_start_mb': round(rss_start / 2**20, 1),
+            'rss_end_mb': round(rss_end / 2**20, 1),
+            'rss_peak_mb': round(max(rss_peak, rss_end) / 2**20, 1),
+            'rss_growth_mb': round((rss_end - rss_start) / 2**20, 1),
+            'intervals': self.intervals
+        }
+        summary['achieved_tick_rate'] = round(summary['ticks'] / elapsed, 1) if elapsed else 0.0
+        return summary
+
+    def _sample(self, latency: int):
+        # Reservoir sampling keeps whole-run percentiles bounded in memory over multi-hour runs
+        self._observed += 1
+        if len(self._reservoir) < self.reservoir_size:
+            self._reservoir.append(latency)
+        else:
+            slot = self._random.randrange(self._observed)
+            if slot < self.reservoir_size:
+                self._reservoir[slot] = latency
+
+    def _report(self, elapsed: float, window: float, sent: int, latencies: List[int], rss: int, rss_start: int):
+        percentiles = self._percentiles(latencies)
+        interval = {
+            'elapsed': round(elapsed, 1),
+            'message_rate': round(sent / window, 1) if window else 0.0,
+            'latency_us': percentiles,
+            'rss_mb': round(rss / 2**20, 1)
+        }
+        self.intervals.append(interval)
+        self.logger.info(f"📡 {elapsed:,.0f}s: {interval['message_rate']:,.0f} msg/s | "
+                         f"p50 {percentiles['p50']}us p99 {percentiles['p99']}us max {percentiles['max']}us | "
+                         f"RSS {interval['rss_mb']}MB ({(rss - rss_start) / 2**20:+.1f}MB)")
+
+    @staticmethod
+    def _percentiles(latencies_ns: List[int]) -> Dict[str, float]:
+        if not latencies_ns:
+            return {'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'p999': 0.0, 'max': 0.0}
+        values = np.asarray(latencies_ns) / 1000
+        p50, p90, p99, p999 = np.percentile(values, [50, 90, 99, 99.9])
+        return {'p50': round(float(p50), 1), 'p90': round(float(p90), 1), 'p99': round(float(p99), 1),
+                'p999': round(float(p999), 1), 'max': round(float(values.max()), 1)}
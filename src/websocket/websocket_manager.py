@@ -2,34 +2,37 @@
 import logging
 import asyncio
 from datetime import datetime, timedelta, time
+from time import perf_counter_ns
 from typing import Dict, List, Optional, Callable, Optional
-import pandas as pd
-import numpy as np
 from collections import defaultdict, deque
 import json
 import threading
-import pytz
 
+from src.utils.hot_log import get_hot_logger
+from src.utils.lazy_import import lazy_import
+from src.utils.metrics import metrics
+from src.utils.tracing import tracer
 
+# Deferred until the first timezone lookup / stream connect, so importing the bot stays fast
+pytz = lazy_import('pytz')
+upstox_client = lazy_import('upstox_client', optional=True)
+UPSTOX_SDK_AVAILABLE = upstox_client is not None
 
-try:
-    import upstox_client
-    from upstox_client.rest import ApiException
-    UPSTOX_SDK_AVAILABLE = True
-except ImportError:
-    UPSTOX_SDK_AVAILABLE = False
-    
 
 class MarketHoursChecker:
     """Check if Indian stock market is open"""
     
-    def __init__(self):
+    def __init__(self, always_open: bool = False):
         self.ist_timezone = pytz.timezone('Asia/Kolkata')
         self.market_open_time = time(9, 15)  # 9:15 AM
         self.market_close_time = time(15, 30)  # 3:30 PM
+        self.always_open = always_open  # Synthetic feeds and mock brokers run at any hour
     
     def is_market_open(self):
         """Check if market is currently open"""
+        if self.always_open:
+            return True
+        
         current_time = datetime.now(self.ist_timezone)
         current_time_only = current_time.time()
         current_day = current_time.weekday()
@@ -215,16 +218,25 @@ class HeikinAshiConverter:
 class WebSocketManager:
     """Enhanced WebSocket Manager with persistent candle storage"""
     
-    def __init__(self, api_key: str, access_token: str):
+    def __init__(self, api_key: str, access_token: str, api_host: Optional[str] = None,
+                 require_sdk: bool = True):
+        """
+        Args:
+            require_sdk: Set False to drive the message handlers directly
+                (soak tests, synthetic feeds) without upstox-python-sdk;
+                the streams still need the SDK to start
+        """
         self.api_key = api_key
         self.access_token = access_token
+        self.api_host = api_host  # Overrides the SDK's API host, e.g. for a local mock broker
         self.logger = logging.getLogger(__name__)
+        self.hot = get_hot_logger(__name__)
         self.market_checker = MarketHoursChecker()
         self.last_market_status_check = datetime.now()
         
         
         # Check if Upstox SDK is available
-        if not UPSTOX_SDK_AVAILABLE:
+        if require_sdk and not UPSTOX_SDK_AVAILABLE:
             raise ImportError("upstox-python-sdk is required for websocket functionality. Install with: pip install upstox-python-sdk")
         
         # Initialize components
@@ -291,6 +303,8 @@ class WebSocketManager:
             # Configure Upstox client
             configuration = upstox_client.Configuration()
             configuration.access_token = self.access_token
+            if self.api_host:
+                configuration.host = self.api_host
             
             # Initialize market data streamer
             self.market_streamer = upstox_client.MarketDataStreamerV3(
@@ -321,6 +335,8 @@ class WebSocketManager:
             # Configure Upstox client
             configuration = upstox_client.Configuration()
             configuration.access_token = self.access_token
+            if self.api_host:
+                configuration.host = self.api_host
             
             # Initialize portfolio data streamer
             self.portfolio_streamer = upstox_client.PortfolioDataStreamer(
@@ -390,6 +406,7 @@ class WebSocketManager:
     
     def _on_market_message(self, message):
         """Process incoming market data with MARKET HOURS CHECK"""
+        callback_ns = perf_counter_ns()
         try:
             # 🚨 CRITICAL FIX: CHECK MARKET HOURS FIRST 🚨
             current_time = datetime.now()
@@ -435,11 +452,12 @@ class WebSocketManager:
                     if 'ltpc' in data:
                         ltpc_data = data['ltpc']
                     
-                    # Method 2: Try nested structure (for full feed)
+                    # Method 2: Try nested structure (indexFF for indices, marketFF for F&O/equity full feed)
                     elif 'fullFeed' in data:
                         full_feed = data['fullFeed']
-                        if 'indexFF' in full_feed and 'ltpc' in full_feed['indexFF']:
-                            ltpc_data = full_feed['indexFF']['ltpc']
+                        instrument_feed = full_feed.get('indexFF') or full_feed.get('marketFF')
+                        if instrument_feed and 'ltpc' in instrument_feed:
+                            ltpc_data = instrument_feed['ltpc']
                     
                     # Process the LTPC data correctly
                     if ltpc_data and 'ltp' in ltpc_data:
@@ -449,6 +467,8 @@ class WebSocketManager:
                         
                         # Get symbol name
                         symbol = self._get_symbol_from_key(instrument_key)
+                        decoded_ns = perf_counter_ns()
+                        metrics.ticks.inc(symbol)
                         
                         # Create tick data
                         tick_data = {
@@ -464,9 +484,23 @@ class WebSocketManager:
                         
                         # PROCESS CANDLE AGGREGATION (only during market hours)
                         completed_candle = self.candle_aggregator.process_tick(symbol, tick_data)
+                        aggregated_ns = perf_counter_ns()
+                        
+                        trace = None
+                        if completed_candle and tracer.trace_candles:
+                            trace = tracer.start('candle', symbol, callback_ns)
+                        elif tracer.sample_tick():
+                            trace = tracer.start('tick', symbol, callback_ns)
+                        if trace is not None:
+                            trace.mark('decode', decoded_ns)
+                            trace.mark('aggregate', aggregated_ns)
+                            if not completed_candle:
+                                tracer.finish(trace)
                         
                         if completed_candle:
-                            self.logger.info(f"NEW CANDLE - {symbol}: O:{completed_candle['open']:.2f} H:{completed_candle['high']:.2f} L:{completed_candle['low']:.2f} C:{completed_candle['close']:.2f}")
+                            self.hot.info('new_candle', "NEW CANDLE - %s: O:%.2f H:%.2f L:%.2f C:%.2f", symbol,
+                                          completed_candle['open'], completed_candle['high'],
+                                          completed_candle['low'], completed_candle['close'])
                             
                             # Store in PERSISTENT storage
                             if symbol not in self.persistent_candles:
@@ -482,8 +516,16 @@ class WebSocketManager:
                             
                             # CONVERT TO HEIKIN ASHI
                             ha_candle = self.ha_converter.convert_candle(symbol, completed_candle)
+                            ready_ns = perf_counter_ns()
+                            ha_candle['ready_at'] = ready_ns / 1e9
+                            metrics.tick_to_candle.observe((ready_ns - callback_ns) / 1e9)
+                            metrics.candles.inc(symbol)
+                            if trace is not None:
+                                trace.mark('ha_convert', ready_ns)
                             
-                            self.logger.info(f"HA CANDLE - {symbol}: O:{ha_candle['ha_open']:.2f} H:{ha_candle['ha_high']:.2f} L:{ha_candle['ha_low']:.2f} C:{ha_candle['ha_close']:.2f}")
+                            self.hot.info('ha_candle', "HA CANDLE - %s: O:%.2f H:%.2f L:%.2f C:%.2f", symbol,
+                                          ha_candle['ha_open'], ha_candle['ha_high'],
+                                          ha_candle['ha_low'], ha_candle['ha_close'])
                             
                             # Store in PERSISTENT HA storage
                             if symbol not in self.persistent_ha_candles:
@@ -500,7 +542,7 @@ class WebSocketManager:
                             # SHOW CANDLE COUNT PROGRESS
                             candle_count = len(self.persistent_ha_candles[symbol])
                             if candle_count < 15:
-                                self.logger.info(f"Building data for {symbol}: {candle_count}/15 HA candles collected")
+                                self.hot.info('building_data', "Building data for %s: %d/15 HA candles collected", symbol, candle_count)
                             elif candle_count == 15:
                                 self.logger.info(f"READY! {symbol} has enough data (15 candles) - Strategy can now analyze!")
                             
@@ -509,15 +551,19 @@ class WebSocketManager:
                                 # Add candle history to the HA candle
                                 ha_candle['candle_history'] = self.persistent_ha_candles[symbol].copy()
                                 ha_candle['symbol'] = symbol
+                                # The bot continues the trace through strategy evaluation and order placement
+                                ha_candle['trace'] = trace
                                 
                                 # Schedule callback (will be improved in Step 4)
                                 try:
                                     import asyncio
                                     loop = asyncio.get_running_loop()
                                     loop.create_task(self.on_ha_candle_callback(ha_candle))
-                                    self.logger.info(f"STRATEGY CALLBACK SCHEDULED for {symbol}")
+                                    self.hot.debug('callback_scheduled', "STRATEGY CALLBACK SCHEDULED for %s", symbol)
                                 except Exception as callback_error:
                                     self.logger.warning(f"Strategy callback scheduling issue: {callback_error}")
+                            else:
+                                tracer.finish(trace)
             
         except Exception as e:
             self.logger.error(f"Error processing market message: {e}")
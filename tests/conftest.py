@@ -0,0 +1,132 @@
+# ==================== tests/conftest.py ====================
+"""
+Benchmark harness for tests/test_benchmarks.py.
+
+Without --bench every benchmark body runs once, as a smoke test. With
+--bench each one is timed (timeit autorange, garbage collection off, best
+of several rounds), the results are written as JSON and compared with a
+stored baseline:
+
+    python -m pytest tests/test_benchmarks.py --bench                      # time and compare
+    python -m pytest tests/test_benchmarks.py --bench --bench-save-baseline # record a new baseline
+
+Baselines are machine specific, so they live under data/ rather than in git.
+"""
+import json
+import platform
+import statistics
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pytest
+
+_results: Dict[str, Dict] = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('bench', 'hot-path benchmarks')
+    group.addoption('--bench', action='store_true', help='Time benchmarks instead of running them once')
+    group.addoption('--bench-rounds', type=int, default=5, help='Timed rounds per benchmark')
+    group.addoption('--bench-json', default='data/benchmarks/latest.json', help='Where to write results')
+    group.addoption('--bench-baseline', default='data/benchmarks/baseline.json', help='Baseline to compare with')
+    group.addoption('--bench-save-baseline', action='store_true', help='Store this run as the baseline')
+    group.addoption('--bench-tolerance', type=float, default=0.25,
+                    help='Allowed slowdown of the median versus the baseline (0.25 = 25%%)')
+
+
+class Benchmark:
+    """Times a callable and checks it against the baseline"""
+
+    def __init__(self, config):
+        self.enabled = config.getoption('--bench')
+        self.rounds = config.getoption('--bench-rounds')
+        self.tolerance = config.getoption('--bench-tolerance')
+        self.compare = not config.getoption('--bench-save-baseline')
+        self.baseline = _load(config.getoption('--bench-baseline')) if self.enabled else {}
+
+    def __call__(self, name: str, func: Callable) -> Optional[Dict]:
+        """
+        Time func() and record the result under name
+
+        Returns:
+            Per-call statistics in seconds, or None when not benchmarking
+        """
+        if not self.enabled:
+            func()
+            return None
+
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        per_call = [total / number for total in timer.repeat(self.rounds, number)]
+        result = {
+            'min': min(per_call),
+            'median': statistics.median(per_call),
+            'mean': statistics.fmean(per_call),
+            'stdev': statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+            'ops_per_sec': 1 / statistics.median(per_call),
+            'calls_per_round': number,
+            'rounds': self.rounds
+        }
+        _results[name] = result
+
+        reference = self.baseline.get(name)
+        if self.compare and reference:
+            result['baseline_median'] = reference['median']
+            result['change'] = result['median'] / reference['median'] - 1
+            if result['change'] > self.tolerance:
+                pytest.fail(f"{name} regressed {result['change']:+.1%}: "
+                            f"{_format(result['median'])} vs baseline {_format(reference['median'])}")
+        return result
+
+
+@pytest.fixture(scope='session')
+def bench(request) -> Benchmark:
+    return Benchmark(request.config)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    config = session.config
+    if not config.getoption('--bench') or not _results:
+        return
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'benchmarks': _results
+    }
+    paths = [config.getoption('--bench-json')]
+    if config.getoption('--bench-save-baseline'):
+        paths.append(config.getoption('--bench-baseline'))
+    for path in paths:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(report, indent=2))
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not config.getoption('--bench') or not _results:
+        return
+
+    terminalreporter.section('benchmarks')
+    for name, result in _results.items():
+        change = f"  {result['change']:+.1%} vs baseline" if 'change' in result else ''
+        terminalreporter.write_line(f"{name:<40} {_format(result['median']):>10}/call "
+                                    f"{result['ops_per_sec']:>14,.0f} ops/s{change}")
+    terminalreporter.write_line(f"results written to {config.getoption('--bench-json')}")
+
+
+def _load(path: str) -> Dict[str, Dict]:
+    try:
+        return json.loads(Path(path).read_text()).get('benchmarks', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _format(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e3), ('us', 1e6)):
+        if seconds * scale >= 1:
+            return f"{seconds * scale:.2f}{unit}"
+    return f"{seconds * 1e9:.0f}ns"
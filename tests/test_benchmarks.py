@@ -0,0 +1,127 @@
+import asyncio
+import itertools
+
+import numpy as np
+
+from src.models.order import Order, OrderType, TransactionType
+from src.strategy.dispatcher import StrategyDispatcher
+from src.strategy.enhanced_pine_script_strategy import EnhancedPineScriptStrategy
+from src.strategy.pine_script_strategy import PineScriptStrategy
+from src.utils.position_sizing import PositionSizer
+from src.websocket.websocket_manager import CandleAggregator, HeikinAshiConverter, MarketHoursChecker, WebSocketManager
+
+# Benchmarks run once as smoke tests; see tests/conftest.py for timing them with --bench
+
+INSTRUMENTS = {'NSE_INDEX|Nifty 50': 24500.0, 'NSE_INDEX|Nifty Bank': 52000.0, 'BSE_INDEX|SENSEX': 80500.0}
+
+
+def _prices(n: int, start: float = 24500.0, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return start + np.cumsum(rng.normal(0, start * 0.0002, n))
+
+
+def _candles(n: int, seed: int = 7):
+    closes = _prices(n, seed=seed)
+    opens = np.concatenate(([closes[0]], closes[:-1]))
+    spread = np.abs(np.random.default_rng(seed + 1).normal(0, 5, n))
+    return [
+        {'open': o, 'high': max(o, c) + s, 'low': min(o, c) - s, 'close': c, 'volume': 1000}
+        for o, c, s in zip(opens, closes, spread)
+    ]
+
+
+def _ha_candles(n: int, seed: int = 7):
+    converter = HeikinAshiConverter()
+    return [converter.convert_candle('NIFTY', candle) for candle in _candles(n, seed)]
+
+
+def _feed_messages(n: int):
+    """Upstox full-feed messages with one LTPC update per instrument"""
+    paths = {key: _prices(n, start, seed) for seed, (key, start) in enumerate(INSTRUMENTS.items())}
+    return [
+        {'feeds': {key: {'fullFeed': {'indexFF': {'ltpc': {'ltp': float(prices[i]), 'ltt': '0', 'cp': float(prices[0])}}}}
+                   for key, prices in paths.items()}}
+        for i in range(n)
+    ]
+
+
+def test_bench_candle_aggregator_process_tick(bench):
+    aggregator = CandleAggregator(timeframe_minutes=1)
+    ticks = itertools.cycle([{'ltp': float(p), 'volume': 10} for p in _prices(1000)])
+    bench('candle_aggregator.process_tick', lambda: aggregator.process_tick('NIFTY', next(ticks)))
+    assert aggregator.get_current_candle('NIFTY')['tick_count'] >= 1
+
+
+def test_bench_heikin_ashi_convert_candle(bench):
+    converter = HeikinAshiConverter()
+    candles = itertools.cycle(_candles(1000))
+    bench('heikin_ashi.convert_candle', lambda: converter.convert_candle('NIFTY', next(candles)))
+    assert 'ha_close' in converter.get_latest_ha_candles('NIFTY', 1)[0]
+
+
+def test_bench_feed_parsing(bench):
+    # The manager is only used as a message parser here; nothing connects to Upstox
+    manager = WebSocketManager('key', 'token', require_sdk=False)
+    manager.market_checker = MarketHoursChecker(always_open=True)
+
+    messages = itertools.cycle(_feed_messages(1000))
+    bench('websocket._on_market_message', lambda: manager._on_market_message(next(messages)))
+    assert set(manager.latest_ticks) == {'NIFTY', 'BANKNIFTY', 'SENSEX'}
+
+
+def test_bench_indicators(bench):
+    strategy = EnhancedPineScriptStrategy('bench', {'trading_mode': 'BIDIRECTIONAL'})
+    history = _ha_candles(strategy.max_history)
+
+    bench('strategy.calculate_adx', lambda: strategy.calculate_adx(history))
+    bench('strategy.calculate_trend_line', lambda: strategy.calculate_trend_line(history))
+    assert strategy.calculate_adx(history)[0] is not None
+
+
+def test_bench_position_sizer(bench):
+    sizer = PositionSizer(20000)
+    prices = itertools.cycle([float(p) for p in _prices(1000, start=150.0)])
+    bench('position_sizer.calculate_position_size', lambda: sizer.calculate_position_size(next(prices)))
+    assert sizer.calculate_position_size(150.0)[0] >= 1
+
+
+def test_bench_order_construction_and_record(bench):
+    def make_order():
+        return Order('NIFTY', 1, 150.0, OrderType.MARKET, TransactionType.BUY, 'NSE_FO|40001', 'CE', 'bench', 'BIDIRECTIONAL')
+
+    bench('order.construct', make_order)
+    order = make_order()
+    bench('order.to_dict', order.to_dict)
+    assert order.to_dict()['transaction_type'] == 'BUY'
+
+
+def test_bench_candle_to_strategy_dispatch(bench):
+    dispatcher = StrategyDispatcher(deadline=1.0)
+    strategies = [
+        EnhancedPineScriptStrategy('enhanced', {'trading_mode': 'BIDIRECTIONAL'}),
+        PineScriptStrategy('pine', {})
+    ]
+    ha_candles = itertools.cycle(_ha_candles(1000))
+
+    def market_data():
+        ha_candle = next(ha_candles)
+        return {
+            'symbol': 'NIFTY', 'ha_candle': ha_candle, 'current_price': ha_candle['ha_close'],
+            'price': ha_candle['ha_close'], 'high': ha_candle['ha_high'], 'low': ha_candle['ha_low'],
+            'open': ha_candle['ha_open'], 'close': ha_candle['ha_close'], 'volume': ha_candle['volume']
+        }
+
+    loop = asyncio.new_event_loop()
+    try:
+        # Fill strategy histories so every timed round runs the full indicator path
+        for _ in range(60):
+            loop.run_until_complete(dispatcher.dispatch(strategies, lambda s: market_data(), lambda s: []))
+
+        def dispatch():
+            data = market_data()
+            return loop.run_until_complete(dispatcher.dispatch(strategies, lambda s: data, lambda s: []))
+
+        bench('dispatcher.dispatch', dispatch)
+        assert not dispatch().failed
+    finally:
+        loop.close()
@@ -0,0 +1,176 @@
+import asyncio
+import time
+
+import numpy as np
+
+from src.models.order import Order, OrderType, TransactionType
+from src.models.position import Position
+from src.strategy.base_strategy import BaseStrategy
+from src.strategy.dispatcher import StrategyDispatcher
+from src.strategy.enhanced_pine_script_strategy import EnhancedPineScriptStrategy
+from src.strategy.options_strategy import OptionsStrategy
+from src.utils.indicators import candles_to_columns
+
+
+def _ha_candles(n: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 1, n))
+    opens = closes + rng.normal(0, 0.5, n)
+    return [
+        {'ha_open': o, 'ha_high': max(o, c) + 0.5, 'ha_low': min(o, c) - 0.5, 'ha_close': c, 'volume': 1}
+        for o, c in zip(opens, closes)
+    ]
+
+
+def test_enhanced_batch_matches_per_event_indicators():
+    strategy = EnhancedPineScriptStrategy('batch', {'trading_mode': 'BIDIRECTIONAL'})
+    candles = _ha_candles(200)
+    signals = strategy.evaluate_batch(candles_to_columns(candles))
+
+    assert strategy.supports_batch
+    for t in range(len(candles)):
+        history = candles[max(0, t - strategy.max_history + 1):t + 1]
+        trend_line = strategy.calculate_trend_line(history)
+        adx = strategy.calculate_adx(history)[0]
+
+        if trend_line is None:
+            assert np.isnan(signals['trend_line'][t])
+        else:
+            assert abs(signals['trend_line'][t] - trend_line) < 1e-9
+        if adx is None:
+            assert np.isnan(signals['adx'][t])
+        else:
+            assert abs(signals['adx'][t] - adx) < 1e-9
+
+
+def test_options_batch_rsi_matches_per_event():
+    strategy = OptionsStrategy('rsi', {})
+    prices = 100 + np.cumsum(np.random.default_rng(2).normal(0, 1, 120))
+    signals = strategy.evaluate_batch({'close': prices})
+
+    for t in range(len(prices)):
+        history = list(prices[max(0, t - 99):t + 1])
+        assert abs(signals['rsi'][t] - strategy.calculate_rsi(history, strategy.rsi_period)) < 1e-9
+
+
+class _DelayedStrategy(BaseStrategy):
+    def __init__(self, name, delay):
+        super().__init__(name, {})
+        self.delay = delay
+
+    async def should_enter(self, market_data):
+        await asyncio.sleep(self.delay)
+        return Order(market_data['symbol'], 75, market_data['price'], OrderType.MARKET, TransactionType.BUY)
+
+    async def should_exit(self, position, market_data):
+        return Order(position.symbol, position.quantity, market_data['price'], OrderType.MARKET, TransactionType.SELL)
+
+
+def test_dispatcher_reports_late_strategies_and_submits_in_parallel():
+    dispatcher = StrategyDispatcher(deadline=0.05)
+    strategies = [_DelayedStrategy('fast', 0.0), _DelayedStrategy('slow', 1.0), _DelayedStrategy('also_fast', 0.01)]
+    position = Position('NIFTY', 75, 100.0, 100.0, 0.0, 0.0)
+    submitted = []
+
+    async def submit_entry(strategy, order):
+        await asyncio.sleep(0.05)
+        submitted.append(('entry', strategy.name))
+
+    async def submit_exit(strategy, position_key, position, order):
+        await asyncio.sleep(0.05)
+        submitted.append(('exit', strategy.name))
+
+    async def run():
+        start = time.perf_counter()
+        outcome = await dispatcher.dispatch(
+            strategies, lambda s: {'symbol': 'NIFTY', 'price': 101.0}, lambda s: [('NIFTY_CE', position)]
+        )
+        await dispatcher.submit(outcome, submit_entry, submit_exit)
+        return outcome, time.perf_counter() - start
+
+    outcome, elapsed = asyncio.run(run())
+
+    assert outcome.late == ['slow']
+    assert [r.strategy.name for r in outcome.results] == ['fast', 'also_fast']
+    # Two entries and one de-duplicated exit, placed together rather than one after another
+    assert sorted(submitted) == [('entry', 'also_fast'), ('entry', 'fast'), ('exit', 'fast')]
+    assert elapsed < 0.5
+    assert dispatcher.stats['slow']['late'] == 1
+
+
+def test_dropped_late_entry_does_not_block_the_next_signal():
+    strategy = EnhancedPineScriptStrategy('late', {'trading_mode': 'CE_ONLY'})
+    market_data = {'symbol': 'NIFTY', 'price': 100.0}
+
+    async def forced_ce_entry(data):
+        return await strategy._check_ce_entry(100.0, True, True, True, data)
+
+    strategy.should_enter = forced_ce_entry
+
+    async def run():
+        # Every evaluation misses a zero deadline, so the entry is dropped as stale
+        late = await StrategyDispatcher(deadline=0.0).dispatch([strategy], lambda s: market_data, lambda s: [])
+        assert late.late == ['late'] and late.results[0].entry_order is None
+        assert not strategy.in_ce_trade
+
+        return await StrategyDispatcher(deadline=1.0).dispatch([strategy], lambda s: market_data, lambda s: [])
+
+    outcome = asyncio.run(run())
+    assert outcome.results[0].entry_order.option_type == 'CE'
+    assert strategy.in_ce_trade
+
+
+def test_signal_time_follows_the_replay_clock():
+    from datetime import datetime
+    from src.backtest import EventDrivenBacktest, build_simulated_bot
+
+    strategy = EnhancedPineScriptStrategy('replayed', {'trading_mode': 'CE_ONLY'})
+    replay = EventDrivenBacktest(build_simulated_bot([strategy]))
+    replay.clock.set(datetime(2024, 1, 2, 10, 30))
+
+    order = asyncio.run(strategy._check_ce_entry(100.0, True, True, True, {'symbol': 'NIFTY', 'price': 100.0}))
+    assert order is not None
+    assert strategy.last_signal_time == datetime(2024, 1, 2, 10, 30)
+
+
+def test_candle_trace_follows_dispatch_to_order_ack(tmp_path):
+    import json
+    from src.utils import tracing
+
+    dispatcher = StrategyDispatcher(deadline=1.0)
+    strategies = [_DelayedStrategy('a', 0.0), _DelayedStrategy('b', 0.0)]
+
+    async def submit_entry(strategy, order):
+        tracing.mark('order_submit')
+        await asyncio.sleep(0.01)
+        tracing.mark('broker_ack')
+
+    async def run(trace):
+        with tracing.follow(trace):
+            outcome = await dispatcher.dispatch(strategies, lambda s: {'symbol': 'NIFTY', 'price': 101.0}, lambda s: [])
+            tracing.mark('strategy_decision')
+            await dispatcher.submit(outcome, submit_entry, None)
+        # Marks outside the traced block are ignored
+        tracing.mark('order_submit')
+
+    tracer = tracing.configure_tracing(tmp_path / 'trace.jsonl', tick_sample_rate=0.0, export_format='jsonl')
+    try:
+        trace = tracer.start('candle', 'NIFTY', time.perf_counter_ns())
+        for stage in ('decode', 'aggregate', 'ha_convert'):
+            trace.mark(stage)
+        asyncio.run(run(trace))
+        tracer.flush()
+
+        record = json.loads((tmp_path / 'trace.jsonl').read_text())
+        stages = [stage for stage, _ in record['stages']]
+        assert stages[:5] == ['sdk_callback', 'decode', 'aggregate', 'ha_convert', 'strategy_decision']
+        assert sorted(stages[5:]) == ['broker_ack', 'broker_ack', 'order_submit', 'order_submit']
+        offsets = [offset for _, offset in record['stages']]
+        assert offsets == sorted(offsets) and record['total_ms'] >= 10
+
+        # Chrome export: one row per symbol, a slice per stage
+        events = tracer.chrome_events(trace)
+        assert events[0]['ph'] == 'M' and events[0]['args'] == {'name': 'NIFTY'}
+        assert [e['name'] for e in events[2:5]] == ['decode', 'aggregate', 'ha_convert']
+    finally:
+        tracing.configure_tracing(None)
@@ -0,0 +1,309 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from src.upstox_client import UpstoxClient
+from src.utils.rate_limiter import RequestScheduler
+
+
+async def _serve(routes):
+    app = web.Application()
+    for method, path, handler in routes:
+        app.router.add_route(method, path, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def _client(tmp_path, port, **kwargs):
+    client = UpstoxClient('key', 'secret', 'http://localhost', **kwargs)
+    client.token_file = tmp_path / 'token.json'
+    client.base_url = f'http://127.0.0.1:{port}/v2'
+    client.access_token = 'token'
+    return client
+
+
+def test_requests_reuse_pooled_connection(tmp_path):
+    connections = []
+
+    async def profile(request):
+        connections.append(request.transport)
+        return web.json_response({'status': 'success'})
+
+    async def root(request):
+        connections.append(request.transport)
+        return web.json_response({'status': 'error'}, status=404)
+
+    async def run():
+        runner, port = await _serve([('GET', '/v2/user/profile', profile), ('GET', '/v2', root)])
+        client = _client(tmp_path, port, pool_size=2)
+        try:
+            assert await client.warm_up(1) == 1
+            for _ in range(5):
+                assert (await client.get_profile())['status'] == 'success'
+            assert await client.keep_warm() == 0
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+    # Warm-up and every request share one keep-alive connection
+    assert len(connections) == 6
+    assert len(set(map(id, connections))) == 1
+
+
+def test_scheduler_serves_orders_first_at_the_rate_limit():
+    # 4 requests per 0.2s shared budget
+    scheduler = RequestScheduler({'global': [(4, 0.2)]})
+    granted = []
+
+    async def request(endpoint_class, i):
+        await scheduler.acquire(endpoint_class)
+        granted.append((endpoint_class, i))
+
+    async def run():
+        start = time.monotonic()
+        tasks = [asyncio.ensure_future(request('history', i)) for i in range(10)]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.ensure_future(request('order', 0)))
+        await asyncio.gather(*tasks)
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+
+    # The order jumps the queued history fetches; 11 requests need 7 refilled tokens (~0.35s)
+    assert granted.index(('order', 0)) == 4
+    assert 0.3 < elapsed < 0.8
+
+
+def test_class_limits_hold_back_only_their_own_class():
+    from src.utils.rate_limiter import GLOBAL, standard_limits
+
+    assert set(standard_limits(50, 500, 2000)) == {GLOBAL}
+    limits = standard_limits(50, 500, 2000, safety=1.0, class_limits={'history': [(1, 10.0)]})
+    assert limits['history'] == [(1, 10.0)]
+
+    scheduler = RequestScheduler(limits)
+    granted = []
+
+    async def request(endpoint_class, i):
+        await scheduler.acquire(endpoint_class)
+        granted.append((endpoint_class, i))
+
+    async def run():
+        history = [asyncio.ensure_future(request('history', i)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(asyncio.gather(*(request('quote', i) for i in range(5))), 1)
+        for task in history:
+            task.cancel()
+        await asyncio.gather(*history, return_exceptions=True)
+
+    asyncio.run(run())
+
+    # One history slot per 10s; the queued history requests don't block quotes behind them
+    assert granted == [('history', 0)] + [('quote', i) for i in range(5)]
+
+
+def test_identical_gets_are_deduplicated_and_429_is_retried(tmp_path):
+    hits = {'quote': 0, 'profile': 0}
+
+    async def quote(request):
+        hits['quote'] += 1
+        await asyncio.sleep(0.05)
+        return web.json_response({'status': 'success', 'data': {'ltp': 100}})
+
+    async def profile(request):
+        hits['profile'] += 1
+        if hits['profile'] == 1:
+            return web.json_response({'status': 'error'}, status=429, headers={'Retry-After': '0.05'})
+        return web.json_response({'status': 'success'})
+
+    async def run():
+        runner, port = await _serve([('GET', '/v2/market-quote/quotes', quote), ('GET', '/v2/user/profile', profile)])
+        client = _client(tmp_path, port)
+        try:
+            quotes = await asyncio.gather(*(client.get_market_data('NSE_INDEX|Nifty 50') for _ in range(5)))
+            return quotes, await client.get_profile()
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    quotes, profile = asyncio.run(run())
+
+    assert hits['quote'] == 1 and all(q['data']['ltp'] == 100 for q in quotes)
+    assert hits['profile'] == 2 and profile['status'] == 'success'
+
+
+def test_quotes_are_batched_cached_and_shared(tmp_path):
+    requested = []
+
+    async def quotes(request):
+        keys = request.query['instrument_key'].split(',')
+        requested.append(keys)
+        await asyncio.sleep(0.05)
+        data = {key.replace('|', ':'): {'instrument_token': key, 'last_price': float(i)} for i, key in enumerate(keys)}
+        return web.json_response({'status': 'success', 'data': data})
+
+    async def run():
+        runner, port = await _serve([('GET', '/v2/market-quote/quotes', quotes)])
+        client = _client(tmp_path, port)
+        client.QUOTE_BATCH_SIZE = 25
+        chain = [f'NSE_FO|{40000 + i}' for i in range(40)]
+        try:
+            first, overlapping = await asyncio.gather(client.get_quotes(chain), client.get_quotes(chain[:10]))
+            cached = await client.get_quotes(chain)
+            return chain, first, overlapping, cached
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    chain, first, overlapping, cached = asyncio.run(run())
+
+    # 40 strikes in two batched requests; the overlapping caller and the repeat read fetch nothing
+    assert sorted(len(keys) for keys in requested) == [15, 25]
+    assert set(first) == set(chain) and cached == first
+    assert overlapping == {key: first[key] for key in chain[:10]}
+
+
+def test_metrics_endpoint_reports_api_latency_and_errors(tmp_path):
+    import aiohttp
+    from src.utils.metrics import MetricsServer, metrics
+
+    async def profile(request):
+        return web.json_response({'status': 'success'})
+
+    async def funds(request):
+        return web.json_response({'status': 'error'}, status=500)
+
+    async def run():
+        runner, port = await _serve([('GET', '/v2/user/profile', profile), ('GET', '/v2/user/funds', funds)])
+        client = _client(tmp_path, port)
+        server = MetricsServer('127.0.0.1', 0, lag_interval=0.01)
+        before = metrics.api_latency.count('default')
+        try:
+            assert await server.start()
+            metrics.register_gauge('test_queue_depth', 'Test queue', lambda: 3)
+            await client.get_profile()
+            assert await client.get_funds() is None
+            await asyncio.sleep(0.05)
+
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f'http://127.0.0.1:{server.port}/metrics') as response:
+                    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+                    return before, await response.text()
+        finally:
+            await server.stop()
+            await client.close()
+            await runner.cleanup()
+
+    before, text = asyncio.run(run())
+
+    assert metrics.api_latency.count('default') == before + 2
+    assert 'upstox_request_errors_total{endpoint="default",reason="500"}' in text
+    assert 'upstox_request_seconds_bucket{endpoint="default",le="+Inf"}' in text
+    assert 'test_queue_depth 3' in text
+    assert 'trading_event_loop_lag_seconds_count' in text
+
+
+def test_concurrent_scrapers_read_the_same_tick_series():
+    from src.utils.metrics import PipelineMetrics
+
+    pipeline = PipelineMetrics()
+    for _ in range(5):
+        pipeline.ticks.inc('NIFTY')
+
+    # Scraping must not reset anything another scraper (or a rate() query) depends on
+    first, second = pipeline.render(), pipeline.render()
+    assert first == second
+    assert 'trading_ticks_total{symbol="NIFTY"} 5' in first
+
+
+def test_rest_quote_refreshes_are_not_counted_as_feed_ticks():
+    from src.backtest import EventDrivenBacktest
+    from src.backtest.simulation import build_simulated_bot
+    from src.utils.metrics import metrics
+
+    bot = build_simulated_bot([])
+    replay = EventDrivenBacktest(bot)
+
+    async def quotes(instrument_keys, max_age=None):
+        return {'NSE_INDEX|Nifty 50': {'last_price': 22000.0, 'volume': 10}}
+
+    replay.broker.get_quotes = quotes
+    ticks, refreshed = metrics.ticks.get('NIFTY'), metrics.quotes.get('NIFTY')
+    assert asyncio.run(bot.refresh_quotes())
+
+    assert bot.latest_ticks['NIFTY']['ltp'] == 22000.0
+    assert metrics.ticks.get('NIFTY') == ticks
+    assert metrics.quotes.get('NIFTY') == refreshed + 1
+
+
+def test_mock_broker_serves_client_orders_fills_and_feed(tmp_path):
+    import json
+    import aiohttp
+    from src.mock_upstox import MockBehavior, MockUpstoxServer
+    from src.models.order import Order, OrderStatus, OrderType, TransactionType
+    from src.models.order_book import OrderBook
+
+    behavior = MockBehavior(order_latency=0.1, fill_delay=0.05, partial_fill_rate=1.0, feed_rate=50)
+    server = MockUpstoxServer('127.0.0.1', 0, behavior, seed=1)
+    book = OrderBook()
+
+    async def run():
+        assert await server.start()
+        client = UpstoxClient('key', 'secret', 'http://localhost', api_host=server.api_host)
+        client.token_file = tmp_path / 'token.json'
+        try:
+            assert await client.get_access_token('mock-auth-code')
+            assert await client.test_token()
+            quotes = await client.get_quotes(['NSE_INDEX|Nifty 50', 'NSE_FO|40001'])
+
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f'{client.base_url}/feed/portfolio-stream-feed/authorize',
+                                       headers={'Authorization': 'Bearer x'}) as response:
+                    portfolio_uri = (await response.json())['data']['authorized_redirect_uri']
+                portfolio = await session.ws_connect(portfolio_uri)
+                market = await session.ws_connect(f'{server.api_host}/ws/market?format=json')
+                await market.send_str(json.dumps({'guid': '1', 'method': 'sub', 'data': {
+                    'mode': 'full', 'instrumentKeys': ['NSE_FO|40001']}}))
+
+                # A scripted 503 surfaces as a failed request; the retry goes through with order latency
+                server.fail_next('/order/place', status=503)
+                payload = {'instrument_token': 'NSE_FO|40001', 'quantity': 150, 'transaction_type': 'BUY',
+                           'order_type': 'MARKET', 'product': 'I', 'price': 0}
+                assert await client.place_order(payload) is None
+                started = time.monotonic()
+                placed = await client.place_order(payload)
+                order_latency = time.monotonic() - started
+
+                order = book.add(Order('NSE_FO|40001', 150, quotes['NSE_FO|40001']['last_price'],
+                                       OrderType.MARKET, TransactionType.BUY))
+                book.bind_broker_id(order.order_id, placed['data']['order_id'])
+                while order.status != OrderStatus.FILLED:
+                    update = await asyncio.wait_for(portfolio.receive_str(), 2)
+                    book.apply_update(update)
+                    if order.status == OrderStatus.PARTIALLY_FILLED:
+                        assert order.filled_quantity == 75
+
+                feed = json.loads(await asyncio.wait_for(market.receive_str(), 2))
+                await portfolio.close()
+                await market.close()
+            return quotes, order, order_latency, feed
+        finally:
+            await client.close()
+            await server.stop()
+
+    quotes, order, order_latency, feed = asyncio.run(run())
+
+    assert set(quotes) == {'NSE_INDEX|Nifty 50', 'NSE_FO|40001'}
+    assert order_latency >= 0.1
+    # Fills track the streamed price, which has drifted a little since the quote
+    assert order.filled_quantity == 150
+    assert abs(order.filled_price / quotes['NSE_FO|40001']['last_price'] - 1) < 0.01
+    assert server.injected_errors == 1
+    depth = feed['feeds']['NSE_FO|40001']['fullFeed']['marketFF']['marketLevel']['bidAskQuote']
+    assert len(depth) == 5
@@ -0,0 +1,823 @@
+import asyncio
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime
+
+from src.models.order import Order, OrderStatus, OrderType, TransactionType
+from src.models.order_book import OrderBook
+from src.models.position import Position
+from src.models.position_book import PositionBook
+from src.utils.option_pricing import OptionPremiumModel, black_scholes
+
+
+def test_black_scholes_reference_values():
+    call = black_scholes(100, 100, 1.0, 0.2, 0.05, 'CE')
+    put = black_scholes(100, 100, 1.0, 0.2, 0.05, 'PE')
+
+    assert abs(call['premium'] - 10.4506) < 1e-3
+    assert abs(put['premium'] - 5.5735) < 1e-3
+
+    # Put-call parity: C - P = S - K * exp(-rT)
+    assert abs((call['premium'] - put['premium']) - (100 - 100 * np.exp(-0.05))) < 1e-4
+
+
+def test_premium_columns_use_weekly_expiry_and_strike_rounding():
+    model = OptionPremiumModel(strike_step=50, iv=0.15, expiry_weekday=3)
+    data = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-01 09:15', '2024-01-04 15:00', '2024-01-04 15:45']),
+        'close': [22012.0, 22040.0, 21960.0]
+    })
+
+    priced = model.add_premium_columns(data)
+
+    assert list(priced['atm_strike']) == [22000.0, 22050.0, 21950.0]
+    assert list(priced['expiry']) == [
+        pd.Timestamp('2024-01-04 15:30'), pd.Timestamp('2024-01-04 15:30'), pd.Timestamp('2024-01-11 15:30')
+    ]
+    assert (priced['ce_premium'] > 0).all() and (priced['pe_premium'] > 0).all()
+
+
+def test_contract_premium_decays_with_time():
+    model = OptionPremiumModel(iv=0.15)
+    expiry = datetime(2024, 1, 11, 15, 30)
+
+    early = model.contract_premium(datetime(2024, 1, 5, 10, 0), 22000, 22000, expiry, 'CE')
+    late = model.contract_premium(datetime(2024, 1, 10, 10, 0), 22000, 22000, expiry, 'CE')
+
+    assert early > late > 0
+
+
+def test_intrabar_exit_resolves_stop_and_target_inside_bars():
+    from src.backtest.fills import IntrabarExitSimulator
+
+    opens = np.array([100.0, 101.0, 100.0])
+    highs = np.array([103.0, 111.0, 125.0])
+    lows = np.array([97.0, 99.0, 45.0])
+
+    # Bar 1 touches only the target; entry at 100 with 10% target and 5% stop
+    simulator = IntrabarExitSimulator(stop_loss=0.05, profit_target=0.10)
+    fill = simulator.find_exit(100.0, opens, highs, lows)
+    assert (fill['offset'], fill['reason']) == (1, 'profit_target')
+    assert abs(fill['price'] - 110.0) < 1e-9
+
+    # Bar 2 touches both; the fill model decides, recorded ticks override it
+    wide = dict(stop_loss=0.5, profit_target=0.2)
+    assert IntrabarExitSimulator(**wide).find_exit(100.0, opens, highs, lows)['reason'] == 'stop_loss'
+    assert IntrabarExitSimulator(**wide, fill_model='target_first').find_exit(100.0, opens, highs, lows)['reason'] == 'profit_target'
+
+    bar_times = pd.to_datetime(['2024-01-01 09:15', '2024-01-01 09:16', '2024-01-01 09:17']).to_numpy()
+    ticks = pd.DataFrame({
+        'timestamp': pd.to_datetime(['2024-01-01 09:17:05', '2024-01-01 09:17:20', '2024-01-01 09:17:40']),
+        'price': [110.0, 121.0, 45.0]
+    })
+    with_ticks = IntrabarExitSimulator(**wide, ticks=ticks)
+    assert with_ticks.find_exit(100.0, opens, highs, lows, bar_times)['reason'] == 'profit_target'
+
+    # A gap through the stop fills at the open
+    gapped = IntrabarExitSimulator(stop_loss=0.05, profit_target=0.5).find_exit(100.0, np.array([90.0]), np.array([92.0]), np.array([88.0]))
+    assert gapped == {'offset': 0, 'price': 90.0, 'reason': 'stop_loss'}
+
+
+def test_streaming_metrics_track_drawdown_and_bound_the_curve(tmp_path):
+    from src.backtest.metrics import StreamingMetrics, BacktestReport
+
+    metrics = StreamingMetrics(100.0, max_curve_points=8)
+    for i, value in enumerate([100, 110, 99, 105, 120] + [120] * 95):
+        metrics.update(i, float(value), exposure=50.0 if i < 4 else 0.0)
+    metrics.record_trade(20.0, 'ema')
+    metrics.record_trade(-5.0, 'ema')
+    metrics.record_trade(3.0, 'adx')
+
+    summary = metrics.summary()
+    assert abs(summary['max_drawdown'] - 0.1) < 1e-12
+    assert summary['time_in_market'] == 0.04
+    assert summary['strategies']['ema']['trades'] == 2 and summary['strategies']['ema']['total_pnl'] == 15.0
+    assert summary['trades']['wins'] == 2
+    assert len(metrics.curve) < 8
+
+    written = BacktestReport(metrics, [{'timestamp': 1, 'action': 'SELL', 'pnl': 20.0}]).write(tmp_path, formats=('csv', 'json'))
+    assert set(written) == {'trades_csv', 'equity_csv', 'json'}
+    assert (tmp_path / 'summary.json').read_text().count('"sharpe_ratio"') == 1
+
+
+def test_position_book_indexes_and_aggregates():
+    book = PositionBook()
+    book['NIFTY_a_CE'] = Position('NIFTY', 2, 100.0, 100.0, 0, 0, strategy_name='a', option_type='CE')
+    book['NIFTY_b_PE'] = Position('NIFTY', 1, 50.0, 50.0, 0, 0, strategy_name='b', option_type='PE')
+    book['BANKNIFTY_a_PE'] = Position('BANKNIFTY', 1, 200.0, 200.0, 0, 0, strategy_name='a', option_type='PE')
+
+    assert [key for key, _ in book.for_symbol('NIFTY')] == ['NIFTY_a_CE', 'NIFTY_b_PE']
+    assert [key for key, _ in book.for_strategy('a')] == ['NIFTY_a_CE', 'BANKNIFTY_a_PE']
+    assert [key for key, _ in book.select(strategy_name='a', option_type='PE')] == ['BANKNIFTY_a_PE']
+    assert book.exposure == 450.0
+
+    assert book.mark('NIFTY', 110.0) == 2
+    book.resize('NIFTY_a_CE', 3, 105.0)
+    assert abs(book.unrealized_pnl - ((110 - 105) * 3 + (110 - 50))) < 1e-9
+    assert abs(book.exposure - (3 * 110 + 110 + 200)) < 1e-9
+
+    del book['NIFTY_b_PE']
+    book.pop('BANKNIFTY_a_PE')
+    assert book.for_strategy('b') == [] and book.symbols() == ['NIFTY']
+    assert abs(book.exposure - 330.0) < 1e-9 and abs(book.unrealized_pnl - 15.0) < 1e-9
+
+
+def test_order_book_applies_stream_updates_and_journals_old_orders(tmp_path):
+    journal = tmp_path / 'orders.jsonl'
+    book = OrderBook(journal, max_completed=2)
+
+    async def run():
+        order = book.add(Order('NIFTY', 1, 100.0, OrderType.MARKET, TransactionType.BUY))
+        book.bind_broker_id(order.order_id, 'B1')
+        waiter = asyncio.ensure_future(book.wait_for_completion(order.order_id, timeout=1))
+
+        book.apply_update({'update_type': 'order', 'order_id': 'B1', 'status': 'open', 'filled_quantity': 0})
+        assert order.status == OrderStatus.OPEN
+        book.apply_update(json.dumps({'order_id': 'B1', 'status': 'open', 'filled_quantity': 1}))
+        assert order.status == OrderStatus.PARTIALLY_FILLED
+        book.apply_update({'order_id': 'B1', 'status': 'complete', 'filled_quantity': 1, 'average_price': 101.5})
+
+        # A late 'open' for a filled order is stale and ignored
+        assert book.apply_update({'order_id': 'B1', 'status': 'open'}) is None
+        return order, await waiter
+
+    order, completed = asyncio.run(run())
+    assert completed is order and order.status == OrderStatus.FILLED and order.filled_price == 101.5
+
+    for _ in range(2):
+        filled = Order('NIFTY', 1, 100.0, OrderType.MARKET, TransactionType.SELL)
+        filled.status = OrderStatus.FILLED
+        book.append(filled)
+
+    # Oldest completed order is evicted to the journal; indexes only hold recent orders
+    assert len(book) == 2 and book.total_orders == 3 and book.by_broker_id('B1') is None
+    book.drain_journal()
+    records = [json.loads(line) for line in journal.read_text().splitlines()]
+    assert [(r['broker_order_id'], r['status']) for r in records] == [('B1', 'FILLED')]
+
+
+def test_order_journal_is_written_in_batches_off_the_calling_thread(tmp_path):
+    import threading
+
+    journal = tmp_path / 'orders' / 'orders.jsonl'
+    book = OrderBook(journal, max_completed=1, journal_batch=3)
+    writes = []
+    write_journal = book._write_journal
+
+    def recording_write(path, records):
+        writes.append((threading.current_thread().name, len(records)))
+        write_journal(path, records)
+
+    book._write_journal = recording_write
+
+    for i in range(6):
+        filled = Order('NIFTY', 1, 100.0 + i, OrderType.MARKET, TransactionType.SELL)
+        filled.status = OrderStatus.FILLED
+        book.add(filled)
+
+    # Five evictions: one full batch handed to the writer, two records still buffered
+    book.drain_journal()
+    assert len(journal.read_text().splitlines()) == 5
+    book.flush()
+
+    prices = [json.loads(line)['price'] for line in journal.read_text().splitlines()]
+    assert prices == [100.0 + i for i in range(6)]
+    assert [size for _, size in writes] == [3, 2, 1]
+    assert all(name.startswith('order-journal') for name, _ in writes)
+
+
+async def _telegram_server(handler):
+    from aiohttp import web
+
+    app = web.Application()
+    app.router.add_post('/botTOKEN/sendMessage', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+def test_telegram_outbox_sends_in_background_with_retries():
+    from aiohttp import web
+    from src.utils.notification import TelegramNotifier
+
+    received = []
+    attempts = {}
+
+    async def send(request):
+        payload = await request.json()
+        chat = payload['chat_id']
+        attempts[chat] = attempts.get(chat, 0) + 1
+        if chat == '2' and attempts[chat] == 1:
+            return web.json_response({'ok': False, 'parameters': {'retry_after': 0.05}}, status=429)
+        await asyncio.sleep(0.2)
+        received.append((chat, payload['text']))
+        return web.json_response({'ok': True})
+
+    async def run():
+        runner, port = await _telegram_server(send)
+        notifier = TelegramNotifier('TOKEN', '1, 2', api_url=f'http://127.0.0.1:{port}', retry_delay=0.01)
+        try:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            assert await notifier.send_message('first')
+            assert await notifier.send_message('second')
+            queued_in = loop.time() - start
+
+            await notifier.close()
+        finally:
+            await runner.cleanup()
+        return notifier, queued_in
+
+    notifier, queued_in = asyncio.run(run())
+
+    # Queuing never waits on Telegram
+    assert queued_in < 0.05
+    # Both chats get both messages in order; the 429 for chat 2 is retried
+    assert [text for chat, text in received if chat == '1'] == ['first', 'second']
+    assert [text for chat, text in received if chat == '2'] == ['first', 'second']
+    assert attempts == {'1': 2, '2': 3}
+    assert notifier.messages_sent == 2 and notifier.pending == 0
+
+
+def test_telegram_alerts_are_coalesced_into_digests():
+    from aiohttp import web
+    from src.utils.notification import TelegramNotifier
+
+    received = []
+
+    async def send(request):
+        payload = await request.json()
+        received.append((payload['chat_id'], payload['text']))
+        return web.json_response({'ok': True})
+
+    async def run():
+        runner, port = await _telegram_server(send)
+        notifier = TelegramNotifier('TOKEN', '1,2', api_url=f'http://127.0.0.1:{port}', coalesce_window=0.2)
+        try:
+            for i in range(5):
+                await notifier.send_message(f'alert {i}')
+            await notifier.send_error_alert('feed down')
+            await asyncio.sleep(0.1)
+            errors_first = list(received)
+            await notifier.close()
+        finally:
+            await runner.cleanup()
+        return notifier, errors_first
+
+    notifier, errors_first = asyncio.run(run())
+
+    # The error skips the window; the five alerts go out as one digest per chat
+    assert len(errors_first) == 2 and all('feed down' in text for _, text in errors_first)
+    digests = [text for _, text in received[2:]]
+    assert len(digests) == 2
+    for digest in digests:
+        assert [line for line in digest.splitlines() if line.startswith('alert')] == [f'alert {i}' for i in range(5)]
+    assert (notifier.messages_coalesced, notifier.digests_sent, notifier.messages_sent) == (5, 1, 2)
+
+
+def test_telegram_session_from_a_finished_loop_is_closed_not_leaked():
+    import gc
+    import warnings
+    from aiohttp import web
+    from src.utils.notification import TelegramNotifier
+
+    async def send(request):
+        return web.json_response({'ok': True})
+
+    notifier = TelegramNotifier('TOKEN', '1')
+
+    async def send_once(close: bool):
+        runner, port = await _telegram_server(send)
+        notifier.api_url = f'http://127.0.0.1:{port}'
+        try:
+            assert await notifier.send_message('hello', critical=True)
+            await asyncio.gather(*notifier._urgent)
+            session = notifier._session
+            if close:
+                await notifier.close()
+        finally:
+            await runner.cleanup()
+        return session
+
+    # The first loop ends without close(), leaving its worker and session behind
+    first = asyncio.run(send_once(close=False))
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        second = asyncio.run(send_once(close=True))
+        gc.collect()
+
+    assert first is not second and first.closed and second.closed
+    assert not [w for w in caught if 'Unclosed' in str(w.message)]
+
+
+def test_rejections_and_shutdown_skip_the_coalescing_window():
+    from aiohttp import web
+    from src.backtest.simulation import build_simulated_bot
+    from src.utils.notification import TelegramNotifier
+
+    received = []
+
+    async def send(request):
+        received.append((await request.json())['text'])
+        return web.json_response({'ok': True})
+
+    async def run():
+        runner, port = await _telegram_server(send)
+        bot = build_simulated_bot([])
+        bot.orders.journal_path = None
+        bot.notifier = TelegramNotifier('TOKEN', '1', api_url=f'http://127.0.0.1:{port}', coalesce_window=5)
+        try:
+            order = bot.orders.add(Order('NIFTY', 1, 100.0, OrderType.MARKET, TransactionType.BUY))
+            bot.orders.bind_broker_id(order.order_id, 'B7')
+            await bot.notifier.send_message('routine alert')
+            await bot.on_order_update_received({'order_id': 'B7', 'status': 'rejected', 'status_message': 'margin shortfall'})
+            await bot.notifier.send_status_update('Stopped', 'Bot stopped by user', critical=True)
+            # Only the routine alert waits in the outbox for the window
+            queued = bot.notifier.pending
+            await bot.notifier.close()
+        finally:
+            await runner.cleanup()
+        return bot.notifier, queued
+
+    notifier, queued = asyncio.run(run())
+
+    assert queued == 1
+    assert 'margin shortfall' in received[0] and 'Stopped' in received[1] and 'routine alert' in received[2]
+    assert notifier.messages_sent == 3 and notifier.messages_coalesced == 0
+
+
+def test_queue_logging_writes_on_listener_thread(tmp_path):
+    import logging
+    import queue
+    import threading
+    from config.logging_config import DroppingQueueHandler, configure_logging, shutdown_logging
+
+    root = logging.getLogger()
+    saved = (root.handlers[:], root.level)
+    writers = set()
+
+    class RecordingFilter(logging.Filter):
+        def filter(self, record):
+            writers.add(threading.current_thread().name)
+            return True
+
+    try:
+        listener = configure_logging(tmp_path, 'DEBUG', 'root=file,errors;trading=trades', queue_size=100)
+        for handler in {h for hs in listener.routes.values() for h in hs}:
+            handler.addFilter(RecordingFilter())
+
+        logging.getLogger('src.trading_bot').info('NEW CANDLE %s', 1)
+        logging.getLogger('src.trading_bot').error('order failed')
+        logging.getLogger('trading').info('trade booked')
+        shutdown_logging()
+
+        # Handlers are routed per logger and only ever run on the listener thread
+        assert writers == {'log-listener'}
+        bot_log = (tmp_path / 'trading_bot.log').read_text()
+        assert 'NEW CANDLE 1' in bot_log and 'trade booked' in bot_log
+        assert 'order failed' in (tmp_path / 'errors.log').read_text()
+        assert 'NEW CANDLE' not in (tmp_path / 'errors.log').read_text()
+        assert (tmp_path / 'trades.log').read_text().count('trade booked') == 1
+
+        # A full queue drops records instead of blocking the caller
+        full = queue.Queue(maxsize=1)
+        full.put(None)
+        queue_handler = DroppingQueueHandler(full, 'root')
+        queue_handler.handle(logging.makeLogRecord({'msg': 'overflow'}))
+        assert queue_handler.dropped == 1
+    finally:
+        shutdown_logging()
+        for logger in (root, logging.getLogger('trading')):
+            for handler in logger.handlers[:]:
+                logger.removeHandler(handler)
+        root.handlers[:] = saved[0]
+        root.setLevel(saved[1])
+
+
+def test_hot_path_logger_rate_limits_samples_and_counts(caplog):
+    import logging
+    from src.utils.hot_log import HotPathLogger
+
+    class Unformattable:
+        def __format__(self, spec):
+            raise AssertionError('formatted a filtered message')
+
+        def __str__(self):
+            raise AssertionError('formatted a filtered message')
+
+    hot = HotPathLogger(logging.getLogger('tests.hot_path'))
+    with caplog.at_level(logging.INFO, logger='tests.hot_path'):
+        # Disabled levels never format their arguments
+        hot.debug('tick', 'tick %s', Unformattable())
+
+        for i in range(10):
+            hot.info('candle', 'candle %d', i, every=60)
+        for i in range(7):
+            hot.info('signal', 'signal %d', i, sample=3)
+
+        assert hot.suppressed() == {'candle': 9}
+        hot.log_summary()
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[:4] == ['candle 0', 'signal 0', 'signal 3 (+2 suppressed)', 'signal 6 (+2 suppressed)']
+    assert messages[4] == 'Suppressed hot-path messages - candle: 9'
+    assert hot.suppressed() == {}
+    # Records point at the calling line, not the wrapper
+    assert {record.filename for record in caplog.records[:4]} == {'test_utils.py'}
+
+
+def test_profiler_sessions_write_stats_stacks_and_allocations(tmp_path):
+    import time
+    import tracemalloc
+    from pathlib import Path
+    import aiohttp
+    from src.utils.metrics import MetricsServer
+    from src.utils.profiling import Profiler
+
+    def busy_work():
+        blocks = [bytearray(1024) for _ in range(2000)]
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+        return blocks
+
+    async def run():
+        profiler = Profiler(tmp_path, default_seconds=0, sample_interval=0.001)
+        server = MetricsServer('127.0.0.1', 0, lag_interval=60)
+        server.add_routes(profiler.control_routes())
+        assert await server.start()
+        base = f"http://127.0.0.1:{server.port}/debug/profile"
+        try:
+            async with aiohttp.ClientSession() as session:
+                # Deterministic profile, started and stopped over HTTP
+                async with session.post(f"{base}/start?mode=cprofile") as response:
+                    assert response.status == 200
+                async with session.post(f"{base}/start") as response:
+                    assert response.status == 409
+                busy_work()
+                async with session.post(f"{base}/stop") as response:
+                    cprofile_reports = (await response.json())['reports']
+                async with session.post(f"{base}/start?mode=bogus") as response:
+                    assert response.status == 400
+
+            # Sampling profile ending on its own timer
+            assert profiler.start('sample', seconds=0.3)
+            busy_work()
+            await asyncio.sleep(0.4)
+            # The timer stops collection on the loop; the reports are written in a worker thread
+            while profiler.status()['writing']:
+                await asyncio.sleep(0.01)
+            return profiler, cprofile_reports
+        finally:
+            await server.stop()
+
+    profiler, cprofile_reports = asyncio.run(run())
+
+    assert set(cprofile_reports) == {'stats', 'summary', 'memory'}
+    assert 'busy_work' in Path(cprofile_reports['summary']).read_text()
+    assert 'test_utils.py' in Path(cprofile_reports['memory']).read_text()
+
+    assert not profiler.running and set(profiler.last_reports) == {'stacks', 'memory'}
+    stacks = Path(profiler.last_reports['stacks']).read_text()
+    assert 'busy_work (test_utils.py' in stacks
+    # Sessions leave tracemalloc as they found it
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiler_controls_refuse_remote_clients_and_bad_tokens(tmp_path):
+    import aiohttp
+    from aiohttp.test_utils import make_mocked_request
+    from unittest import mock
+    from src.utils.metrics import MetricsServer
+    from src.utils.profiling import Profiler
+
+    def remote_request(address):
+        transport = mock.Mock()
+        transport.get_extra_info.side_effect = lambda name, default=None: (address, 40000) if name == 'peername' else default
+        return make_mocked_request('POST', '/debug/profile/start', transport=transport)
+
+    async def run():
+        profiler = Profiler(tmp_path, default_seconds=0)
+        routes = {path: handler for _, path, handler in profiler.control_routes()}
+        refused = await routes['/debug/profile/start'](remote_request('203.0.113.7'))
+        allowed = await routes['/debug/profile'](remote_request('127.0.0.1'))
+
+        server = MetricsServer('127.0.0.1', 0, lag_interval=60)
+        server.add_routes(Profiler(tmp_path, default_seconds=0).control_routes(token='s3cret'))
+        assert await server.start()
+        base = f"http://127.0.0.1:{server.port}/debug/profile"
+        statuses = []
+        try:
+            async with aiohttp.ClientSession() as session:
+                for headers in ({}, {'Authorization': 'Bearer wrong'}, {'Authorization': 'Bearer s3cret'}):
+                    async with session.get(base, headers=headers) as response:
+                        statuses.append(response.status)
+        finally:
+            await server.stop()
+        return refused.status, allowed.status, statuses
+
+    refused, allowed, statuses = asyncio.run(run())
+    assert (refused, allowed) == (403, 200)
+    # With a token even loopback clients must present it
+    assert statuses == [403, 403, 200]
+
+
+def test_synthetic_feed_drives_the_websocket_handler():
+    from src.websocket import websocket_manager
+    from src.websocket.synthetic_feed import FeedDriver, SyntheticFeed
+
+    feed = SyntheticFeed(instruments=4, feed_type='market', ticks_per_message=2, seed=3)
+    message = feed.message()
+    quote = message['feeds']['NSE_FO|40000']['fullFeed']['marketFF']
+    assert list(message['feeds']) == ['NSE_FO|40000', 'NSE_FO|40001']
+    assert len(quote['marketLevel']['bidAskQuote']) == 5
+    assert quote['marketLevel']['bidAskQuote'][0]['bidP'] < quote['ltpc']['ltp'] < quote['marketLevel']['bidAskQuote'][0]['askP']
+
+    # Only the message handler is exercised, so the SDK isn't needed
+    manager = websocket_manager.WebSocketManager('key', 'token', require_sdk=False)
+    manager.market_checker = websocket_manager.MarketHoursChecker(always_open=True)
+
+    driver = FeedDriver(manager._on_market_message, feed, rate=4000, report_interval=0.2)
+    summary = asyncio.run(driver.run(0.5))
+
+    # marketFF ticks reach the aggregator like index ticks do
+    assert set(manager.latest_ticks) == {'40000', '40001', '40002', '40003'}
+    assert summary['handler_errors'] == 0
+    assert summary['ticks'] == summary['messages'] * 2
+    assert 0.8 * 2000 < summary['achieved_tick_rate'] < 1.2 * 4000
+    assert 0 < summary['latency_us']['p50'] <= summary['latency_us']['p99'] <= summary['latency_us']['max']
+    assert len(summary['intervals']) >= 2 and summary['rss_end_mb'] > 0
+
+
+def test_lazy_import_defers_module_code_until_first_use(tmp_path, monkeypatch):
+    import builtins
+    import sys
+    from src.utils import lazy_import, startup
+
+    (tmp_path / 'heavy_dep.py').write_text("import builtins\nbuiltins.heavy_dep_runs = getattr(builtins, 'heavy_dep_runs', 0) + 1\nVALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'heavy_dep', raising=False)
+    monkeypatch.setattr(builtins, 'heavy_dep_runs', 0, raising=False)
+
+    module = lazy_import.lazy_import('heavy_dep')
+    assert builtins.heavy_dep_runs == 0
+    assert 'heavy_dep' in startup.report()['deferred_pending']
+    assert lazy_import.lazy_import('heavy_dep') is module
+
+    assert module.VALUE == 42
+    assert builtins.heavy_dep_runs == 1
+    assert 'heavy_dep' in startup.report()['deferred_loaded']
+    assert 'heavy_dep' not in lazy_import.pending
+
+    assert lazy_import.lazy_import('not_installed_dep', optional=True) is None
+    assert startup.mark('test stage') > 0
+
+
+def test_startup_graph_overlaps_independent_steps_and_aborts_on_required_failure():
+    import time
+    import pytest
+    from src.utils.startup import StartupGraph
+
+    events = []
+
+    async def step(name, delay, result=True):
+        events.append(('start', name))
+        await asyncio.sleep(delay)
+        events.append(('end', name))
+        return result
+
+    graph = StartupGraph()
+    graph.add('authenticate', lambda: step('authenticate', 0.1), required=True)
+    graph.add('warm_up', lambda: step('warm_up', 0.1))
+    graph.add('websockets', lambda: step('websockets', 0.01), after=['authenticate'])
+    graph.add('strategies', lambda: 'added')
+
+    started = time.perf_counter()
+    assert asyncio.run(graph.run())
+    assert time.perf_counter() - started < 0.19  # authenticate and warm_up overlapped
+    assert events.index(('end', 'authenticate')) < events.index(('start', 'websockets'))
+    assert graph.results['strategies'] == 'added'
+    assert set(graph.timings) == {'authenticate', 'warm_up', 'websockets', 'strategies'}
+
+    # A failed required step cancels what is running and skips its dependents
+    graph = StartupGraph()
+    graph.add('authenticate', lambda: step('authenticate', 0.01, result=False), required=True)
+    graph.add('warm_up', lambda: step('warm_up', 5))
+    graph.add('websockets', lambda: step('websockets', 0.01), after=['authenticate'])
+
+    started = time.perf_counter()
+    assert not asyncio.run(graph.run())
+    assert time.perf_counter() - started < 1
+    assert graph.failed == 'authenticate'
+    assert set(graph.timings) == {'authenticate'}
+
+    graph = StartupGraph()
+    graph.add('a', lambda: None, after=['b'])
+    graph.add('b', lambda: None, after=['a'])
+    with pytest.raises(ValueError):
+        asyncio.run(graph.run())
+
+
+def test_bot_startup_waits_for_strategies_and_cleans_up_when_it_fails(tmp_path, monkeypatch):
+    from src.backtest.simulation import build_simulated_bot, simulation_settings
+    from src.utils import tracing
+    from src.utils.profiling import Profiler
+
+    bot = build_simulated_bot([], settings=simulation_settings(trace_enabled=False, metrics_enabled=False))
+    bot.orders.journal_path = None
+    assert 'strategies' in bot.build_startup_graph().steps['websockets'].after
+
+    flushed = []
+    monkeypatch.setattr(tracing.tracer, 'flush', lambda: flushed.append(True))
+    bot.profiler = Profiler(tmp_path, default_seconds=0)
+
+    async def failed_authentication():
+        assert bot.profiler.start('sample', seconds=0)
+        return False
+
+    bot.authenticate = failed_authentication
+    asyncio.run(bot.run())
+
+    # The aborted startup goes through the same cleanup as a normal shutdown
+    assert flushed and not bot.profiler.running
+    assert 'stacks' in bot.profiler.last_reports
+
+
+def test_sigusr1_toggles_profiling_with_default_settings(tmp_path):
+    import os
+    import signal
+    from src.backtest.simulation import build_simulated_bot
+
+    bot = build_simulated_bot([])
+    assert not bot.settings.profiling_enabled
+    bot.profiler.output_dir = tmp_path
+
+    async def run():
+        assert bot.profiler.install_signal_handler()
+        os.kill(os.getpid(), signal.SIGUSR1)
+        await asyncio.sleep(0.05)
+        started = bot.profiler.running
+        os.kill(os.getpid(), signal.SIGUSR1)
+        await asyncio.sleep(0.05)
+        await bot.profiler._stop_task
+        return started
+
+    # The signal toggles a session instead of killing the process
+    assert asyncio.run(run())
+    assert not bot.profiler.running and 'stacks' in bot.profiler.last_reports
+
+
+def test_order_and_position_are_slotted_with_json_ready_records():
+    import pickle
+    import pytest
+
+    order = Order('NIFTY', 2, 101.5, OrderType.LIMIT, TransactionType.BUY, 'NSE_FO|1', 'PE', 'pine', 'PE_ONLY')
+    assert order.status == OrderStatus.PENDING and order.order_id == '' and order.filled_quantity == 0
+    assert not hasattr(order, '__dict__')
+    with pytest.raises(AttributeError):
+        order.stop_loss = 99.0
+
+    record = json.loads(json.dumps(order.to_dict()))
+    assert record['order_type'] == 'LIMIT' and record['status'] == 'PENDING' and record['option_type'] == 'PE'
+    assert record['timestamp'] == str(order.timestamp)
+    assert pickle.loads(pickle.dumps(order)) == order
+
+    position = Position('NIFTY', 2, 100.0, 101.0, 0, 2.0, strategy_name='pine', option_type='PE')
+    position.strategy_mode = 'PE_ONLY'
+    with pytest.raises(AttributeError):
+        position.highest_price = 105.0
+    assert json.loads(json.dumps(position.to_dict()))['strategy_mode'] == 'PE_ONLY'
+
+
+def test_parallel_chunks_match_a_sequential_run_flattened_at_the_same_boundaries():
+    import functools
+    from src.backtest import BacktestEngine, ParallelBacktestRunner
+    from src.strategy.enhanced_pine_script_strategy import EnhancedPineScriptStrategy
+
+    rng = np.random.default_rng(11)
+    days = [pd.date_range(f'2024-01-0{d} 09:15', periods=375, freq='1min') for d in (2, 3, 4)]
+    timestamps = days[0].append(days[1]).append(days[2])
+    closes = 150 + np.cumsum(rng.normal(0, 0.6, len(timestamps)))
+    opens = closes + rng.normal(0, 0.2, len(timestamps))
+    data = pd.DataFrame({
+        'timestamp': timestamps, 'open': opens, 'high': np.maximum(opens, closes) + 0.3,
+        'low': np.minimum(opens, closes) - 0.3, 'close': closes, 'volume': 1000
+    })
+    factory = functools.partial(EnhancedPineScriptStrategy, 'chunked', {'trading_mode': 'BIDIRECTIONAL'})
+
+    sequential = BacktestEngine(200000, '2024-01-02', '2024-01-04')
+    asyncio.run(sequential.run_backtest(factory(), 'NIFTY', data=data, verbose=False, flatten='day'))
+
+    runner = ParallelBacktestRunner(200000, '2024-01-02', '2024-01-04', chunk='day', warmup_bars=100, max_workers=1)
+    merged = asyncio.run(runner.run_backtest(factory, 'NIFTY', data=data))
+
+    def key(trade):
+        return (trade['timestamp'], trade['action'], round(trade['price'], 6), round(trade.get('pnl', 0.0), 6))
+
+    assert sequential.trades and any(t.get('exit_reason') == 'day_end' for t in sequential.trades)
+    assert [key(t) for t in merged.trades] == [key(t) for t in sequential.trades]
+    # Every chunk ends flat, so chained equity equals the sequential equity
+    assert abs(merged.current_capital - sequential.current_capital) < 1e-6
+    assert not sequential.positions
+
+
+def test_strategy_re_enters_after_an_intrabar_exit():
+    from src.backtest import BacktestEngine
+    from src.backtest.fills import IntrabarExitSimulator
+    from src.strategy.enhanced_pine_script_strategy import EnhancedPineScriptStrategy
+
+    rng = np.random.default_rng(5)
+    timestamps = pd.date_range('2024-01-02 09:15', periods=750, freq='1min')
+    closes = 150 + np.cumsum(rng.normal(0, 0.6, len(timestamps)))
+    opens = closes + rng.normal(0, 0.2, len(timestamps))
+    data = pd.DataFrame({
+        'timestamp': timestamps, 'open': opens, 'high': np.maximum(opens, closes) + 0.3,
+        'low': np.minimum(opens, closes) - 0.3, 'close': closes, 'volume': 1000
+    })
+
+    strategy = EnhancedPineScriptStrategy('intrabar', {'trading_mode': 'CE_ONLY'})
+    engine = BacktestEngine(200000, '2024-01-02', '2024-01-02', exit_simulator=IntrabarExitSimulator(0.005, 0.005))
+    asyncio.run(engine.run_backtest(strategy, 'NIFTY', data=data, verbose=False))
+
+    intrabar_exits = [t for t in engine.trades if t.get('exit_reason') in ('stop_loss', 'profit_target')]
+    buys = [t for t in engine.trades if t['action'] == 'BUY']
+    assert intrabar_exits
+    # The strategy heard about each intrabar exit, so it entered again afterwards
+    assert buys[-1]['timestamp'] > intrabar_exits[0]['timestamp']
+    assert len(buys) > 1
+
+
+def test_replay_equity_with_an_open_position_matches_equity_after_closing_it():
+    from src.backtest import EventDrivenBacktest
+    from src.backtest.simulation import build_simulated_bot, simulation_settings
+
+    bot = build_simulated_bot([], settings=simulation_settings(paper_option_pricing=False))
+    replay = EventDrivenBacktest(bot, min_candles=10**6, initial_capital=20000)
+
+    def candle(minute, close):
+        return {'start_time': datetime(2024, 1, 2, 9, 15 + minute), 'open': close, 'high': close,
+                'low': close, 'close': close, 'volume': 1000}
+
+    async def run():
+        await bot.place_order(Order('NIFTY', 1, 100.0, OrderType.MARKET, TransactionType.BUY))
+        await replay.process_candle('NIFTY', candle(0, 110.0))
+        marked = replay.metrics.last_value
+
+        await bot.place_order(Order('NIFTY', 1, 110.0, OrderType.MARKET, TransactionType.SELL))
+        await replay.process_candle('NIFTY', candle(1, 110.0))
+        return marked, replay.metrics.last_value
+
+    marked, closed = asyncio.run(run())
+
+    # One lot of 75 up 10 points: the same Rs.750 whether marked or realized
+    assert bot.total_pnl == 750.0
+    assert marked == closed == 20750.0
+
+
+def test_paper_fills_are_priced_as_the_held_option_contract():
+    from src.backtest import EventDrivenBacktest
+    from src.backtest.simulation import build_simulated_bot
+
+    bot = build_simulated_bot([])
+    replay = EventDrivenBacktest(bot, min_candles=10**6, initial_capital=20000)
+    model = OptionPremiumModel(strike_step=50, iv=0.15, expiry_weekday=3)
+
+    def candle(minute, close):
+        return {'start_time': datetime(2024, 1, 2, 9, 15 + minute), 'open': close, 'high': close,
+                'low': close, 'close': close, 'volume': 1000}
+
+    async def run():
+        await replay.process_candle('NIFTY', candle(0, 21990.0))
+        entry = Order('NIFTY', 1, 21990.0, OrderType.MARKET, TransactionType.BUY, option_type='PE')
+        await bot.place_order(entry)
+        contract = dict(bot.contracts['NIFTY_default'])
+
+        await replay.process_candle('NIFTY', candle(1, 21920.0))
+        marked = replay.metrics.last_value
+
+        exit_order = Order('NIFTY', 1, 21920.0, OrderType.MARKET, TransactionType.SELL, option_type='PE')
+        await bot.place_order(exit_order)
+        await replay.process_candle('NIFTY', candle(2, 21920.0))
+        return entry, exit_order, contract, marked, replay.metrics.last_value
+
+    entry, exit_order, contract, marked, closed = asyncio.run(run())
+
+    # The ATM put on the Thursday expiry, not the index level
+    assert contract['strike'] == 22000.0
+    assert contract['expiry'] == pd.Timestamp(2024, 1, 4, 15, 30)
+    expected_entry = model.contract_premium(datetime(2024, 1, 2, 9, 16), 21990.0, 22000.0, contract['expiry'], 'PE')
+    expected_exit = model.contract_premium(datetime(2024, 1, 2, 9, 17), 21920.0, 22000.0, contract['expiry'], 'PE')
+    assert entry.filled_price == pytest.approx(expected_entry)
+    assert exit_order.filled_price == pytest.approx(expected_exit)
+    assert 0 < entry.filled_price < 500
+
+    # The put gains as the index falls; marked and realized equity agree
+    assert bot.total_pnl == pytest.approx((expected_exit - expected_entry) * 75)
+    assert bot.total_pnl > 0
+    assert marked == pytest.approx(closed)
+    assert not bot.contracts
+